@@ -1,15 +1,52 @@
+import importlib
+
 import rich_click as click
-from fusion.commands import scan, imp, find, export  # sub-commands
+from fusion import instrument
+
+# Sub-command name -> module defining its ``cli``, imported only when that
+# command runs (or help lists it), so `fusion find` never loads the scan,
+# XML, CVE or HTTP layers
+SUBCOMMANDS = {
+    "scan": "fusion.commands.scan",
+    "import": "fusion.commands.imp",
+    "find": "fusion.commands.find",
+    "export": "fusion.commands.export",
+    "cves": "fusion.commands.cves",
+    "dashboard": "fusion.commands.dashboard",
+    "serve": "fusion.commands.serve",
+}
+
+
+class LazyGroup(click.RichGroup):
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(SUBCOMMANDS))
 
-@click.group()
-def cli():
+    def get_command(self, ctx, name):
+        if name in SUBCOMMANDS and name not in self.commands:
+            self.add_command(importlib.import_module(SUBCOMMANDS[name]).cli, name=name)
+        return super().get_command(ctx, name)
+
+
+@click.group(cls=LazyGroup)
+@click.option("--profile", is_flag=True, envvar="FUSION_PROFILE",
+              help="Time pipeline stages, print a summary and write a Chrome trace.")
+@click.option("--profile-trace", default="fusion-trace.json", show_default=True,
+              help="Trace-event JSON written by --profile (chrome://tracing, ui.perfetto.dev).")
+@click.option("--profile-cprofile", metavar="DIR", default=None,
+              help="Also dump one cProfile file per stage into DIR (implies --profile).")
+@click.pass_context
+def cli(ctx, profile, profile_trace, profile_cprofile):
     """Fusion – correlate Nmap & SpiderFoot intelligence."""
+    if profile or profile_cprofile:
+        instrument.start(profile_trace, profile_cprofile)
+        ctx.call_on_close(finish_profile)
 
-cli.add_command(scan.cli,  name="scan")
-cli.add_command(imp.cli,   name="import")
-cli.add_command(find.cli,  name="find")
-cli.add_command(export.cli,name="export")
+
+def finish_profile():
+    profiler = instrument.stop()
+    click.echo(profiler.summary(), err=True)
+    for path in profiler.write():
+        click.echo(f"Profile written to {path}", err=True)
 
 if __name__ == "__main__":
     cli()
-
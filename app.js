@@ -176,17 +176,158 @@ let currentRiskFilter = '';
 let selectedOsintRow = null;
 let selectedNmapRow = null;
 
+// Paging and virtual scrolling
+const API_BASE = '/api';
+const PAGE_SIZE = 200;        // rows fetched per request
+const EXPORT_PAGE = 1000;     // rows per chunk of a locally built export
+const ROW_HEIGHT = 45;        // estimate until the first rendered row is measured
+const OVERSCAN_ROWS = 10;     // extra rows rendered above and below the viewport
+const CACHED_PAGES = 6;       // loaded pages kept per table, least recently shown dropped first
+const SEARCH_DEBOUNCE_MS = 150;
+const SHORT_QUERY_CACHE = 256; // memoized results of 1-2 character searches
+
+const RISK_WEIGHTS = { Low: 1, Medium: 2, High: 3 };
+const EXPORT_TYPES = { ndjson: 'application/x-ndjson', csv: 'text/csv' };
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+
+// Per-table settings; `records` are the embedded rows used when no API is running
+const tables = {
+  osint: {
+    tbody: 'osint-tbody', columns: 6, riskField: 'risk_level', rowKey: 'finding',
+    records: () => appData.spiderfoot_data, renderRow: osintRowHtml
+  },
+  nmap: {
+    tbody: 'nmap-tbody', columns: 7, riskField: 'risk_level', rowKey: 'target',
+    records: () => appData.nmap_data, renderRow: nmapRowHtml
+  },
+  correlations: {
+    tbody: 'correlation-tbody', columns: 7, riskField: 'combined_risk',
+    records: () => appData.correlations, renderRow: correlationRowHtml
+  }
+};
+
+// Loaded pages (page index -> rows, in least recently shown order), the API's
+// keyset cursors behind each page and scroll geometry per table; replaced
+// whenever search, filter or sort change
+const tableState = {};
+// Highlighted findings / ip:port targets, kept as keys so they survive re-rendering
+const highlights = { osint: new Set(), nmap: new Set() };
+// Rendered rows by data-finding / data-target, rebuilt after every render
+const rowElements = { osint: new Map(), nmap: new Map() };
+// Rows currently carrying the highlighted class
+const highlightedRows = { osint: new Set(), nmap: new Set() };
+let highlightRequest = 0;
+const pendingRenders = new Set();
+
+// Embedded appData, searched through per-table SearchIndex (file:// or no backend)
+const searchIndexes = {};
+
+const localSource = {
+  async page(name, { offset = 0, limit = PAGE_SIZE, sort = '', order = 'asc', q = '', risk = '' }) {
+    const index = searchIndex(name);
+    const ids = index.query(q, risk, sort, order);
+    const rows = Array.from(ids.slice(offset, offset + limit), id => index.records[id]);
+    return { total: ids.length, offset, limit, rows };
+  },
+
+  async stats() {
+    const allItems = [...appData.spiderfoot_data, ...appData.nmap_data];
+    const riskLevels = {};
+    allItems.forEach(item => { riskLevels[item.risk_level] = (riskLevels[item.risk_level] || 0) + 1; });
+    return { total_findings: allItems.length, correlations: appData.correlations.length, risk_levels: riskLevels };
+  },
+
+  // `kind` is 'finding' (-> ip:port targets) or 'target' (-> findings)
+  async neighbors(kind, key) {
+    return correlationAdjacency()[kind].get(key) || [];
+  }
+};
+
+// finding -> correlated targets and target -> correlated findings, built once from appData
+let adjacency = null;
+
+function correlationAdjacency() {
+  if (!adjacency) {
+    const sets = { finding: new Map(), target: new Map() };
+    const link = (map, from, to) => {
+      let keys = map.get(from);
+      if (!keys) map.set(from, keys = new Set());
+      keys.add(to);
+    };
+    appData.correlations.forEach(corr => {
+      link(sets.finding, corr.osint_finding, corr.nmap_target);
+      link(sets.target, corr.nmap_target, corr.osint_finding);
+    });
+    adjacency = {};
+    Object.entries(sets).forEach(([kind, map]) => {
+      adjacency[kind] = new Map(Array.from(map, ([key, keys]) => [key, Array.from(keys)]));
+    });
+  }
+  return adjacency;
+}
+
+// `fusion dashboard` API: pages are sorted and filtered by the store
+const apiSource = {
+  async page(name, params) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined && value !== '') query.set(key, value);
+    });
+    return fetchJson(`${API_BASE}/${name}?${query}`);
+  },
+
+  async stats() {
+    return fetchJson(`${API_BASE}/stats`);
+  },
+
+  // Answered from indexes by the store and cached for repeat clicks
+  async neighbors(kind, key) {
+    const cacheKey = `${kind}\u0000${key}`;
+    if (!neighborCache.has(cacheKey)) {
+      const result = await fetchJson(`${API_BASE}/neighbors?${new URLSearchParams({ [kind]: key })}`);
+      neighborCache.set(cacheKey, result.keys);
+    }
+    return neighborCache.get(cacheKey);
+  }
+};
+
+const neighborCache = new Map();
+
+let dataSource = localSource;
+
+async function fetchJson(url) {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`${url}: HTTP ${response.status}`);
+  }
+  return response.json();
+}
+
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
   initializeApp();
 });
 
-function initializeApp() {
+async function initializeApp() {
   setupEventListeners();
+  resetTables();
+  dataSource = await detectDataSource();
   updateDashboardStats();
-  renderOsintTable();
-  renderNmapTable();
-  renderCorrelationTable();
+  renderCurrentTab();
+  if (dataSource === localSource) {
+    // Index every table once the first page is on screen
+    setTimeout(() => Object.keys(tables).forEach(name => searchIndex(name).build()), 0);
+  }
+}
+
+async function detectDataSource() {
+  if (location.protocol === 'file:') return localSource;
+  try {
+    await apiSource.stats();
+    return apiSource;
+  } catch (error) {
+    return localSource;
+  }
 }
 
 function setupEventListeners() {
@@ -197,20 +338,46 @@ function setupEventListeners() {
     });
   });
 
-  // Search functionality
-  document.getElementById('search-input').addEventListener('input', function() {
-    currentSearch = this.value.toLowerCase();
+  // Search functionality, once typing pauses
+  document.getElementById('search-input').addEventListener('input', debounce(function(event) {
+    const search = event.target.value.toLowerCase();
+    if (search === currentSearch) return;
+    currentSearch = search;
+    resetTables();
     renderCurrentTab();
-  });
+  }, SEARCH_DEBOUNCE_MS));
 
   // Risk filter
   document.getElementById('risk-filter').addEventListener('change', function() {
     currentRiskFilter = this.value;
+    resetTables();
     renderCurrentTab();
   });
 
   // Export functionality
   document.getElementById('export-btn').addEventListener('click', exportResults);
+
+  // Virtual scrolling: rows are rendered for the visible window only, and
+  // row clicks are handled once per table since rows are recreated on scroll
+  const rowHandlers = { osint: handleOsintRowClick, nmap: handleNmapRowClick };
+  Object.keys(tables).forEach(name => {
+    tableContainer(name).addEventListener('scroll', () => scheduleRender(name), { passive: true });
+    const handler = rowHandlers[name];
+    if (handler) {
+      document.getElementById(tables[name].tbody).addEventListener('click', function(event) {
+        const row = event.target.closest('tr[data-index]');
+        const item = row && rowItem(name, Number(row.dataset.index));
+        if (item) handler(item, row);
+      });
+    }
+  });
+
+  // Column sorting
+  document.querySelectorAll('th[data-sort]').forEach(th => {
+    th.addEventListener('click', function() {
+      sortTable(this.closest('.tab-pane').id.replace(/-tab$/, ''), this.dataset.sort);
+    });
+  });
 }
 
 function switchTab(tabName) {
@@ -230,144 +397,401 @@ function switchTab(tabName) {
   
   // Clear selections when switching tabs
   clearHighlights();
+
+  // Hidden tables have no viewport, so render once visible
+  renderTable(tabName);
 }
 
-function updateDashboardStats() {
-  const totalFindings = appData.spiderfoot_data.length + appData.nmap_data.length;
-  const correlationsCount = appData.correlations.length;
-  
-  // Calculate risk levels correctly
-  const allItems = [...appData.spiderfoot_data, ...appData.nmap_data];
-  const highRiskCount = allItems.filter(item => item.risk_level === 'High').length;
-  const mediumRiskCount = allItems.filter(item => item.risk_level === 'Medium').length;
-  
-  document.getElementById('total-findings').textContent = totalFindings;
-  document.getElementById('correlations-count').textContent = correlationsCount;
-  document.getElementById('high-risk').textContent = highRiskCount;
-  document.getElementById('medium-risk').textContent = mediumRiskCount;
+async function updateDashboardStats() {
+  try {
+    const stats = await dataSource.stats();
+    const riskLevels = stats.risk_levels;
+    document.getElementById('total-findings').textContent = stats.total_findings;
+    document.getElementById('correlations-count').textContent = stats.correlations;
+    document.getElementById('high-risk').textContent = riskLevels.High || 0;
+    document.getElementById('medium-risk').textContent = riskLevels.Medium || 0;
+  } catch (error) {
+    showNotification(`Could not load statistics: ${error.message}`);
+  }
 }
 
-function renderOsintTable() {
-  const tbody = document.getElementById('osint-tbody');
-  const filteredData = filterData(appData.spiderfoot_data);
-  
-  tbody.innerHTML = '';
-  
-  filteredData.forEach((item, index) => {
-    const row = document.createElement('tr');
-    row.className = 'clickable';
-    row.dataset.finding = item.finding;
-    row.dataset.type = 'osint';
-    
-    row.innerHTML = `
-      <td>${item.type}</td>
-      <td><strong>${item.finding}</strong></td>
-      <td>${item.value}</td>
-      <td>${item.source}</td>
-      <td><span class="status risk-${item.risk_level.toLowerCase()}">${item.risk_level}</span></td>
-      <td>${item.category}</td>
-    `;
-    
-    row.addEventListener('click', function() {
-      handleOsintRowClick(item, row);
-    });
-    
-    tbody.appendChild(row);
+function tableContainer(name) {
+  return document.getElementById(tables[name].tbody).closest('.table-container');
+}
+
+function resetTable(name) {
+  const previous = tableState[name] || { generation: 0, rowHeight: ROW_HEIGHT, sort: '', order: 'asc' };
+  tableState[name] = {
+    generation: previous.generation + 1,
+    rowHeight: previous.rowHeight,
+    sort: previous.sort,
+    order: previous.order,
+    total: null,
+    pages: new Map(),
+    cursors: new Map()
+  };
+  tableContainer(name).scrollTop = 0;
+}
+
+function resetTables() {
+  Object.keys(tables).forEach(resetTable);
+}
+
+function loadPage(name, index) {
+  const state = tableState[name];
+  if (state.pages.has(index)) {
+    // Mark as recently shown
+    const rows = state.pages.get(index);
+    state.pages.delete(index);
+    state.pages.set(index, rows);
+    return;
+  }
+  state.pages.set(index, null);
+  dataSource.page(name, {
+    offset: index * PAGE_SIZE, limit: PAGE_SIZE, sort: state.sort, order: state.order,
+    q: currentSearch, risk: currentRiskFilter,
+    // Continue behind the previous page by its sort key when it has been loaded before
+    after: state.cursors.get(index - 1),
+    // The total only needs counting once per search/filter
+    count: state.total === null ? 1 : 0
+  }).then(result => {
+    // Drop pages requested before the search, filter or sort changed
+    if (tableState[name] !== state) return;
+    if (result.total !== null) state.total = result.total;
+    if (result.next) state.cursors.set(index, result.next);
+    state.pages.set(index, result.rows);
+    evictPages(state);
+    scheduleRender(name);
+  }).catch(error => {
+    if (tableState[name] !== state) return;
+    state.pages.delete(index);
+    showNotification(`Could not load results: ${error.message}`);
   });
 }
 
-function renderNmapTable() {
-  const tbody = document.getElementById('nmap-tbody');
-  const filteredData = filterData(appData.nmap_data);
-  
-  tbody.innerHTML = '';
-  
-  filteredData.forEach((item, index) => {
-    const row = document.createElement('tr');
-    row.className = 'clickable';
-    row.dataset.target = `${item.ip}:${item.port}`;
-    row.dataset.type = 'nmap';
-    
-    const vulnerabilityDisplay = item.vulnerabilities.length > 0 
-      ? item.vulnerabilities.map(vuln => `<span class="vulnerability" title="Click for CVE details">${vuln}</span>`).join(' ')
-      : 'None';
-    
-    row.innerHTML = `
-      <td>${item.ip}</td>
-      <td>${item.port}</td>
-      <td>${item.service}</td>
-      <td>${item.version}</td>
-      <td>${item.state}</td>
-      <td><span class="status risk-${item.risk_level.toLowerCase()}">${item.risk_level}</span></td>
-      <td class="vulnerabilities">${vulnerabilityDisplay}</td>
-    `;
-    
-    row.addEventListener('click', function() {
-      handleNmapRowClick(item, row);
-    });
-    
-    tbody.appendChild(row);
+// Keep the CACHED_PAGES most recently shown pages; pages still loading stay
+function evictPages(state) {
+  for (const [index, rows] of state.pages) {
+    if (state.pages.size <= CACHED_PAGES) break;
+    if (rows) state.pages.delete(index);
+  }
+}
+
+function rowItem(name, index) {
+  const page = tableState[name].pages.get(Math.floor(index / PAGE_SIZE));
+  return page ? page[index % PAGE_SIZE] : undefined;
+}
+
+function scheduleRender(name) {
+  if (pendingRenders.has(name)) return;
+  pendingRenders.add(name);
+  requestAnimationFrame(() => {
+    pendingRenders.delete(name);
+    renderTable(name);
   });
 }
 
-function renderCorrelationTable() {
-  const tbody = document.getElementById('correlation-tbody');
-  const filteredData = filterCorrelationData(appData.correlations);
-  
-  tbody.innerHTML = '';
-  
-  filteredData.forEach((item, index) => {
-    const row = document.createElement('tr');
-    row.dataset.index = index;
-    
-    const scoreClass = getCorrelationScoreClass(item.correlation_score);
-    const reasonsDisplay = item.correlation_reasons.join(', ');
-    
-    row.innerHTML = `
-      <td><strong>${item.osint_finding}</strong></td>
-      <td>${item.osint_type}</td>
-      <td>${item.nmap_target}</td>
-      <td>${item.nmap_service}</td>
+function renderTable(name) {
+  const table = tables[name];
+  const state = tableState[name];
+  const tbody = document.getElementById(table.tbody);
+
+  if (state.total === null) {
+    loadPage(name, 0);
+    tbody.innerHTML = messageRow(table.columns, 'Loading…');
+    return;
+  }
+  if (state.total === 0) {
+    tbody.innerHTML = messageRow(table.columns, 'No matching results');
+    return;
+  }
+
+  // Only the rows in (and just around) the viewport exist in the DOM;
+  // spacer rows give the scrollbar the height of the full result set
+  const container = tableContainer(name);
+  const height = state.rowHeight;
+  const first = Math.max(0, Math.floor(container.scrollTop / height) - OVERSCAN_ROWS);
+  const last = Math.min(state.total, Math.ceil((container.scrollTop + container.clientHeight) / height) + OVERSCAN_ROWS);
+  for (let index = Math.floor(first / PAGE_SIZE); index * PAGE_SIZE < last; index++) {
+    loadPage(name, index);
+  }
+
+  const html = [spacerRow(table.columns, first * height)];
+  for (let i = first; i < last; i++) {
+    const item = rowItem(name, i);
+    html.push(item ? table.renderRow(item, i) : messageRow(table.columns, 'Loading…', 'placeholder-row'));
+  }
+  html.push(spacerRow(table.columns, (state.total - last) * height));
+  tbody.innerHTML = html.join('');
+
+  indexRows(name, tbody);
+  measureRowHeight(name, tbody);
+}
+
+function measureRowHeight(name, tbody) {
+  const row = tbody.querySelector('tr[data-index]');
+  const state = tableState[name];
+  if (row && row.offsetHeight && Math.abs(row.offsetHeight - state.rowHeight) > 1) {
+    state.rowHeight = row.offsetHeight;
+    scheduleRender(name);
+  }
+}
+
+function spacerRow(columns, height) {
+  return `<tr class="spacer-row" aria-hidden="true"><td colspan="${columns}" style="height: ${height}px"></td></tr>`;
+}
+
+function messageRow(columns, text, className = 'message-row') {
+  return `<tr class="${className}"><td colspan="${columns}">${text}</td></tr>`;
+}
+
+function escapeHtml(value) {
+  return String(value ?? '').replace(/[&<>"']/g, ch => HTML_ESCAPES[ch]);
+}
+
+function riskBadge(level) {
+  const text = escapeHtml(level);
+  return `<span class="status risk-${text.toLowerCase()}">${text}</span>`;
+}
+
+function osintRowHtml(item, index) {
+  return `<tr class="clickable data-row" data-index="${index}" data-finding="${escapeHtml(item.finding)}" data-type="osint">
+      <td>${escapeHtml(item.type)}</td>
+      <td><strong>${escapeHtml(item.finding)}</strong></td>
+      <td>${escapeHtml(item.value)}</td>
+      <td>${escapeHtml(item.source)}</td>
+      <td>${riskBadge(item.risk_level)}</td>
+      <td>${escapeHtml(item.category)}</td>
+    </tr>`;
+}
+
+function nmapRowHtml(item, index) {
+  const vulnerabilityDisplay = item.vulnerabilities.length > 0
+    ? item.vulnerabilities.map(vuln => `<span class="vulnerability" title="Click for CVE details">${escapeHtml(vuln)}</span>`).join(' ')
+    : 'None';
+
+  return `<tr class="clickable data-row" data-index="${index}" data-target="${escapeHtml(`${item.ip}:${item.port}`)}" data-type="nmap">
+      <td>${escapeHtml(item.ip)}</td>
+      <td>${escapeHtml(item.port)}</td>
+      <td>${escapeHtml(item.service)}</td>
+      <td>${escapeHtml(item.version)}</td>
+      <td>${escapeHtml(item.state)}</td>
+      <td>${riskBadge(item.risk_level)}</td>
+      <td class="vulnerabilities">${vulnerabilityDisplay}</td>
+    </tr>`;
+}
+
+function correlationRowHtml(item, index) {
+  const scoreClass = getCorrelationScoreClass(item.correlation_score);
+  const reasonsDisplay = escapeHtml(item.correlation_reasons.join(', '));
+
+  return `<tr class="data-row" data-index="${index}">
+      <td><strong>${escapeHtml(item.osint_finding)}</strong></td>
+      <td>${escapeHtml(item.osint_type)}</td>
+      <td>${escapeHtml(item.nmap_target)}</td>
+      <td>${escapeHtml(item.nmap_service)}</td>
       <td><span class="correlation-score ${scoreClass}" title="Correlation strength indicator">${item.correlation_score.toFixed(1)}</span></td>
-      <td><span class="status risk-${item.combined_risk.toLowerCase()}">${item.combined_risk}</span></td>
+      <td>${riskBadge(item.combined_risk)}</td>
       <td title="${reasonsDisplay}">${reasonsDisplay}</td>
-    `;
-    
-    tbody.appendChild(row);
-  });
+    </tr>`;
 }
 
-function filterData(data) {
-  return data.filter(item => {
-    const matchesSearch = !currentSearch || 
-      Object.values(item).some(value => {
-        if (value === null || value === undefined) return false;
-        return value.toString().toLowerCase().includes(currentSearch);
-      });
-    
-    const matchesRiskFilter = !currentRiskFilter || 
-      item.risk_level === currentRiskFilter;
-    
-    return matchesSearch && matchesRiskFilter;
-  });
+// Lower-cased field values of a record, one per line so matches never span fields
+function searchText(item) {
+  let text = '';
+  for (const key in item) {
+    const value = item[key];
+    if (value === null || value === undefined) continue;
+    text += (Array.isArray(value) ? value.join('\n') : value.toString()) + '\n';
+  }
+  return text.toLowerCase();
 }
 
-function filterCorrelationData(data) {
-  return data.filter(item => {
-    const matchesSearch = !currentSearch || 
-      Object.values(item).some(value => {
-        if (value === null || value === undefined) return false;
-        if (Array.isArray(value)) {
-          return value.some(v => v.toString().toLowerCase().includes(currentSearch));
-        }
-        return value.toString().toLowerCase().includes(currentSearch);
-      });
-    
-    const matchesRiskFilter = !currentRiskFilter || 
-      item.combined_risk === currentRiskFilter;
-    
-    return matchesSearch && matchesRiskFilter;
+// Three characters packed into a 30-bit integer key (10 bits each). Rare
+// collisions between non-ASCII characters only add candidates, which
+// SearchIndex.confirm() rejects.
+function trigramCode(text, i) {
+  return (text.charCodeAt(i) & 0x3ff) << 20 | (text.charCodeAt(i + 1) & 0x3ff) << 10 | (text.charCodeAt(i + 2) & 0x3ff);
+}
+
+function trigrams(text) {
+  const grams = new Set();
+  for (let i = 0; i + 3 <= text.length; i++) {
+    grams.add(trigramCode(text, i));
+  }
+  return grams;
+}
+
+// Ids present in both ascending id lists; binary searches the longer one
+function intersectSorted(small, large) {
+  const result = [];
+  let low = 0;
+  for (const id of small) {
+    let high = large.length;
+    while (low < high) {
+      const mid = (low + high) >>> 1;
+      if (large[mid] < id) low = mid + 1; else high = mid;
+    }
+    if (low === large.length) break;
+    if (large[low] === id) result.push(id);
+  }
+  return result;
+}
+
+/*
+ * Search index over one table's records, built once at load time.
+ *
+ * A trigram -> record ids map narrows a search to the records containing
+ * every trigram of the query, which are then confirmed with a substring
+ * test; 1-2 character searches are memoized. Risk levels are bitmaps, so
+ * search plus risk filter is an intersection, and the last result is kept
+ * for the page requests that follow it.
+ */
+class SearchIndex {
+  constructor(records, riskField) {
+    this.records = records;
+    this.all = Uint32Array.from(records.keys());
+    this.texts = null;
+    this.grams = null;
+
+    this.riskBits = {};
+    const words = Math.ceil(records.length / 32);
+    records.forEach((item, id) => {
+      const level = item[riskField];
+      const bits = this.riskBits[level] || (this.riskBits[level] = new Uint32Array(words));
+      bits[id >>> 5] |= 1 << (id & 31);
+    });
+
+    this.shortQueries = new Map();
+    this.ranks = {};
+    this.last = { key: null, ids: null };
+  }
+
+  // Texts and trigram lists; built right after the first render, or by the first search
+  build() {
+    if (this.grams) return;
+    this.texts = this.records.map(searchText);
+    const grams = new Map();
+    for (let id = 0; id < this.texts.length; id++) {
+      const text = this.texts[id];
+      for (let i = 0; i + 3 <= text.length; i++) {
+        const gram = trigramCode(text, i);
+        let ids = grams.get(gram);
+        if (!ids) grams.set(gram, ids = []);
+        // Ids arrive in ascending order, so a repeat is always the last entry
+        if (ids[ids.length - 1] !== id) ids.push(id);
+      }
+    }
+    this.grams = grams;
+  }
+
+  search(q) {
+    if (!q) return this.all;
+    this.build();
+    if (q.length < 3) {
+      let ids = this.shortQueries.get(q);
+      if (!ids) {
+        if (this.shortQueries.size >= SHORT_QUERY_CACHE) this.shortQueries.clear();
+        ids = this.confirm(this.all, q);
+        this.shortQueries.set(q, ids);
+      }
+      return ids;
+    }
+    const lists = [];
+    for (const gram of trigrams(q)) {
+      const ids = this.grams.get(gram);
+      if (!ids) return [];
+      lists.push(ids);
+    }
+    lists.sort((a, b) => a.length - b.length);
+    let ids = lists[0];
+    for (let i = 1; i < lists.length && ids.length; i++) {
+      ids = intersectSorted(ids, lists[i]);
+    }
+    return this.confirm(ids, q);
+  }
+
+  confirm(ids, q) {
+    const result = [];
+    for (const id of ids) {
+      if (this.texts[id].includes(q)) result.push(id);
+    }
+    return result;
+  }
+
+  withRisk(ids, risk) {
+    if (!risk) return ids;
+    const bits = this.riskBits[risk];
+    if (!bits) return [];
+    const result = [];
+    for (const id of ids) {
+      if (bits[id >>> 5] & (1 << (id & 31))) result.push(id);
+    }
+    return result;
+  }
+
+  // Position of every record in `key` order, computed once per sort key
+  rank(key) {
+    if (!this.ranks[key]) {
+      const rank = new Uint32Array(this.records.length);
+      const sorted = Array.from(this.all).sort((a, b) => compareValues(
+        sortValue(this.records[a], key), sortValue(this.records[b], key)) || a - b);
+      sorted.forEach((id, position) => { rank[id] = position; });
+      this.ranks[key] = rank;
+    }
+    return this.ranks[key];
+  }
+
+  // Matching record ids for a search, risk filter and sort, in display order
+  query(q, risk, sort, order) {
+    const key = `${q}\u0000${risk}\u0000${sort}\u0000${order}`;
+    if (this.last.key !== key) {
+      let ids = this.withRisk(this.search(q), risk);
+      if (sort) {
+        const rank = this.rank(sort);
+        const direction = order === 'desc' ? -1 : 1;
+        ids = Array.from(ids).sort((a, b) => direction * (rank[a] - rank[b]));
+      }
+      this.last = { key, ids };
+    }
+    return this.last.ids;
+  }
+}
+
+function searchIndex(name) {
+  if (!searchIndexes[name]) {
+    searchIndexes[name] = new SearchIndex(tables[name].records(), tables[name].riskField);
+  }
+  return searchIndexes[name];
+}
+
+function sortValue(item, key) {
+  const value = item[key];
+  if (key === 'risk_level' || key === 'combined_risk') return RISK_WEIGHTS[value] || 0;
+  if (key === 'ip' || key === 'nmap_target') {
+    // 192.168.1.9:80 before 192.168.1.10:22
+    return String(value).split(/[.:]/).map(part => part.padStart(5, '0')).join('.');
+  }
+  return value;
+}
+
+function compareValues(a, b) {
+  return typeof a === 'number' && typeof b === 'number' ? a - b : String(a).localeCompare(String(b));
+}
+
+function sortTable(name, key) {
+  const state = tableState[name];
+  state.order = state.sort === key && state.order === 'asc' ? 'desc' : 'asc';
+  state.sort = key;
+  resetTable(name);
+  document.querySelectorAll(`#${name}-tab th[data-sort]`).forEach(th => {
+    if (th.dataset.sort === key) {
+      th.setAttribute('aria-sort', state.order === 'asc' ? 'ascending' : 'descending');
+    } else {
+      th.removeAttribute('aria-sort');
+    }
   });
+  renderTable(name);
 }
 
 function getCorrelationScoreClass(score) {
@@ -376,101 +800,190 @@ function getCorrelationScoreClass(score) {
   return 'weak';
 }
 
-function handleOsintRowClick(osintItem, row) {
+async function handleOsintRowClick(osintItem, row) {
   clearHighlights();
+  const request = highlightRequest;
   selectedOsintRow = row;
-  row.classList.add('highlighted');
+  highlightKeys('osint', [osintItem.finding]);
   
   // Find and highlight related nmap findings
-  const relatedCorrelations = appData.correlations.filter(corr => 
-    corr.osint_finding === osintItem.finding
-  );
-  
-  // Highlight related nmap rows
-  relatedCorrelations.forEach(corr => {
-    const nmapRows = document.querySelectorAll('#nmap-tbody tr');
-    nmapRows.forEach(nmapRow => {
-      const target = nmapRow.dataset.target;
-      if (target === corr.nmap_target) {
-        nmapRow.classList.add('highlighted');
-      }
-    });
-  });
+  const targets = await dataSource.neighbors('finding', osintItem.finding);
+  if (request !== highlightRequest) return;
+  highlightKeys('nmap', targets);
   
   // Show notification
-  showNotification(`Found ${relatedCorrelations.length} related network scan result(s)`);
+  showNotification(`Found ${targets.length} related network scan result(s)`);
 }
 
-function handleNmapRowClick(nmapItem, row) {
+async function handleNmapRowClick(nmapItem, row) {
   clearHighlights();
+  const request = highlightRequest;
   selectedNmapRow = row;
-  row.classList.add('highlighted');
-  
-  // Find and highlight related OSINT findings
   const target = `${nmapItem.ip}:${nmapItem.port}`;
-  const relatedCorrelations = appData.correlations.filter(corr => 
-    corr.nmap_target === target
-  );
+  highlightKeys('nmap', [target]);
   
-  // Highlight related OSINT rows
-  relatedCorrelations.forEach(corr => {
-    const osintRows = document.querySelectorAll('#osint-tbody tr');
-    osintRows.forEach(osintRow => {
-      const finding = osintRow.dataset.finding;
-      if (finding === corr.osint_finding) {
-        osintRow.classList.add('highlighted');
-      }
-    });
-  });
+  // Find and highlight related OSINT findings
+  const findings = await dataSource.neighbors('target', target);
+  if (request !== highlightRequest) return;
+  highlightKeys('osint', findings);
   
   // Show notification
-  showNotification(`Found ${relatedCorrelations.length} related OSINT finding(s)`);
+  showNotification(`Found ${findings.length} related OSINT finding(s)`);
+}
+
+// Map the freshly rendered rows of a table by key and re-apply its highlights
+function indexRows(name, tbody) {
+  const elements = rowElements[name];
+  if (!elements) return;
+  const attribute = tables[name].rowKey;
+  elements.clear();
+  // The previous rows were just replaced
+  highlightedRows[name].clear();
+  for (const row of tbody.children) {
+    const key = row.dataset[attribute];
+    if (key === undefined) continue;
+    let rows = elements.get(key);
+    if (!rows) elements.set(key, rows = []);
+    rows.push(row);
+    if (highlights[name].has(key)) markHighlighted(name, row);
+  }
+}
+
+function highlightKeys(name, keys) {
+  const elements = rowElements[name];
+  keys.forEach(key => {
+    highlights[name].add(key);
+    (elements.get(key) || []).forEach(row => markHighlighted(name, row));
+  });
+}
+
+function markHighlighted(name, row) {
+  row.classList.add('highlighted');
+  highlightedRows[name].add(row);
 }
 
 function clearHighlights() {
-  document.querySelectorAll('.highlighted').forEach(el => {
-    el.classList.remove('highlighted');
+  // Results of a click still in flight no longer apply
+  highlightRequest++;
+  Object.keys(highlightedRows).forEach(name => {
+    highlightedRows[name].forEach(row => row.classList.remove('highlighted'));
+    highlightedRows[name].clear();
+    highlights[name].clear();
   });
   selectedOsintRow = null;
   selectedNmapRow = null;
 }
 
 function renderCurrentTab() {
-  switch(currentTab) {
-    case 'osint':
-      renderOsintTable();
-      break;
-    case 'nmap':
-      renderNmapTable();
-      break;
-    case 'correlations':
-      renderCorrelationTable();
-      break;
-  }
-}
-
-function exportResults() {
-  const data = {
-    osint_findings: appData.spiderfoot_data,
-    nmap_results: appData.nmap_data,
-    correlations: appData.correlations,
-    export_timestamp: new Date().toISOString(),
-    total_findings: appData.spiderfoot_data.length + appData.nmap_data.length,
-    correlations_count: appData.correlations.length
-  };
+  renderTable(currentTab);
+}
+
+// Exports are written as NDJSON or CSV a chunk at a time, never as one string:
+// the API streams them from the store, local mode pulls them page by page
+async function exportResults() {
+  const scope = document.getElementById('export-scope').value;
+  const format = document.getElementById('export-format').value;
+  // 'filtered' exports the current tab with its search, risk filter and sort
+  const names = scope === 'filtered' ? [currentTab] : Object.keys(tables);
+  const params = scope === 'filtered' ? exportParams(currentTab) : {};
+  // NDJSON of every table is one file of records tagged with their table
+  const files = format === 'ndjson' && names.length > 1 ? [null] : names;
+  try {
+    for (const name of files) {
+      const filename = `correlation-analysis-${name || 'all'}-${new Date().toISOString().split('T')[0]}.${format}`;
+      if (dataSource === apiSource) {
+        const query = new URLSearchParams({ format, ...params });
+        downloadUrl(`${API_BASE}/export${name ? `/${name}` : ''}?${query}`, filename);
+      } else {
+        await saveStream(exportStream(name ? [name] : names, format, params), filename, EXPORT_TYPES[format]);
+      }
+    }
+  } catch (error) {
+    if (error.name === 'AbortError') return;  // save dialog cancelled
+    showNotification(`Export failed: ${error.message}`);
+    return;
+  }
   
-  const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
-  const url = URL.createObjectURL(blob);
+  // Show export confirmation
+  showNotification('Analysis results exported successfully!');
+}
+
+function exportParams(name) {
+  const state = tableState[name];
+  const params = { q: currentSearch, risk: currentRiskFilter, sort: state.sort, order: state.order };
+  Object.keys(params).forEach(key => { if (!params[key]) delete params[key]; });
+  return params;
+}
+
+// Encoded NDJSON/CSV chunks of the matching rows of `names`, one page per pull
+function exportStream(names, format, params) {
+  const encoder = new TextEncoder();
+  const tagged = names.length > 1;
+  let tableIndex = 0;
+  let offset = 0;
+  let fields = null;
+  return new ReadableStream({
+    async pull(controller) {
+      if (tableIndex === names.length) {
+        controller.close();
+        return;
+      }
+      const name = names[tableIndex];
+      const result = await dataSource.page(name, { ...params, offset, limit: EXPORT_PAGE, count: 0 });
+      let chunk = '';
+      if (format === 'csv') {
+        if (offset === 0) {
+          // Header from the table's record shape, even when nothing matches
+          fields = exportFields(result.rows[0] || tables[name].records()[0]);
+          chunk += csvLine(fields);
+        }
+        result.rows.forEach(row => { chunk += csvLine(fields.map(key => row[key])); });
+      } else {
+        result.rows.forEach(row => {
+          chunk += JSON.stringify(tagged ? { table: name, ...row } : row) + '\n';
+        });
+      }
+      offset += result.rows.length;
+      if (result.rows.length < EXPORT_PAGE) {
+        tableIndex++;
+        offset = 0;
+      }
+      if (chunk) controller.enqueue(encoder.encode(chunk));
+    }
+  });
+}
+
+function exportFields(row) {
+  return row ? Object.keys(row).filter(key => key !== 'id' && !key.endsWith('_id')) : [];
+}
+
+function csvLine(values) {
+  return values.map(value => {
+    const text = Array.isArray(value) ? value.join(';') : value === null || value === undefined ? '' : String(value);
+    return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+  }).join(',') + '\r\n';
+}
+
+// Write a stream to a user-chosen file where supported, else through a Blob
+async function saveStream(stream, filename, type) {
+  if (window.showSaveFilePicker) {
+    const handle = await window.showSaveFilePicker({ suggestedName: filename });
+    await stream.pipeTo(await handle.createWritable());
+    return;
+  }
+  const blob = await new Response(stream).blob();
+  const url = URL.createObjectURL(new Blob([blob], { type }));
+  downloadUrl(url, filename);
+  URL.revokeObjectURL(url);
+}
+
+function downloadUrl(url, filename) {
   const a = document.createElement('a');
   a.href = url;
-  a.download = `correlation-analysis-${new Date().toISOString().split('T')[0]}.json`;
+  a.download = filename;
   document.body.appendChild(a);
   a.click();
   document.body.removeChild(a);
-  URL.revokeObjectURL(url);
-  
-  // Show export confirmation
-  showNotification('Analysis results exported successfully!');
 }
 
 function showNotification(message) {
@@ -0,0 +1,169 @@
+"""Scaling benchmark: indexed and batched correlation vs. a nested loop over every pair.
+
+    python benchmarks/bench_correlate.py [--sizes 1000,10000,100000] [--naive-limit 5000] [--workers 8]
+
+The nested loop scores every pair with :func:`fusion.correlate.score_pair`
+(the current rules, no index); it is only run for sizes up to
+``--naive-limit`` (it is quadratic), and for those sizes both outputs are
+compared for equality. The synthetic data covers every rule: services
+identified by their banner only, Technology findings with bare products
+and version ranges, IP Range findings and CIDR values. The
+batched (pandas) path is always checked against the indexed one, and so is
+the sharded multi-process path when ``--workers`` is given; that column
+is the process count :func:`fusion.parallel.usable_workers` allows for
+the size (at most the CPUs available, one per
+:data:`~fusion.parallel.MIN_SCANS_PER_WORKER` scan rows), and a size it
+runs in one process is marked ``*``. The records
+column times the columnar path (building :mod:`fusion.records` from the
+dicts plus :func:`fusion.batch.correlate_records`), also checked.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from fusion.batch import correlate_frame, correlate_records  # noqa: E402
+from fusion.correlate import SCORE_THRESHOLD, correlate, make_correlation, score_pair  # noqa: E402
+from fusion.parallel import correlate_parallel, usable_workers  # noqa: E402
+from fusion.records import Findings, Services  # noqa: E402
+
+RISKS = ["Low", "Medium", "High"]
+SERVICES = [("HTTP", 80), ("HTTPS", 443), ("SSH", 22), ("MySQL", 3306), ("FTP", 21)]
+VERSIONS = {
+    "HTTP": ["Apache 2.4.41", "Apache 2.4.29", "nginx 1.18.0"],
+    "HTTPS": ["Apache 2.4.41", "nginx 1.18.0"],
+    "SSH": ["OpenSSH 7.6p1", "OpenSSH 8.2p1"],
+    "MySQL": ["5.7.30", "8.0.21"],
+    "FTP": ["vsftpd 3.0.3"],
+}
+# Banners of services nmap could not put a version on
+BANNERS = {
+    "HTTP": ["Apache/2.4.41 (Ubuntu)", "nginx/1.18.0"],
+    "HTTPS": ["Apache/2.4.29 (Debian)"],
+    "SSH": ["SSH-2.0-OpenSSH_8.2p1 Ubuntu-4ubuntu0.5"],
+    "MySQL": ["5.7.30-log"],
+    "FTP": ["220 (vsFTPd 3.0.3)"],
+}
+TECHNOLOGIES = ["Apache 2.4.41", "nginx 1.18.0", "OpenSSH 7.6p1", "IIS 10.0", "OpenSSH", "nginx >=1.18,<1.20"]
+
+
+def synthetic(n_osint, n_scan, seed=1):
+    rnd = random.Random(seed)
+    hosts = max(1, n_scan // 3)
+    ips = [f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}" for i in range(hosts)]
+
+    nmap_data = []
+    for _ in range(n_scan):
+        service, port = rnd.choice(SERVICES)
+        version = rnd.choice(VERSIONS[service])
+        banner = version
+        if rnd.random() < 0.1:
+            version, banner = "", rnd.choice(BANNERS[service])
+        nmap_data.append({
+            "ip": rnd.choice(ips), "port": port, "service": service,
+            "version": version, "state": "open", "banner": banner,
+            "risk_level": rnd.choice(RISKS), "vulnerabilities": [],
+        })
+
+    spiderfoot_data = []
+    for i in range(n_osint):
+        kind = rnd.random()
+        if kind < 0.6:
+            record = {"type": "Subdomain", "finding": f"host{i}.example.com",
+                      "value": rnd.choice(ips), "category": "Attack Surface"}
+        elif kind < 0.78:
+            record = {"type": "Email", "finding": f"user{i}@example.com",
+                      "value": "Found in breach data", "category": "Credentials"}
+        elif kind < 0.79:
+            # A DNS name resolving to a netblock: a CIDR value is not an IP match
+            record = {"type": "Subdomain", "finding": f"net{i}.example.com",
+                      "value": f"{rnd.choice(ips).rpartition('.')[0]}.0/24", "category": "Attack Surface"}
+        elif kind < 0.8:
+            # Small netblocks around a host, paired with the services inside by
+            # the range rule (not Infrastructure, which would add every web service)
+            prefix = rnd.choice((26, 28, 30))
+            network = rnd.choice(ips).rpartition(".")
+            last = int(network[2]) & ~((1 << (32 - prefix)) - 1) & 255
+            record = {"type": "IP Range", "finding": f"{network[0]}.{last}/{prefix}",
+                      "value": "Company network range", "category": "Network"}
+        elif kind < 0.999:
+            record = {"type": "Technology", "finding": rnd.choice(TECHNOLOGIES),
+                      "value": "Web server version", "category": "Technology Stack"}
+        else:
+            # Infrastructure findings pair with every web service, keep them rare
+            record = {"type": "Domain", "finding": "DNS Record",
+                      "value": rnd.choice(ips), "category": "Infrastructure"}
+        record.update(target="example.com", source="synthetic", risk_level=rnd.choice(RISKS))
+        spiderfoot_data.append(record)
+    return spiderfoot_data, nmap_data
+
+
+def naive_correlate(spiderfoot_data, nmap_data):
+    """Every pair scored with ``score_pair``, in the nested loop order of ``script.py``."""
+    correlations = []
+    for osint in spiderfoot_data:
+        for scan in nmap_data:
+            correlation_score, correlation_reasons = score_pair(osint, scan)
+            if correlation_score > SCORE_THRESHOLD:
+                correlations.append(make_correlation(osint, scan, correlation_score, correlation_reasons))
+    return correlations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated nmap row counts (OSINT count is a tenth)")
+    parser.add_argument("--naive-limit", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=0, help="also time the sharded path")
+    args = parser.parse_args()
+
+    print(f"{'osint':>9} {'nmap':>9} {'matches':>10} {'indexed s':>10} {'batched s':>10} {'records s':>10} {'parallel s':>10} {'naive s':>10}")
+    for n_scan in (int(size) for size in args.sizes.split(",")):
+        n_osint = max(1, n_scan // 10)
+        spiderfoot_data, nmap_data = synthetic(n_osint, n_scan, args.seed)
+
+        start = time.perf_counter()
+        indexed = correlate(spiderfoot_data, nmap_data)
+        indexed_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = correlate_frame(spiderfoot_data, nmap_data)
+        batched_time = time.perf_counter() - start
+        if not batched.equals(pd.DataFrame(indexed, columns=batched.columns)):
+            sys.exit(f"batched result mismatch at {n_scan} rows")
+
+        start = time.perf_counter()
+        columnar = correlate_records(Findings.from_records(spiderfoot_data), Services.from_records(nmap_data))
+        records_time = time.perf_counter() - start
+        if not batched.astype(object).equals(columnar.astype(object)):
+            sys.exit(f"records result mismatch at {n_scan} rows")
+
+        parallel_time = "-"
+        if args.workers:
+            start = time.perf_counter()
+            parallel = correlate_parallel(spiderfoot_data, nmap_data, args.workers)
+            parallel_time = f"{time.perf_counter() - start:.3f}"
+            if usable_workers(args.workers, n_scan) == 1:
+                parallel_time += "*"
+            if parallel != indexed:
+                sys.exit(f"parallel result mismatch at {n_scan} rows")
+
+        naive_time = "-"
+        if n_scan <= args.naive_limit:
+            start = time.perf_counter()
+            naive = naive_correlate(spiderfoot_data, nmap_data)
+            naive_time = f"{time.perf_counter() - start:.3f}"
+            if naive != indexed:
+                sys.exit(f"result mismatch at {n_scan} rows")
+
+        print(f"{n_osint:>9} {n_scan:>9} {len(indexed):>10} {indexed_time:>10.3f} {batched_time:>10.3f} {records_time:>10.3f} {parallel_time:>10} {naive_time:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""CVE index benchmark: build from a synthetic NVD feed, then enrich services.
+
+    python benchmarks/bench_cves.py [--cves 200000] [--services 10000,100000,1000000]
+
+Reports build time, index size, cold open time and per-service enrichment
+cost. Every enriched record is checked against a direct range scan of the
+feed for the first ``--check`` services.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fusion.cves import CveIndex, build, iter_feed  # noqa: E402
+from fusion.versions import parse_version, satisfies, scan_software  # noqa: E402
+
+PRODUCTS = [
+    ("apache", "http_server", "HTTP", "Apache"),
+    ("nginx", "nginx", "HTTP", "nginx"),
+    ("openbsd", "openssh", "SSH", "OpenSSH"),
+    ("oracle", "mysql", "MySQL", "MySQL"),
+    ("beasts", "vsftpd", "FTP", "vsftpd"),
+]
+PRODUCTS += [(f"vendor{i}", f"product{i}", "HTTP", f"product{i}") for i in range(500)]
+
+
+def _version(rnd):
+    return f"{rnd.randint(1, 9)}.{rnd.randint(0, 20)}.{rnd.randint(0, 60)}"
+
+
+def _deployed(rnd, pool):
+    # Real fleets run a few dozen builds per product, not arbitrary versions
+    return pool.setdefault(rnd.randrange(40), _version(rnd))
+
+
+def write_feed(path, n_cves, seed=1):
+    """NVD 1.1 style feed with a mix of exact versions and version ranges."""
+    rnd = random.Random(seed)
+    items = []
+    for i in range(n_cves):
+        vendor, product, _, _ = rnd.choice(PRODUCTS)
+        match = {"vulnerable": True}
+        if rnd.random() < 0.5:
+            match["cpe23Uri"] = f"cpe:2.3:a:{vendor}:{product}:{_version(rnd)}:*:*:*:*:*:*:*"
+        else:
+            low, high = sorted((_version(rnd), _version(rnd)), key=parse_version)
+            match["cpe23Uri"] = f"cpe:2.3:a:{vendor}:{product}:*:*:*:*:*:*:*:*"
+            match["versionStartIncluding"] = low
+            match["versionEndExcluding"] = high
+        items.append({"cve": {"CVE_data_meta": {"ID": f"CVE-2020-{i:06d}"}},
+                      "configurations": {"nodes": [{"operator": "OR", "cpe_match": [match]}]}})
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        json.dump({"CVE_Items": items}, fh)
+
+
+def services(n, seed=1):
+    rnd = random.Random(seed)
+    pools = {}
+    records = []
+    for i in range(n):
+        _, _, service, name = rnd.choice(PRODUCTS[:5] + [rnd.choice(PRODUCTS)])
+        version = _deployed(rnd, pools.setdefault(name, {}))
+        records.append({"ip": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}", "port": 80,
+                        "service": service, "version": f"{name} {version}", "state": "open",
+                        "banner": "", "risk_level": "Low", "vulnerabilities": []})
+    return records
+
+
+def expected(feed_rows, record):
+    software = scan_software(record)
+    if software is None or not software.version:
+        return []
+    found = set()
+    for cve, product, low, low_incl, high, high_incl in feed_rows:
+        if product != software.key:
+            continue
+        constraints = []
+        if low:
+            constraints.append((">=" if low_incl else ">", parse_version(low)))
+        if high:
+            constraints.append(("<=" if high_incl else "<", parse_version(high)))
+        if satisfies(software.version, constraints):
+            found.add(cve)
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cves", type=int, default=200000)
+    parser.add_argument("--services", default="10000,100000,1000000", help="comma separated counts")
+    parser.add_argument("--chunk", type=int, default=10000, help="records per enrich() batch")
+    parser.add_argument("--check", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feed, index_path = os.path.join(tmp, "nvd.json.gz"), os.path.join(tmp, "cves.db")
+        write_feed(feed, args.cves, args.seed)
+        start = time.perf_counter()
+        ranges = build([feed], index_path)
+        print(f"build: {ranges} ranges from {args.cves} CVEs in {time.perf_counter() - start:.2f}s, "
+              f"{os.path.getsize(index_path) / 1e6:.1f} MB")
+        feed_rows = list(iter_feed(feed))
+
+        print(f"{'services':>9} {'open ms':>8} {'enrich s':>9} {'us/service':>11} {'with cves':>10}")
+        for n in (int(size) for size in args.services.split(",")):
+            records = services(n, args.seed)
+            start = time.perf_counter()
+            index = CveIndex(index_path)
+            open_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for offset in range(0, n, args.chunk):
+                index.enrich(records[offset:offset + args.chunk])
+            enrich_time = time.perf_counter() - start
+            for record in records[:args.check]:
+                if record["vulnerabilities"] != expected(feed_rows, record):
+                    sys.exit(f"mismatch for {record['version']}")
+            index.close()
+            hits = sum(1 for record in records if record["vulnerabilities"])
+            print(f"{n:>9} {open_time * 1e3:>8.2f} {enrich_time:>9.3f} {enrich_time / n * 1e6:>11.2f} {hits:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Throughput benchmark for the streaming nmap XML reader.
+
+    python benchmarks/bench_nmap_xml.py [--hosts 1000,10000,100000] [--keep]
+
+A synthetic ``-oX`` file is generated for each size; the reader's
+throughput is reported in hosts/sec together with the process peak RSS,
+which should stay flat as the file grows.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fusion.nmap_xml import iter_services  # noqa: E402
+
+PORTS = [
+    (22, "ssh", "OpenSSH", "7.6p1", "Ubuntu Linux; protocol 2.0"),
+    (80, "http", "Apache httpd", "2.4.41", "(Ubuntu)"),
+    (443, "http", "nginx", "1.18.0", ""),
+    (3306, "mysql", "MySQL", "5.7.30", ""),
+    (21, "ftp", "vsftpd", "3.0.3", ""),
+]
+CVES = ["CVE-2018-15473", "CVE-2019-2614", "CVE-2019-2627", "CVE-2021-41773"]
+
+
+def write_nmap_xml(fh, hosts, seed=1):
+    """Write a synthetic nmap XML document with ``hosts`` hosts to ``fh``."""
+    rnd = random.Random(seed)
+    fh.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<nmaprun scanner="nmap" args="nmap -sV -oX - 10.0.0.0/8" version="7.94">\n')
+    for i in range(hosts):
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        fh.write(f'<host><status state="up"/><address addr="{ip}" addrtype="ipv4"/><ports>\n')
+        for portid, name, product, version, extrainfo in rnd.sample(PORTS, rnd.randint(1, 3)):
+            tunnel = ' tunnel="ssl"' if portid == 443 else ""
+            fh.write(f'<port protocol="tcp" portid="{portid}"><state state="open"/>'
+                     f'<service name="{name}" product="{product}" version="{version}" '
+                     f'extrainfo="{extrainfo}"{tunnel}/>')
+            if rnd.random() < 0.2:
+                fh.write(f'<script id="vulners" output="{rnd.choice(CVES)} 5.0"/>')
+            fh.write("</port>\n")
+        fh.write("</ports></host>\n")
+    fh.write('<runstats><finished elapsed="1.0"/></runstats></nmaprun>\n')
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", default="1000,10000,100000",
+                        help="comma separated host counts")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="keep the generated XML files")
+    args = parser.parse_args()
+
+    print(f"{'hosts':>9} {'services':>9} {'MB':>8} {'seconds':>8} {'hosts/s':>10} {'peak RSS MB':>12}")
+    for hosts in (int(size) for size in args.hosts.split(",")):
+        fd, path = tempfile.mkstemp(suffix=".xml", prefix="nmap_")
+        with os.fdopen(fd, "w") as fh:
+            write_nmap_xml(fh, hosts, args.seed)
+        size_mb = os.path.getsize(path) / 2 ** 20
+
+        start = time.perf_counter()
+        services = sum(1 for _ in iter_services(path))
+        elapsed = time.perf_counter() - start
+
+        print(f"{hosts:>9} {services:>9} {size_mb:>8.1f} {elapsed:>8.2f} "
+              f"{hosts / elapsed:>10.0f} {peak_rss_mb():>12.1f}")
+        if args.keep:
+            print(f"  kept {path}")
+        else:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""End-to-end pipeline benchmark on synthetic data, with JSON results.
+
+    python benchmarks/bench_pipeline.py [--sizes 1000,10000,100000] [--findings-ratio 1.0]
+        [--output results.json] [--compare baseline.json] [--threshold 1.25] [--keep DIR]
+        [--seed 1] [--ip-overlap 0.5] [--tech-overlap 0.5] [--cidr-density 0.1] [--domains 1]
+
+For every size (nmap service count; findings are ``--findings-ratio`` of
+it) a dataset from ``synthetic.py`` is written to disk and run through:
+
+* ``import``    – parse the XML and SpiderFoot files into columnar records
+* ``correlate`` – :func:`fusion.batch.correlate_records` in memory
+* ``store``     – ``fusion import`` into a fresh store, incremental correlation included
+* ``query``     – dashboard API pages, neighbour lookups and ``fusion find``
+* ``export``    – CSV export of every table, into a directory it creates, plus
+  the streamed NDJSON correlations
+* ``render``    – graph model, aggregation and layout, and the heatmap matrix
+
+Before the runs, every dashboard view and sort order is paged through by
+``next`` cursors and compared with paging by offset, over a small store
+whose sort keys are partly NULL; the benchmark exits non-zero when they
+differ.
+
+Each stage reports seconds, records and its peak RSS (reset between
+stages where ``/proc/self/clear_refs`` allows, else the process peak).
+Results are written as JSON together with the git revision and
+parameters; ``--compare`` prints the time ratio of each stage against a
+previous results file and exits non-zero when any is above ``--threshold``.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+from fusion import api  # noqa: E402
+from fusion.batch import correlate_records  # noqa: E402
+from fusion.commands.find import lookup, render_tree  # noqa: E402
+from fusion.commands.imp import import_file  # noqa: E402
+from fusion.export import export  # noqa: E402
+from fusion.graph import aggregate, force_layout, graph_from_store  # noqa: E402
+from fusion.heatmap import matrix, store_stats  # noqa: E402
+from fusion.incremental import recorrelate  # noqa: E402
+from fusion.nmap_xml import iter_services  # noqa: E402
+from fusion.records import Findings, Services  # noqa: E402
+from fusion.spiderfoot import iter_findings  # noqa: E402
+from fusion.store import Store  # noqa: E402
+
+STAGES = ("import", "correlate", "store", "query", "export", "render")
+GRAPH_BUDGET = 200
+KEYSET_SIZE = 100  # findings and services of the keyset pagination check
+KEYSET_PAGE = 20
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter; ``False`` where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1 << 20)
+
+
+def timed(stage, results, fn):
+    """Run ``fn`` as ``stage``; it returns the number of records it handled."""
+    reset = reset_peak_rss()
+    start = time.perf_counter()
+    records = fn()
+    results[stage] = {"seconds": round(time.perf_counter() - start, 4), "records": records,
+                      "peak_rss_mb": round(peak_rss_mb(), 1), "peak_rss_scope": "stage" if reset else "process"}
+    return results[stage]
+
+
+def run(config, workdir):
+    """All stages over one synthetic dataset; returns ``{stage: {...}}``."""
+    stages = {}
+    start = time.perf_counter()
+    spiderfoot_path, nmap_path = synthetic.write(config, workdir)
+    generate_seconds = round(time.perf_counter() - start, 4)
+
+    loaded = {}
+
+    def parse():
+        loaded["services"] = Services.from_records(iter_services(nmap_path))
+        loaded["findings"] = Findings.from_records(iter_findings(spiderfoot_path))
+        return len(loaded["services"]) + len(loaded["findings"])
+
+    def correlate():
+        return len(correlate_records(loaded["findings"], loaded["services"]))
+
+    db_path = os.path.join(workdir, "fusion.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    store = Store(db_path)
+
+    def import_store():
+        generation = store.begin_import()
+        _, service_ids, _ = import_file(store, "services", nmap_path, generation)
+        _, finding_ids, _ = import_file(store, "findings", spiderfoot_path, generation)
+        recorrelate(store, finding_ids, service_ids)
+        store.commit()
+        return store.counts()["correlations"]
+
+    def query():
+        count = 0
+        for view in api.VIEWS.values():
+            sorts = [""] + list(view.sorts)[:2]
+            for sort in sorts:
+                for q in ("", "host1", "10.0.1"):
+                    count += len(api.page(store, view.name, 0, api.DEFAULT_LIMIT, sort, "desc", q)["rows"])
+            count += len(api.page(store, view.name, 10 * api.DEFAULT_LIMIT, risk="High")["rows"])
+        sample = api.page(store, "correlations", limit=20)["rows"]
+        for row in sample:
+            count += len(api.neighbors(store, finding=row["osint_finding"])["keys"])
+            count += len(api.neighbors(store, target=row["nmap_target"])["keys"])
+        api.stats(store)
+        for row in sample[:5]:
+            ip = row["nmap_target"].rsplit(":", 1)[0]
+            result = lookup(store, ip=ip)
+            render_tree(result)
+            count += len(result["correlations"])
+        return count
+
+    def export_tables():
+        # Into a directory that does not exist yet, which export creates
+        count = sum(rows for _, _, rows in export(store, os.path.join(workdir, "graph", "export"), "csv"))
+        for chunk in api.export_chunks(store, "correlations", "ndjson"):
+            count += chunk.count(b"\n")
+        return count
+
+    def render():
+        data = graph_from_store(store, GRAPH_BUDGET)
+        data = aggregate(data, GRAPH_BUDGET)
+        ids = [node["id"] for node in data["nodes"]]
+        force_layout(ids, data["edges"])
+        matrix(store_stats(store), "mean")
+        return len(ids)
+
+    try:
+        for stage, fn in zip(STAGES, (parse, correlate, import_store, query, export_tables, render)):
+            timed(stage, stages, fn)
+            print(f"  {stage:<10} {stages[stage]['seconds']:>9.3f}s {stages[stage]['records']:>10} records "
+                  f"{stages[stage]['peak_rss_mb']:>8.1f} MB", flush=True)
+    finally:
+        store.close()
+    return {"generate_seconds": generate_seconds, "stages": stages}
+
+
+def check_keyset(args):
+    """Views, sorts and orders whose pages by ``next`` cursor differ from the pages by offset.
+
+    Every third service has no version and every fourth finding no source,
+    so descending sorts have NULL keys to page past.
+    """
+    config = synthetic.config_from(args, KEYSET_SIZE, KEYSET_SIZE)
+    services = [dict(record, version=None) if i % 3 == 0 else record
+                for i, record in enumerate(synthetic.iter_services(config))]
+    findings = [dict(record, source=None) if i % 4 == 0 else record
+                for i, record in enumerate(synthetic.iter_findings(config))]
+    problems = []
+    with Store(":memory:") as store:
+        generation = store.begin_import()
+        recorrelate(store, store.upsert_findings(findings, "findings", generation),
+                    store.upsert_services(services, "services", generation))
+        for view in api.VIEWS.values():
+            for sort in [""] + list(view.sorts):
+                for order in ("asc", "desc"):
+                    by_offset, by_cursor, offset, after = [], [], 0, None
+                    while True:
+                        rows = api.page(store, view.name, offset, KEYSET_PAGE, sort, order, count=False)["rows"]
+                        by_offset += rows
+                        offset += KEYSET_PAGE
+                        if len(rows) < KEYSET_PAGE:
+                            break
+                    while True:
+                        result = api.page(store, view.name, 0, KEYSET_PAGE, sort, order, count=False, after=after)
+                        by_cursor += result["rows"]
+                        after = result["next"]
+                        if after is None:
+                            break
+                    if by_cursor != by_offset:
+                        problems.append(f"{view.name} sorted by {sort or 'default'} {order}: "
+                                        f"{len(by_cursor)} rows by cursor, {len(by_offset)} by offset")
+    return problems
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print per-stage time ratios against a baseline; returns the regressions."""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    before = {(run["services"], run["findings"]): run["stages"] for run in baseline["runs"]}
+    regressions = []
+    print(f"\nvs {baseline_path} ({baseline.get('revision')}):")
+    for run in results["runs"]:
+        old = before.get((run["services"], run["findings"]))
+        if old is None:
+            continue
+        ratios = []
+        for stage, now in run["stages"].items():
+            if stage not in old or not old[stage]["seconds"]:
+                continue
+            ratio = now["seconds"] / old[stage]["seconds"]
+            ratios.append(f"{stage} {ratio:.2f}x")
+            if ratio > threshold:
+                regressions.append((run["services"], stage, ratio))
+        print(f"  {run['services']:>9} services: {', '.join(ratios)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated nmap service counts")
+    parser.add_argument("--findings-ratio", type=float, default=1.0, help="SpiderFoot findings per service")
+    parser.add_argument("--output", default="bench_pipeline.json", help="results file")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="time ratio above which --compare reports a regression")
+    parser.add_argument("--keep", metavar="DIR", help="keep the datasets and stores in DIR")
+    synthetic.add_arguments(parser)
+    args = parser.parse_args()
+
+    problems = check_keyset(args)
+    if problems:
+        sys.exit("keyset pagination: " + "; ".join(problems))
+
+    results = {
+        "revision": git_revision(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "compare", "threshold", "keep")},
+        "runs": [],
+    }
+    for services in (int(size) for size in args.sizes.split(",")):
+        config = synthetic.config_from(args, max(1, round(services * args.findings_ratio)), services)
+        print(f"{config.findings} findings, {config.services} services", flush=True)
+        if args.keep:
+            workdir = os.path.join(args.keep, str(services))
+            os.makedirs(workdir, exist_ok=True)
+            run_result = run(config, workdir)
+        else:
+            with tempfile.TemporaryDirectory() as workdir:
+                run_result = run(config, workdir)
+        results["runs"].append({"findings": config.findings, "services": config.services, **run_result})
+
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit("regressions: " + ", ".join(f"{stage} at {size} ({ratio:.2f}x)"
+                                                 for size, stage, ratio in regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Range membership benchmark: RangeIndex vs. a naive ``ipaddress`` loop.
+
+    python benchmarks/bench_ranges.py [--ranges 1000] [--ips 10000,100000,1000000] [--naive-limit 20000]
+
+The naive loop (``address in network`` for every pair) only runs up to
+``--naive-limit`` addresses; where it runs, both answers are compared.
+"""
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fusion.ranges import RangeIndex, ip_int, parse_cidr  # noqa: E402
+
+
+def synthetic(n_ranges, n_ips, seed=1):
+    rnd = random.Random(seed)
+    cidrs = []
+    for _ in range(n_ranges):
+        if rnd.random() < 0.9:
+            prefix = rnd.randint(16, 28)
+            cidrs.append(str(ipaddress.ip_network((rnd.getrandbits(32) & 0x0AFFFFFF | 0x0A000000, prefix),
+                                                  strict=False)))
+        else:
+            prefix = rnd.randint(48, 120)
+            base = (0x20010DB8 << 96) | rnd.getrandbits(64) << 32
+            cidrs.append(str(ipaddress.ip_network((base, prefix), strict=False)))
+    ips = []
+    for _ in range(n_ips):
+        if rnd.random() < 0.9:
+            ips.append(str(ipaddress.IPv4Address(0x0A000000 | rnd.getrandbits(24))))
+        else:
+            ips.append(str(ipaddress.IPv6Address((0x20010DB8 << 96) | rnd.getrandbits(64) << 32)))
+    return cidrs, ips
+
+
+def naive(cidrs, ips):
+    networks = [ipaddress.ip_network(cidr) for cidr in cidrs]
+    result = []
+    for ip in ips:
+        address = ipaddress.ip_address(ip)
+        result.append(tuple(i for i, network in enumerate(networks)
+                            if network.version == address.version and address in network))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ranges", type=int, default=1000)
+    parser.add_argument("--ips", default="10000,100000,1000000", help="comma separated address counts")
+    parser.add_argument("--naive-limit", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'ranges':>7} {'ips':>9} {'hits':>9} {'build s':>8} {'index s':>8} {'naive s':>8}")
+    for n_ips in (int(size) for size in args.ips.split(",")):
+        cidrs, ips = synthetic(args.ranges, n_ips, args.seed)
+
+        start = time.perf_counter()
+        index = RangeIndex((*parse_cidr(cidr), i) for i, cidr in enumerate(cidrs))
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = index.lookup_many([ip_int(ip) for ip in ips])
+        index_time = time.perf_counter() - start
+
+        naive_time = "-"
+        if n_ips <= args.naive_limit:
+            start = time.perf_counter()
+            expected = naive(cidrs, ips)
+            naive_time = f"{time.perf_counter() - start:.3f}"
+            if [tuple(sorted(hit)) for hit in found] != expected:
+                sys.exit(f"result mismatch at {n_ips} addresses")
+
+        hits = sum(len(hit) for hit in found)
+        print(f"{args.ranges:>7} {n_ips:>9} {hits:>9} {build_time:>8.3f} {index_time:>8.3f} {naive_time:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""``fusion scan`` benchmark and correctness check, with ``fake_nmap.py`` as nmap.
+
+    python benchmarks/bench_scan.py [--hosts 4096] [--chunk-hosts 256] [--concurrency 4]
+        [--delay 0.2] [--every 7] [--keep DIR]
+
+Runs ``fusion scan`` in a fresh store and reports wall time and hosts per
+second of two sweeps, checking the store against the addresses the fake
+scanner reports as up:
+
+* ``sweep``        – the whole ``--hosts`` range, one target per chunk
+* ``multi-target`` – a quarter of the first chunk is scanned first, so the
+  rescan of that chunk runs one nmap over it with the cached quarter
+  excluded (``--exclude 10.10.0.64/26`` for a /24); every live host of it
+  must be stored under the chunk's origin and none may be cached as down.
+  The chunk is then rescanned with ``--fresh``, which must not exclude
+  anything
+
+It also checks the ports :func:`fusion.schedule.technology_ports` gives a
+few Technology findings, which match keywords as whole words only
+("WordPress 5.8" gets no RDP port).
+
+Exits non-zero when a sweep fails or a check does not hold.
+"""
+import argparse
+import ipaddress
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_nmap import live_addresses  # noqa: E402
+
+from fusion.scanner import chunk_name  # noqa: E402
+from fusion.schedule import technology_ports  # noqa: E402
+from fusion.store import Store  # noqa: E402
+
+BASE = ipaddress.ip_network("10.10.0.0/16")
+# Technology finding -> ports the scheduler should probe for it
+TECHNOLOGY_CASES = {
+    "WordPress 5.8": set(),
+    "Apache/2.4.41": {80, 443, 8080, 8443},
+    "Microsoft-IIS/10.0": {80, 443},
+    "OpenSSH_8.2p1": {22},
+    "Microsoft SQL Server 2019": {1433},
+    "Remote Desktop (RDP)": {3389},
+}
+
+
+def scan(workdir, name, targets, args, *options):
+    """Run ``fusion scan TARGETS [OPTIONS]``; returns ``(seconds, output lines)``."""
+    env = dict(os.environ, FUSION_DB=os.path.join(workdir, "fusion.db"),
+               FUSION_NMAP=f"{sys.executable} {os.path.join(BENCH_DIR, 'fake_nmap.py')}",
+               FAKE_NMAP_EVERY=str(args.every), FAKE_NMAP_DELAY=str(args.delay), FAKE_NMAP_FAIL="0")
+    env.pop("FUSION_PROFILE", None)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "CLI_Design.py"), "scan", *targets,
+         "--chunk-hosts", str(args.chunk_hosts), "--concurrency", str(args.concurrency),
+         "--output-dir", os.path.join(workdir, "scans", name), *options],
+        env=env, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"{name}: fusion scan exited {result.returncode}\n{result.stderr}")
+    return seconds, result.stdout.splitlines()
+
+
+def check(workdir, network, every, origin=None):
+    """Problems with the stored services and cache entries of ``network``.
+
+    With ``origin``, every stored service of ``network`` must come from it.
+    """
+    live = {str(address) for address in live_addresses([str(network)], every)}
+    with Store(os.path.join(workdir, "fusion.db")) as store:
+        rows = [(ip, row_origin) for ip, row_origin in store.db.execute("SELECT ip, origin FROM services")
+                if ipaddress.ip_address(ip) in network]
+        down = {row[0] for row in store.db.execute("SELECT address, records FROM scan_cache")
+                if not json.loads(row[1])}
+    stored = {ip for ip, _ in rows}
+    problems = []
+    if origin is not None and any(row_origin != origin for _, row_origin in rows):
+        problems.append(f"services not stored under {origin}: "
+                        f"{sorted({row_origin for _, row_origin in rows} - {origin})}")
+    if stored != live:
+        problems.append(f"{len(live - stored)} live hosts missing, {len(stored - live)} unexpected")
+    if down & live:
+        problems.append(f"{len(down & live)} live hosts cached as down")
+    return problems
+
+
+def nmap_args(xml_path):
+    """``{option: value}`` of the nmap run recorded in ``xml_path``."""
+    with open(xml_path) as fh:
+        words = re.search(r'<nmaprun scanner="nmap" args="([^"]*)"', fh.read(4096)).group(1).split()
+    return {word: value for word, value in zip(words, words[1:] + [""]) if word.startswith("-")}
+
+
+def check_ports():
+    """Problems with the ports scheduled for :data:`TECHNOLOGY_CASES`."""
+    return [f"{finding!r} gets ports {sorted(technology_ports(finding))}, expected {sorted(ports)}"
+            for finding, ports in TECHNOLOGY_CASES.items() if technology_ports(finding) != ports]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=4096, help="addresses swept (a power of two)")
+    parser.add_argument("--chunk-hosts", type=int, default=256, help="addresses per nmap process")
+    parser.add_argument("--concurrency", type=int, default=4, help="fake nmap processes at once")
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds each fake nmap run takes")
+    parser.add_argument("--every", type=int, default=7, help="every N-th address is up")
+    parser.add_argument("--keep", metavar="DIR", help="keep the store and chunk XML in DIR")
+    args = parser.parse_args()
+
+    bits = max(0, args.hosts.bit_length() - 1)
+    sweep_range = next(BASE.subnets(new_prefix=32 - bits))
+    chunk = next(sweep_range.subnets(new_prefix=32 - max(0, args.chunk_hosts.bit_length() - 1)))
+    if chunk.prefixlen > 30:
+        sys.exit("--chunk-hosts must be at least 4")
+    quarter = list(chunk.subnets(prefixlen_diff=2))[1]
+
+    failures = [f"ports: {problem}" for problem in check_ports()]
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.keep or tmp
+        os.makedirs(workdir, exist_ok=True)
+
+        seconds, _ = scan(workdir, "sweep", [str(sweep_range)], args)
+        print(f"sweep         {sweep_range.num_addresses:>8} hosts {seconds:>8.2f}s "
+              f"{sweep_range.num_addresses / seconds:>10.0f} hosts/s")
+        failures += [f"sweep: {problem}" for problem in check(workdir, sweep_range, args.every)]
+
+        # A fresh store, so the multi-target rescan cannot lean on the first sweep
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(os.path.join(workdir, "fusion.db" + suffix)):
+                os.remove(os.path.join(workdir, "fusion.db" + suffix))
+        scan(workdir, "quarter", [str(quarter)], args)
+        seconds, lines = scan(workdir, "multi-target", [str(chunk)], args)
+        print(f"multi-target  {chunk.num_addresses:>8} hosts {seconds:>8.2f}s "
+              f"{chunk.num_addresses / seconds:>10.0f} hosts/s")
+        xml_path = os.path.join(workdir, "scans", "multi-target", chunk_name(str(chunk)) + ".xml")
+        ran = [line.split(":")[0] for line in lines if " services, " in line and not line.startswith("Scanned")]
+        if ran != [str(chunk)] or nmap_args(xml_path).get("--exclude") != str(quarter):
+            failures.append(f"multi-target: expected one nmap run over {chunk} excluding {quarter}, "
+                            f"got {ran} with {nmap_args(xml_path)}")
+        origin = os.path.abspath(xml_path)
+        failures += [f"multi-target: {problem}" for problem in check(workdir, chunk, args.every, origin)]
+
+        scan(workdir, "multi-target", [str(chunk)], args, "--fresh")
+        if "--exclude" in nmap_args(xml_path):
+            failures.append(f"fresh: the cache still excluded {nmap_args(xml_path)['--exclude']}")
+        failures += [f"fresh: {problem}" for problem in check(workdir, chunk, args.every, origin)]
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""CLI startup benchmark and import-time regression check for ``fusion find``.
+
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 200] [--top 10]
+        [--command "find --ip 10.0.0.1"]
+
+Runs ``CLI_Design.py <command>`` against an empty store (created up
+front, as ``find`` only opens existing ones) in fresh interpreters and
+reports the best wall time next to a bare ``python -c pass``, plus the
+slowest top-level imports (``-X importtime``) of one run.
+Exits non-zero when the best run is over ``--budget-ms`` or when the
+command imported any module of :data:`FORBIDDEN` – the dataframe, graph,
+plotting, XML and HTTP layers only the other sub-commands need.
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "CLI_Design.py")
+sys.path.insert(0, ROOT)
+
+from fusion.store import Store  # noqa: E402
+
+FORBIDDEN = ("pandas", "numpy", "plotly", "kaleido", "networkx", "scipy", "asyncio", "xml.etree",
+             "http.server", "fusion.commands.scan", "fusion.commands.dashboard", "fusion.records")
+
+
+def best_ms(argv, runs, env):
+    """Fastest of ``runs`` wall times of ``argv``, in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def import_times(argv, env):
+    """``[(module, self µs, cumulative µs, depth)]`` from one ``-X importtime`` run."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime"] + argv[1:], env=env, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(own), int(cumulative), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="interpreter starts per measurement")
+    parser.add_argument("--budget-ms", type=float, default=200, help="fail when the best run is slower")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    parser.add_argument("--command", default="find --ip 10.0.0.1", help="fusion sub-command and options")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, FUSION_DB=os.path.join(workdir, "fusion.db"))
+        Store(env["FUSION_DB"]).close()
+        env.pop("FUSION_PROFILE", None)
+        argv = [sys.executable, CLI] + shlex.split(args.command)
+
+        baseline = best_ms([sys.executable, "-c", "pass"], args.runs, env)
+        command = best_ms(argv, args.runs, env)
+        imports = import_times(argv, env)
+
+    print(f"python -c pass            {baseline:>8.1f} ms")
+    print(f"fusion {args.command:<18} {command:>8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"\n{'top-level import':<40} {'cumulative ms':>14}")
+    top = sorted((row for row in imports if row[3] == 0), key=lambda row: -row[2])[:args.top]
+    for name, _, cumulative, _ in top:
+        print(f"{name:<40} {cumulative / 1000:>14.1f}")
+
+    loaded = {name for name, _, _, _ in imports}
+    leaked = sorted(name for name in loaded
+                    if any(name == module or name.startswith(module + ".") for module in FORBIDDEN))
+    failures = []
+    if command > args.budget_ms:
+        failures.append(f"startup {command:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+    if leaked:
+        failures.append("imported " + ", ".join(leaked))
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
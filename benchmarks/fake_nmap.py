@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Stand-in for ``nmap`` that writes canned XML, for exercising ``fusion scan``.
+
+    FUSION_NMAP="python benchmarks/fake_nmap.py" fusion scan 10.10.0.0/22 --chunk-hosts 64
+
+Accepts ``[args...] -oX FILE TARGET...`` (the order ``fusion.scanner`` uses)
+and reports every ``FAKE_NMAP_EVERY``-th address of each CIDR or address
+target as up, with services from ``bench_nmap_xml``, leaving out the
+addresses and CIDRs of ``--exclude``; hostnames come back down. Set
+``FAKE_NMAP_DELAY`` (seconds) to simulate scan time and ``FAKE_NMAP_FAIL``
+(0..1) to make that fraction of runs exit non-zero.
+"""
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_nmap_xml import CVES, PORTS  # noqa: E402
+
+
+def main(argv):
+    if "-oX" not in argv:
+        sys.exit("fake_nmap: -oX FILE is required")
+    out_path = argv[argv.index("-oX") + 1]
+    targets = argv[argv.index("-oX") + 2:]
+    if not targets:
+        sys.exit("fake_nmap: no targets")
+    every = int(os.environ.get("FAKE_NMAP_EVERY", "7"))
+    exclude = argv[argv.index("--exclude") + 1].split(",") if "--exclude" in argv else []
+
+    time.sleep(float(os.environ.get("FAKE_NMAP_DELAY", "0")))
+    if random.random() < float(os.environ.get("FAKE_NMAP_FAIL", "0")):
+        sys.exit("fake_nmap: simulated failure")
+
+    with open(out_path, "w") as fh:
+        fh.write(f'<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap {" ".join(argv)}">\n')
+        for address in live_addresses(targets, every, exclude):
+            rnd = random.Random(int(address))
+            fh.write(f'<host><status state="up"/><address addr="{address}" addrtype="ipv{address.version}"/><ports>\n')
+            for portid, name, product, version, extrainfo in rnd.sample(PORTS, rnd.randint(1, 3)):
+                tunnel = ' tunnel="ssl"' if portid == 443 else ""
+                fh.write(f'<port protocol="tcp" portid="{portid}"><state state="open"/>'
+                         f'<service name="{name}" product="{product}" version="{version}" '
+                         f'extrainfo="{extrainfo}"{tunnel}/>')
+                if rnd.random() < 0.2:
+                    fh.write(f'<script id="vulners" output="{rnd.choice(CVES)} 5.0"/>')
+                fh.write("</port>\n")
+            fh.write("</ports></host>\n")
+        fh.write("</nmaprun>\n")
+
+
+def live_addresses(targets, every, exclude=()):
+    """Addresses of ``targets`` the fake scan reports as up."""
+    excluded = [ipaddress.ip_network(target, strict=False) for target in exclude]
+    for target in targets:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            continue
+        for address in network:
+            if not int(address) % every and not any(address in network for network in excluded):
+                yield address
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Seedable synthetic SpiderFoot findings and nmap services at any scale.
+
+    python benchmarks/synthetic.py OUT_DIR [--findings 100000] [--services 100000] [--seed 1]
+        [--ip-overlap 0.5] [--tech-overlap 0.5] [--cidr-density 0.1] [--domains 1]
+
+Writes ``OUT_DIR/spiderfoot.json`` (a SpiderFoot JSON export) and
+``OUT_DIR/nmap.xml`` (``nmap -oX``); both import with ``fusion import``.
+:func:`iter_findings` and :func:`iter_services` yield the same records
+directly. Everything is generated lazily, so 10^7 records stream to disk
+in constant memory, and the same seed always gives the same data.
+
+Each target domain has a couple of apex addresses, a few owned netblocks
+and web technologies, plus the bulk of subdomains and email addresses.
+The knobs:
+
+* ``ip_overlap``   – fraction of resolved addresses that are scanned hosts
+* ``tech_overlap`` – fraction of technology findings naming a product and
+  version that runs on the scanned hosts
+* ``cidr_density`` – fraction of the scanned address span covered by the
+  owned netblocks
+
+Infrastructure and technology findings correlate with services on any
+host, so their number is kept per domain; ``domains`` scales that
+cross-product term.
+"""
+import argparse
+import ipaddress
+import json
+import os
+import random
+import sys
+from typing import NamedTuple
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fusion.nmap_xml import risk_level, service_name, service_version  # noqa: E402
+from fusion.spiderfoot import normalize  # noqa: E402
+
+BASE_ADDRESS = int(ipaddress.IPv4Address("10.0.0.0"))
+OUTSIDE_ADDRESS = int(ipaddress.IPv4Address("172.16.0.0"))
+ADDRESS_SPAN = 1 << 20
+
+# (port, nmap name, product, versions, extrainfo, weight)
+PORTS = [
+    (80, "http", "Apache httpd", ["2.4.41", "2.4.29", "2.4.52"], "(Ubuntu)", 30),
+    (443, "http", "nginx", ["1.18.0", "1.14.0", "1.22.1"], "", 25),
+    (22, "ssh", "OpenSSH", ["7.6p1", "8.2p1", "8.9p1"], "Ubuntu Linux; protocol 2.0", 25),
+    (3306, "mysql", "MySQL", ["5.7.30", "8.0.21"], "", 8),
+    (21, "ftp", "vsftpd", ["3.0.3"], "", 5),
+    (5432, "postgresql", "PostgreSQL DB", ["12.4", "14.2"], "", 4),
+    (8080, "http-proxy", "Apache Tomcat", ["9.0.31"], "", 3),
+]
+PORT_WEIGHTS = [port[-1] for port in PORTS]
+CVES = ["CVE-2018-15473", "CVE-2019-2614", "CVE-2019-2627", "CVE-2021-41773", "CVE-2021-23017",
+        "CVE-2020-15778", "CVE-2023-38408"]
+CVE_RATE = 0.15
+# Open ports of consecutive hosts, repeating (2.2 per host on average)
+PORTS_PER_HOST = (1, 2, 2, 3, 1, 4, 2, 3, 2, 2)
+
+# Web technologies as SpiderFoot reports them: deployed (matching some scans) or not
+DEPLOYED = ["Apache/2.4.41", "Apache/2.4.29", "Apache/2.4.52", "nginx/1.18.0", "nginx/1.14.0",
+            "nginx/1.22.1"]
+UNDEPLOYED = ["Apache/2.2.3", "nginx/1.4.6", "Microsoft-IIS/10.0", "lighttpd/1.4.55", "Microsoft-IIS/8.5",
+              "nginx/1.10.3"]
+BREACHES = ["Collection1", "LinkedIn", "Adobe", "Dropbox"]
+
+APEX_ADDRESSES = 2
+NETBLOCKS = 4
+TECHNOLOGIES = 8
+SUBDOMAIN_SHARE = 0.7
+BREACH_SHARE = 0.1
+
+
+class Config(NamedTuple):
+    findings: int = 100000
+    services: int = 100000
+    seed: int = 1
+    ip_overlap: float = 0.5
+    tech_overlap: float = 0.5
+    cidr_density: float = 0.1
+    domains: int = 1
+
+    @property
+    def hosts(self):
+        """Scanned hosts, following ``PORTS_PER_HOST`` until ``services`` ports."""
+        cycles, rest = divmod(self.services, sum(PORTS_PER_HOST))
+        hosts = cycles * len(PORTS_PER_HOST)
+        for count in PORTS_PER_HOST:
+            if rest <= 0:
+                break
+            rest -= count
+            hosts += 1
+        return max(1, hosts)
+
+    @property
+    def spacing(self):
+        """Address step between hosts, so the host span leaves gaps."""
+        return max(1, min(4, ADDRESS_SPAN // self.hosts))
+
+
+def host_address(config, index):
+    return str(ipaddress.IPv4Address(BASE_ADDRESS + index * config.spacing))
+
+
+def iter_hosts(config):
+    """Yield ``(ip, ports)`` until ``config.services`` ports have been emitted.
+
+    ``ports`` holds ``(portid, name, product, version, extrainfo, cves)``.
+    """
+    rnd = random.Random(config.seed)
+    emitted = 0
+    for index in range(config.hosts):
+        count = min(PORTS_PER_HOST[index % len(PORTS_PER_HOST)], config.services - emitted)
+        chosen = []
+        while len(chosen) < count:
+            port = rnd.choices(PORTS, PORT_WEIGHTS)[0]
+            if port not in chosen:
+                chosen.append(port)
+        ports = []
+        for portid, name, product, versions, extrainfo, _ in chosen:
+            cves = rnd.sample(CVES, rnd.randint(1, 3)) if rnd.random() < CVE_RATE else []
+            ports.append((portid, name, product, rnd.choice(versions), extrainfo, cves))
+        emitted += len(ports)
+        yield host_address(config, index), ports
+
+
+def service_record(ip, port):
+    """The ``nmap_data`` record :func:`fusion.nmap_xml.parse_port` builds for ``port``."""
+    portid, name, product, version, extrainfo, cves = port
+    service = {"name": name, "product": product, "version": version, "extrainfo": extrainfo}
+    if portid == 443:
+        service["tunnel"] = "ssl"
+    return {
+        "ip": ip,
+        "port": portid,
+        "service": service_name(service),
+        "version": service_version(service),
+        "state": "open",
+        "banner": " ".join(part for part in (product, version, extrainfo) if part),
+        "risk_level": risk_level(cves),
+        "vulnerabilities": list(cves),
+    }
+
+
+def iter_services(config):
+    """Yield ``nmap_data`` records."""
+    for ip, ports in iter_hosts(config):
+        for port in ports:
+            yield service_record(ip, port)
+
+
+def _resolved(config, rnd):
+    """An address a name resolves to: a scanned host with probability ``ip_overlap``."""
+    if rnd.random() < config.ip_overlap:
+        return host_address(config, rnd.randrange(config.hosts))
+    return str(ipaddress.IPv4Address(OUTSIDE_ADDRESS + rnd.randrange(ADDRESS_SPAN)))
+
+
+def _netblocks(config, rnd):
+    """``NETBLOCKS`` aligned CIDRs covering about ``cidr_density`` of the scanned span."""
+    span = config.hosts * config.spacing
+    size = span * config.cidr_density / NETBLOCKS
+    if size < 1:
+        return []
+    prefix = 32 - min(20, round(size).bit_length() - 1)
+    step = 1 << (32 - prefix)
+    return [f"{ipaddress.IPv4Address(BASE_ADDRESS + rnd.randrange(max(1, span // step)) * step)}/{prefix}"
+            for _ in range(NETBLOCKS)]
+
+
+def _event(kind, data, source, module, target):
+    return {"type": kind, "data": data, "source": source, "module": module, "false_positive": 0,
+            "scan_target": target}
+
+
+def iter_events(config):
+    """Yield SpiderFoot export events, ``config.findings`` of them in total."""
+    rnd = random.Random(config.seed + 1)
+    per_domain = -(-config.findings // config.domains)
+    emitted = 0
+    for d in range(config.domains):
+        target = f"example{d}.com" if config.domains > 1 else "example.com"
+        budget = min(per_domain, config.findings - emitted)
+        fixed = []
+        for _ in range(APEX_ADDRESSES):
+            fixed.append(_event("IP_ADDRESS", _resolved(config, rnd), target, "sfp_dnsresolve", target))
+        for block in _netblocks(config, rnd):
+            fixed.append(_event("NETBLOCK_OWNER", block, target, "sfp_whois", target))
+        for _ in range(TECHNOLOGIES):
+            banner = rnd.choice(DEPLOYED if rnd.random() < config.tech_overlap else UNDEPLOYED)
+            fixed.append(_event("WEBSERVER_BANNER", f"{banner} (Unix)", f"www.{target}", "sfp_webserver", target))
+        fixed = fixed[:budget]
+        yield from fixed
+        for i in range(budget - len(fixed)):
+            kind = rnd.random()
+            if kind < SUBDOMAIN_SHARE:
+                host = f"host{i}.{target}"
+                yield _event("IP_ADDRESS", _resolved(config, rnd), host, "sfp_dnsresolve", target)
+            elif kind < SUBDOMAIN_SHARE + BREACH_SHARE:
+                breach = rnd.choice(BREACHES)
+                yield _event("EMAILADDR_COMPROMISED", f"user{i}@{target} [{breach}]", target,
+                             "sfp_haveibeenpwned", target)
+            else:
+                yield _event("EMAILADDR", f"user{i}@{target}", f"www.{target}", "sfp_email", target)
+        emitted += budget
+
+
+def iter_findings(config):
+    """Yield ``spiderfoot_data`` records (the events through :func:`fusion.spiderfoot.normalize`)."""
+    for event in iter_events(config):
+        yield normalize(event)
+
+
+def write_spiderfoot(config, path):
+    """Write the events as a SpiderFoot JSON export; returns the event count."""
+    count = 0
+    with open(path, "w") as fh:
+        fh.write("[\n")
+        for event in iter_events(config):
+            fh.write(",\n" if count else "")
+            fh.write(json.dumps(event))
+            count += 1
+        fh.write("\n]\n")
+    return count
+
+
+def write_nmap(config, path):
+    """Write the hosts as ``nmap -oX`` XML; returns the port count."""
+    count = 0
+    with open(path, "w") as fh:
+        fh.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap -sV synthetic">\n')
+        for ip, ports in iter_hosts(config):
+            fh.write(f'<host><status state="up"/><address addr="{ip}" addrtype="ipv4"/><ports>\n')
+            for portid, name, product, version, extrainfo, cves in ports:
+                tunnel = ' tunnel="ssl"' if portid == 443 else ""
+                fh.write(f'<port protocol="tcp" portid="{portid}"><state state="open"/>'
+                         f'<service name="{name}" product="{product}" version="{version}" '
+                         f'extrainfo={quoteattr(extrainfo)}{tunnel}/>')
+                if cves:
+                    fh.write(f'<script id="vulners" output="{" ".join(cves)}"/>')
+                fh.write("</port>\n")
+                count += 1
+            fh.write("</ports></host>\n")
+        fh.write("</nmaprun>\n")
+    return count
+
+
+def write(config, out_dir):
+    """Write both files to ``out_dir``; returns ``(spiderfoot_path, nmap_path)``."""
+    os.makedirs(out_dir, exist_ok=True)
+    spiderfoot_path = os.path.join(out_dir, "spiderfoot.json")
+    nmap_path = os.path.join(out_dir, "nmap.xml")
+    write_spiderfoot(config, spiderfoot_path)
+    write_nmap(config, nmap_path)
+    return spiderfoot_path, nmap_path
+
+
+def add_arguments(parser):
+    """The generator knobs, shared with the benchmark harness."""
+    defaults = Config()
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--ip-overlap", type=float, default=defaults.ip_overlap,
+                        help="fraction of resolved addresses that are scanned hosts")
+    parser.add_argument("--tech-overlap", type=float, default=defaults.tech_overlap,
+                        help="fraction of technology findings that match scanned software")
+    parser.add_argument("--cidr-density", type=float, default=defaults.cidr_density,
+                        help="fraction of the scanned address span inside owned netblocks")
+    parser.add_argument("--domains", type=int, default=defaults.domains, help="target domains")
+
+
+def config_from(args, findings, services):
+    return Config(findings, services, args.seed, args.ip_overlap, args.tech_overlap, args.cidr_density,
+                  args.domains)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--findings", type=int, default=Config().findings)
+    parser.add_argument("--services", type=int, default=Config().services)
+    add_arguments(parser)
+    args = parser.parse_args()
+    for path in write(config_from(args, args.findings, args.services), args.out_dir):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,80 @@
-import plotly.graph_objects as go
-import plotly.express as px
+import argparse
+import math
+
 import networkx as nx
 import numpy as np
-import json
-
-# Load the data
-data = {
-  "nodes": [
-    {"id": "DNS_Record", "label": "DNS Record (192.168.1.10)", "type": "spiderfoot", "risk": "Low", "category": "Domain"},
-    {"id": "admin_subdomain", "label": "admin.example.com", "type": "spiderfoot", "risk": "Medium", "category": "Subdomain"},
-    {"id": "admin_email", "label": "admin@example.com", "type": "spiderfoot", "risk": "High", "category": "Email"},
-    {"id": "ip_range", "label": "192.168.1.0/24", "type": "spiderfoot", "risk": "Medium", "category": "IP Range"},
-    {"id": "apache_tech", "label": "Apache 2.4.41", "type": "spiderfoot", "risk": "Medium", "category": "Technology"},
-    {"id": "nmap_80_10", "label": "192.168.1.10:80 (HTTP)", "type": "nmap", "risk": "Low", "service": "HTTP"},
-    {"id": "nmap_443_10", "label": "192.168.1.10:443 (HTTPS)", "type": "nmap", "risk": "Low", "service": "HTTPS"},
-    {"id": "nmap_22_15", "label": "192.168.1.15:22 (SSH)", "type": "nmap", "risk": "Medium", "service": "SSH"},
-    {"id": "nmap_80_15", "label": "192.168.1.15:80 (HTTP)", "type": "nmap", "risk": "Medium", "service": "HTTP"},
-    {"id": "nmap_3306_15", "label": "192.168.1.15:3306 (MySQL)", "type": "nmap", "risk": "High", "service": "MySQL"}
-  ],
-  "edges": [
-    {"source": "DNS_Record", "target": "nmap_80_10", "weight": 1.5, "type": "Direct IP + Infrastructure"},
-    {"source": "DNS_Record", "target": "nmap_443_10", "weight": 1.5, "type": "Direct IP + Infrastructure"},
-    {"source": "admin_subdomain", "target": "nmap_22_15", "weight": 1.1, "type": "Direct IP Match"},
-    {"source": "admin_subdomain", "target": "nmap_80_15", "weight": 1.1, "type": "Direct IP Match"},
-    {"source": "admin_subdomain", "target": "nmap_3306_15", "weight": 1.1, "type": "Direct IP Match"},
-    {"source": "apache_tech", "target": "nmap_80_10", "weight": 1.2, "type": "Technology Match"},
-    {"source": "apache_tech", "target": "nmap_80_15", "weight": 1.2, "type": "Technology Match"},
-    {"source": "ip_range", "target": "nmap_80_10", "weight": 0.7, "type": "Network Range"},
-    {"source": "ip_range", "target": "nmap_443_10", "weight": 0.7, "type": "Network Range"},
-    {"source": "ip_range", "target": "nmap_80_15", "weight": 0.7, "type": "Network Range"}
-  ]
-}
-
-# Create NetworkX graph for layout
-G = nx.Graph()
-
-# Add nodes to the graph
-for node in data['nodes']:
-    G.add_node(node['id'], **node)
+import plotly.graph_objects as go
 
-# Add edges to the graph
-for edge in data['edges']:
-    G.add_edge(edge['source'], edge['target'], weight=edge['weight'], type=edge['type'])
+from fusion.graph import aggregate, edge_coordinates, force_layout, graph_from_store, label, load_positions, save_positions
+from fusion.store import Store
+
+NODE_BUDGET = 2000      # aggregate by /24 or service beyond this many nodes
+WEBGL_POINTS = 1000     # switch to Scattergl above this many points
+LABEL_LIMIT = 150       # draw node text only for graphs this small
+SMALL_GRAPH = 200       # networkx spring layout up to this many nodes
+
+parser = argparse.ArgumentParser(description="Render the OSINT/nmap correlation network.")
+parser.add_argument("db", nargs="?", help="fusion store to render (default: the example graph)")
+parser.add_argument("--group-by", choices=("prefix", "service"), default="prefix",
+                    help="how to aggregate graphs larger than --budget")
+parser.add_argument("--budget", type=int, default=NODE_BUDGET, help="maximum nodes drawn")
+parser.add_argument("--positions", default=None,
+                    help="node position cache (default: <db>.<group-by>-<budget>.positions.json; "
+                         "none for the example graph)")
+parser.add_argument("--output", default="osint_correlation_network.png")
+args = parser.parse_args()
+# One cache per aggregation, each holding only the nodes last drawn with it
+positions_file = args.positions or (f"{args.db}.{args.group_by}-{args.budget}.positions.json" if args.db else None)
 
-# Use spring layout for positioning with more spacing
-pos = nx.spring_layout(G, k=4, iterations=100)
+# Load the data
+if args.db:
+    with Store(args.db) as store:
+        data = graph_from_store(store, args.budget, args.group_by)
+else:
+    data = {
+      "nodes": [
+        {"id": "DNS_Record", "label": "DNS Record (192.168.1.10)", "type": "spiderfoot", "risk": "Low", "category": "Domain"},
+        {"id": "admin_subdomain", "label": "admin.example.com", "type": "spiderfoot", "risk": "Medium", "category": "Subdomain"},
+        {"id": "admin_email", "label": "admin@example.com", "type": "spiderfoot", "risk": "High", "category": "Email"},
+        {"id": "ip_range", "label": "192.168.1.0/24", "type": "spiderfoot", "risk": "Medium", "category": "IP Range"},
+        {"id": "apache_tech", "label": "Apache 2.4.41", "type": "spiderfoot", "risk": "Medium", "category": "Technology"},
+        {"id": "nmap_80_10", "label": "192.168.1.10:80 (HTTP)", "type": "nmap", "risk": "Low", "service": "HTTP"},
+        {"id": "nmap_443_10", "label": "192.168.1.10:443 (HTTPS)", "type": "nmap", "risk": "Low", "service": "HTTPS"},
+        {"id": "nmap_22_15", "label": "192.168.1.15:22 (SSH)", "type": "nmap", "risk": "Medium", "service": "SSH"},
+        {"id": "nmap_80_15", "label": "192.168.1.15:80 (HTTP)", "type": "nmap", "risk": "Medium", "service": "HTTP"},
+        {"id": "nmap_3306_15", "label": "192.168.1.15:3306 (MySQL)", "type": "nmap", "risk": "High", "service": "MySQL"}
+      ],
+      "edges": [
+        {"source": "DNS_Record", "target": "nmap_80_10", "weight": 1.5, "type": "Direct IP + Infrastructure"},
+        {"source": "DNS_Record", "target": "nmap_443_10", "weight": 1.5, "type": "Direct IP + Infrastructure"},
+        {"source": "admin_subdomain", "target": "nmap_22_15", "weight": 1.1, "type": "Direct IP Match"},
+        {"source": "admin_subdomain", "target": "nmap_80_15", "weight": 1.1, "type": "Direct IP Match"},
+        {"source": "admin_subdomain", "target": "nmap_3306_15", "weight": 1.1, "type": "Direct IP Match"},
+        {"source": "apache_tech", "target": "nmap_80_10", "weight": 1.2, "type": "Technology Match"},
+        {"source": "apache_tech", "target": "nmap_80_15", "weight": 1.2, "type": "Technology Match"},
+        {"source": "ip_range", "target": "nmap_80_10", "weight": 0.7, "type": "Network Range"},
+        {"source": "ip_range", "target": "nmap_443_10", "weight": 0.7, "type": "Network Range"},
+        {"source": "ip_range", "target": "nmap_80_15", "weight": 0.7, "type": "Network Range"}
+      ]
+    }
+
+data = aggregate(data, args.budget, args.group_by)
+ids = [node['id'] for node in data['nodes']]
+
+# Layout: cached positions first, then networkx for small graphs, grid force layout otherwise
+cached = load_positions(positions_file)
+if all(node in cached for node in ids):
+    pos = {node: cached[node] for node in ids}
+elif len(ids) <= SMALL_GRAPH:
+    G = nx.Graph()
+    G.add_nodes_from(ids)
+    G.add_edges_from((edge['source'], edge['target'], {'weight': edge['weight']}) for edge in data['edges'])
+    seed = {node: cached[node] for node in ids if node in cached}
+    pos = {node: tuple(xy) for node, xy in nx.spring_layout(G, k=4, iterations=100, pos=seed or None).items()}
+else:
+    pos = force_layout(ids, data['edges'], initial=cached)
+if positions_file:
+    save_positions(positions_file, pos)
 
 # Define colors for different types
 color_map = {
@@ -59,112 +89,69 @@ size_map = {
     'High': 55
 }
 
-# Create edge traces with varying thickness based on weight
+large = len(data['edges']) > WEBGL_POINTS or len(ids) > WEBGL_POINTS
+Scatter = go.Scattergl if large else go.Scatter
+
+# Edges: one None-separated line trace per width class instead of one trace per edge
 edge_traces = []
+by_width = {}
 for edge in data['edges']:
-    x0, y0 = pos[edge['source']]
-    x1, y1 = pos[edge['target']]
-    
     # Scale line width based on weight (multiply by 3 for visibility)
-    line_width = edge['weight'] * 3
-    
-    edge_trace = go.Scatter(
-        x=[x0, x1, None], y=[y0, y1, None],
+    by_width.setdefault(round(edge['weight'] * 3, 1), []).append(edge)
+for line_width, edges in sorted(by_width.items()):
+    xs, ys = edge_coordinates(pos, edges)
+    edge_traces.append(Scatter(
+        x=xs, y=ys,
         line=dict(width=line_width, color='#888'),
-        hoverinfo='text',
-        hovertext=f"Weight: {edge['weight']}<br>Type: {edge['type'][:15]}",
+        hoverinfo='skip',
         mode='lines',
         showlegend=False
+    ))
+
+# Edge hover text on invisible midpoint markers
+edge_mid = np.array([np.add(pos[edge['source']], pos[edge['target']]) / 2 for edge in data['edges']]).reshape(-1, 2)
+edge_hover = [f"Weight: {edge['weight']}<br>Type: {edge['type'][:15]}"
+              + (f"<br>Edges: {edge['count']}" if 'count' in edge else "") for edge in data['edges']]
+edge_traces.append(Scatter(
+    x=edge_mid[:, 0], y=edge_mid[:, 1],
+    mode='markers',
+    marker=dict(size=4, opacity=0),
+    hoverinfo='text',
+    hovertext=edge_hover,
+    showlegend=False
+))
+
+
+def node_trace(nodes, name, detail, detail_key):
+    """Marker trace for one node type; aggregate nodes grow with their member count."""
+    sizes = [size_map[node['risk']] * (1 + math.log10(node['count']) / 2 if 'count' in node else 1)
+             for node in nodes]
+    hover = [f"ID: {node['id']}<br>Risk: {node['risk']}<br>{detail}: {node.get(detail_key, 'N/A')}"
+             + (f"<br>Members: {node['count']}" if 'count' in node else "") for node in nodes]
+    show_text = len(ids) <= LABEL_LIMIT
+    return Scatter(
+        x=[pos[node['id']][0] for node in nodes],
+        y=[pos[node['id']][1] for node in nodes],
+        mode='markers+text' if show_text else 'markers',
+        text=[label(node['label']) for node in nodes] if show_text else None,
+        textposition="bottom center",
+        textfont=dict(size=10),
+        hoverinfo='text',
+        hovertext=hover,
+        marker=dict(
+            size=sizes,
+            color=color_map[nodes[0]['type']] if nodes else None,
+            line=dict(width=2, color='white')
+        ),
+        name=name
     )
-    edge_traces.append(edge_trace)
+
 
 # Create node traces for each type
 spiderfoot_nodes = [node for node in data['nodes'] if node['type'] == 'spiderfoot']
 nmap_nodes = [node for node in data['nodes'] if node['type'] == 'nmap']
-
-# Spiderfoot nodes - truncate labels to fit better
-sf_x = [pos[node['id']][0] for node in spiderfoot_nodes]
-sf_y = [pos[node['id']][1] for node in spiderfoot_nodes]
-sf_text = []
-for node in spiderfoot_nodes:
-    label = node['label']
-    if len(label) > 15:
-        # Smart truncation
-        if 'DNS Record' in label:
-            sf_text.append('DNS Rec')
-        elif 'admin.example.com' in label:
-            sf_text.append('admin.ex.com')
-        elif 'admin@example.com' in label:
-            sf_text.append('admin@ex.com')
-        elif '192.168.1.0/24' in label:
-            sf_text.append('192.168.1.0/24')
-        elif 'Apache' in label:
-            sf_text.append('Apache 2.4.41')
-        else:
-            sf_text.append(label[:15])
-    else:
-        sf_text.append(label)
-
-sf_sizes = [size_map[node['risk']] for node in spiderfoot_nodes]
-sf_hover = [f"ID: {node['id']}<br>Risk: {node['risk']}<br>Cat: {node.get('category', 'N/A')}" for node in spiderfoot_nodes]
-
-spiderfoot_trace = go.Scatter(
-    x=sf_x, y=sf_y,
-    mode='markers+text',
-    text=sf_text,
-    textposition="bottom center",
-    textfont=dict(size=10),
-    hoverinfo='text',
-    hovertext=sf_hover,
-    marker=dict(
-        size=sf_sizes,
-        color=color_map['spiderfoot'],
-        line=dict(width=2, color='white')
-    ),
-    name='Spiderfoot'
-)
-
-# Nmap nodes - truncate labels to fit better
-nmap_x = [pos[node['id']][0] for node in nmap_nodes]
-nmap_y = [pos[node['id']][1] for node in nmap_nodes]
-nmap_text = []
-for node in nmap_nodes:
-    label = node['label']
-    if len(label) > 15:
-        # Smart truncation for nmap labels
-        if '192.168.1.10:80' in label:
-            nmap_text.append('10:80 HTTP')
-        elif '192.168.1.10:443' in label:
-            nmap_text.append('10:443 HTTPS')
-        elif '192.168.1.15:22' in label:
-            nmap_text.append('15:22 SSH')
-        elif '192.168.1.15:80' in label:
-            nmap_text.append('15:80 HTTP')
-        elif '192.168.1.15:3306' in label:
-            nmap_text.append('15:3306 MySQL')
-        else:
-            nmap_text.append(label[:15])
-    else:
-        nmap_text.append(label)
-
-nmap_sizes = [size_map[node['risk']] for node in nmap_nodes]
-nmap_hover = [f"ID: {node['id']}<br>Risk: {node['risk']}<br>Svc: {node.get('service', 'N/A')}" for node in nmap_nodes]
-
-nmap_trace = go.Scatter(
-    x=nmap_x, y=nmap_y,
-    mode='markers+text',
-    text=nmap_text,
-    textposition="bottom center",
-    textfont=dict(size=10),
-    hoverinfo='text',
-    hovertext=nmap_hover,
-    marker=dict(
-        size=nmap_sizes,
-        color=color_map['nmap'],
-        line=dict(width=2, color='white')
-    ),
-    name='Nmap'
-)
+spiderfoot_trace = node_trace(spiderfoot_nodes, 'Spiderfoot', 'Cat', 'category')
+nmap_trace = node_trace(nmap_nodes, 'Nmap', 'Svc', 'service')
 
 # Create the figure
 fig = go.Figure(data=edge_traces + [spiderfoot_trace, nmap_trace])
@@ -185,4 +172,4 @@ fig.update_xaxes(showgrid=False, zeroline=False, showticklabels=False)
 fig.update_yaxes(showgrid=False, zeroline=False, showticklabels=False)
 
 # Save the chart
-fig.write_image("osint_correlation_network.png")
\ No newline at end of file
+fig.write_image(args.output)
\ No newline at end of file
@@ -0,0 +1 @@
+"""Fusion – correlate Nmap & SpiderFoot intelligence."""
@@ -0,0 +1,458 @@
+"""Local HTTP API behind the web dashboard.
+
+``/api/osint``, ``/api/nmap`` and ``/api/correlations`` return one page of
+rows in the shapes ``app.js`` renders (``spiderfoot_data``, ``nmap_data``
+and ``correlations`` records), sorted and filtered in SQLite:
+
+    GET /api/nmap?offset=200&limit=100&sort=port&order=desc&q=apache&risk=High
+
+and answer ``{"total", "offset", "limit", "rows", "next"}``. Passing
+``next`` back as ``after`` fetches the following page by its sort key
+instead of stepping over ``offset`` rows (keyset pagination). Clients
+that already know the total of a filter pass ``count=0`` to skip
+counting (``total`` is then ``null``), which is most of the cost on large
+stores. ``q`` is a case-insensitive substring search, answered from the
+store's trigram full-text indexes where SQLite has FTS5; ``risk`` is an
+exact match, and the combined risk of a correlation is only filtered by it,
+never searched. ``/api/stats`` holds the dashboard counters and
+``/api/neighbors?finding=...`` (or ``?target=ip:port``) the keys of the
+rows a click on the dashboard highlights.
+
+``/api/export/<view>?format=ndjson|csv`` streams every row matching the
+same filter and sort parameters, read from SQLite chunk by chunk;
+``/api/export?format=ndjson`` streams all three views, each record tagged
+with its ``table``. The dashboard files themselves are served from
+``/`` so the page and the API share an origin.
+"""
+import csv
+import io
+import json
+import os
+import queue
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from fusion.export import ARRAY_DELIMITER
+from fusion.store import CORRELATION_ROWID, SEARCH_COLUMNS, Store
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8050
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_FILES = {
+    "/": ("index.html", "text/html; charset=utf-8"),
+    "/index.html": ("index.html", "text/html; charset=utf-8"),
+    "/app.js": ("app.js", "text/javascript; charset=utf-8"),
+    "/style.css": ("style.css", "text/css; charset=utf-8"),
+}
+
+RISK_ORDER = "CASE {} WHEN 'High' THEN 3 WHEN 'Medium' THEN 2 WHEN 'Low' THEN 1 ELSE 0 END"
+
+
+class View(NamedTuple):
+    """One paginated table: its columns, search and sort expressions."""
+
+    name: str
+    table: str         # base table, enough to count rows filtered by risk only
+    joins: str
+    columns: tuple     # (record key, SQL expression)
+    search: tuple      # SQL expressions matched by ``q``
+    risk: str          # SQL expression matched by ``risk``
+    sorts: dict        # sort key -> SQL expression
+    tiebreak: str      # keeps pages stable under equal sort keys
+    json_columns: tuple = ()
+    filters: dict = {}  # extra exact-match parameters -> SQL condition
+    indexed: dict = {}  # search expression -> (row id expression, search table, column)
+
+    @property
+    def fields(self):
+        """Exported record keys: the columns without row ids."""
+        return [key for key, _ in self.columns if key != "id" and not key.endswith("_id")]
+
+
+VIEWS = {
+    "osint": View(
+        "osint", "findings f", "",
+        (("id", "f.id"), ("target", "f.target"), ("type", "f.type"), ("finding", "f.finding"),
+         ("value", "f.value"), ("source", "f.source"), ("risk_level", "f.risk_level"),
+         ("category", "f.category")),
+        ("f.target", "f.type", "f.finding", "f.value", "f.source", "f.risk_level", "f.category"),
+        "f.risk_level",
+        {"type": "f.type", "finding": "f.finding", "value": "f.value", "source": "f.source",
+         "risk_level": RISK_ORDER.format("f.risk_level"), "category": "f.category"},
+        "f.id",
+        indexed={f"f.{column}": ("f.id", "findings_search", column) for column in SEARCH_COLUMNS["findings"]},
+    ),
+    "nmap": View(
+        "nmap", "services s", "",
+        (("id", "s.id"), ("ip", "s.ip"), ("port", "s.port"), ("service", "s.service"),
+         ("version", "s.version"), ("state", "s.state"), ("banner", "s.banner"),
+         ("risk_level", "s.risk_level"), ("vulnerabilities", "s.vulnerabilities")),
+        ("s.ip", "s.port", "s.service", "s.version", "s.state", "s.banner", "s.risk_level", "s.vulnerabilities"),
+        "s.risk_level",
+        {"ip": "s.ipkey", "port": "s.port", "service": "s.service", "version": "s.version",
+         "state": "s.state", "risk_level": RISK_ORDER.format("s.risk_level")},
+        "s.ipkey, s.port, s.id",
+        ("vulnerabilities",),
+        indexed={f"s.{column}": ("s.id", "services_search", column) for column in SEARCH_COLUMNS["services"]},
+    ),
+    "correlations": View(
+        "correlations", "correlations c",
+        " JOIN findings f ON f.id = c.finding_id JOIN services s ON s.id = c.service_id",
+        (("finding_id", "c.finding_id"), ("service_id", "c.service_id"), ("osint_finding", "f.finding"),
+         ("osint_type", "f.type"), ("osint_risk", "f.risk_level"),
+         ("nmap_target", "s.ip || ':' || s.port"), ("nmap_service", "s.service"),
+         ("nmap_risk", "s.risk_level"), ("correlation_score", "c.score"),
+         ("correlation_reasons", "c.reasons"), ("combined_risk", "c.combined_risk")),
+        ("f.finding", "f.type", "f.risk_level", "s.ip || ':' || s.port", "s.service", "s.risk_level",
+         "c.reasons"),
+        "c.combined_risk",
+        {"osint_finding": "f.finding", "osint_type": "f.type", "nmap_target": "s.ipkey, s.port",
+         "nmap_service": "s.service", "correlation_score": "c.score",
+         "combined_risk": RISK_ORDER.format("c.combined_risk")},
+        "c.finding_id, c.service_id",
+        ("correlation_reasons",),
+        {"finding": "f.finding = ?", "target": "s.key = ?"},
+        {"f.finding": ("c.finding_id", "findings_search", "finding"),
+         "f.type": ("c.finding_id", "findings_search", "type"),
+         "f.risk_level": ("c.finding_id", "findings_search", "risk_level"),
+         "s.ip || ':' || s.port": ("c.service_id", "services_search", "key"),
+         "s.service": ("c.service_id", "services_search", "service"),
+         "s.risk_level": ("c.service_id", "services_search", "risk_level"),
+         "c.reasons": (CORRELATION_ROWID, "correlations_search", "reasons")},
+    ),
+}
+
+
+def _like(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def where_clause(view, q="", risk="", text_search=False, **filters):
+    """``(sql, params)`` of the filter shared by the page and its count.
+
+    With ``text_search`` (the store has its trigram indexes) the search
+    expressions of ``view.indexed`` are matched in the full-text tables
+    and only the rest with ``LIKE``; trigrams need ``q`` to be at least
+    three characters long, shorter searches always use ``LIKE``.
+    """
+    clauses, params = [], []
+    if q:
+        matches, rest = {}, []
+        for expr in view.search:
+            if text_search and len(q) >= 3 and expr in view.indexed:
+                row_id, table, column = view.indexed[expr]
+                matches.setdefault((row_id, table), []).append(column)
+            else:
+                rest.append(expr)
+        terms = [f"{row_id} IN (SELECT rowid FROM {table} WHERE {table} MATCH ?)" for row_id, table in matches]
+        params += [f"{{{' '.join(columns)}}} : {_phrase(q)}" for columns in matches.values()]
+        terms += [f"{expr} LIKE ? ESCAPE '\\'" for expr in rest]
+        params += [_like(q)] * len(rest)
+        clauses.append("(" + " OR ".join(terms) + ")")
+    if risk:
+        clauses.append(f"{view.risk} = ?")
+        params.append(risk)
+    for name, value in filters.items():
+        if name not in view.filters:
+            raise ValueError(f"unknown filter for {view.name}: {name}")
+        clauses.append(view.filters[name])
+        params.append(value)
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def ordering(view, sort="", order="asc"):
+    """``[(SQL expression, "ASC" or "DESC")]`` rows of ``view`` are sorted by, tiebreak last."""
+    if sort and sort not in view.sorts:
+        raise ValueError(f"cannot sort {view.name} by {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"order must be asc or desc, not {order}")
+    keys = [(expr, order.upper()) for expr in view.sorts[sort].split(", ")] if sort else []
+    return keys + [(expr, "ASC") for expr in view.tiebreak.split(", ")]
+
+
+def after_clause(keys, values):
+    """``(sql, params)`` of the rows sorting after the row whose ``keys`` are ``values``.
+
+    SQLite sorts NULLs first ascending and last descending, and no
+    comparison with NULL is true, so NULLs are spelled out: descending,
+    the rows after ``v`` are those below it or NULL; ascending, those after
+    a NULL are the ones not NULL. Only all-ascending keys with no NULL in
+    the cursor use a row value comparison, which SQLite turns into an index
+    range (NULL rows sort before the cursor there anyway).
+    """
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("after does not match the sort order")
+    if all(direction == "ASC" for _, direction in keys) and None not in values:
+        exprs = ", ".join(expr for expr, _ in keys)
+        return f"({exprs}) > ({', '.join('?' * len(values))})", list(values)
+    terms, params, equal, equal_params = [], [], [], []
+    for (expr, direction), value in zip(keys, values):
+        if value is None:
+            beyond, beyond_params = (f"{expr} IS NOT NULL" if direction == "ASC" else None), []
+            equal_term, value_params = f"{expr} IS NULL", []
+        else:
+            beyond = f"{expr} > ?" if direction == "ASC" else f"({expr} < ? OR {expr} IS NULL)"
+            beyond_params = [value]
+            equal_term, value_params = f"{expr} = ?", [value]
+        if beyond is not None:
+            terms.append(" AND ".join(equal + [beyond]))
+            params += equal_params + beyond_params
+        equal.append(equal_term)
+        equal_params += value_params
+    return ("(" + " OR ".join(f"({term})" for term in terms) + ")" if terms else "0"), params
+
+
+def select(view, sort="", order="asc", q="", risk="", text_search=False, after=None, **filters):
+    """``(sql, params)`` of the sorted, filtered rows of ``view``.
+
+    The ordering keys are selected too, as ``_key0``, ``_key1``..., so a
+    page can hand out the cursor of its last row; ``after`` is such a
+    cursor and starts the rows behind it.
+    """
+    keys = ordering(view, sort, order)
+    where, params = where_clause(view, q, risk, text_search, **filters)
+    if after is not None:
+        clause, values = after_clause(keys, after)
+        where = f"{where} AND {clause}" if where else f" WHERE {clause}"
+        params += values
+    columns = ", ".join([f"{expr} AS {key}" for key, expr in view.columns] +
+                        [f"{expr} AS _key{i}" for i, (expr, _) in enumerate(keys)])
+    order_by = ", ".join(f"{expr} {direction}" for expr, direction in keys)
+    return f"SELECT {columns} FROM {view.table}{view.joins}{where} ORDER BY {order_by}", params
+
+
+def _record(view, row):
+    record = {key: row[key] for key, _ in view.columns}
+    for key in view.json_columns:
+        record[key] = json.loads(record[key])
+    return record
+
+
+def _cursor(row):
+    return json.dumps([row[key] for key in row.keys() if key.startswith("_key")])
+
+
+def page(store, view, offset=0, limit=DEFAULT_LIMIT, sort="", order="asc", q="", risk="", count=True,
+         after=None, **filters):
+    """One page of ``view`` rows as dashboard records plus the filtered total.
+
+    ``after`` is the ``next`` cursor of the previous page: the page then
+    starts right behind that row (keyset pagination), and ``offset`` is
+    only echoed back. Without it the first ``offset`` rows are skipped,
+    which SQLite has to step through.
+    """
+    view = VIEWS[view]
+    offset, limit = max(0, int(offset)), min(max(1, int(limit)), MAX_LIMIT)
+    if after is not None:
+        sql, params = select(view, sort, order, q, risk, store.text_search, json.loads(after), **filters)
+        rows = store.db.execute(f"{sql} LIMIT ?", params + [limit]).fetchall()
+    else:
+        sql, params = select(view, sort, order, q, risk, store.text_search, **filters)
+        rows = store.db.execute(f"{sql} LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+    total = None
+    if str(count).lower() not in ("0", "false"):
+        where, params = where_clause(view, q, risk, store.text_search, **filters)
+        # Without a text search or join filter, the base table alone gives the count
+        source = view.table if not q and not filters else f"{view.table}{view.joins}"
+        total = store.db.execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]
+    return {"total": total, "offset": offset, "limit": limit, "rows": [_record(view, row) for row in rows],
+            "next": _cursor(rows[-1]) if len(rows) == limit else None}
+
+
+EXPORT_CHUNK = 2000  # rows per streamed write
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def export_chunks(store, view, fmt="ndjson", tagged=False, chunk_size=EXPORT_CHUNK, **params):
+    """Yield encoded NDJSON or CSV chunks of every ``view`` row matching ``params``.
+
+    Rows are fetched ``chunk_size`` at a time, so the export streams in
+    constant memory. CSV starts with a header row and joins lists with
+    ``ARRAY_DELIMITER``; ``tagged`` NDJSON records carry their ``table``.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    view = VIEWS[view]
+    fields = view.fields
+    sql, args = select(view, text_search=store.text_search, **params)
+    cursor = store.db.execute(sql, args)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fields)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for row in rows:
+            record = _record(view, row)
+            if fmt == "csv":
+                writer.writerow([ARRAY_DELIMITER.join(record[key]) if isinstance(record[key], list) else record[key]
+                                 for key in fields])
+            else:
+                out = {"table": view.name} if tagged else {}
+                out.update((key, record[key]) for key in fields)
+                buffer.write(json.dumps(out))
+                buffer.write("\n")
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if fmt == "csv" and buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def neighbors(store, finding=None, target=None):
+    """``ip:port`` targets correlated with a finding, or findings correlated with a target.
+
+    Both directions are index lookups (``findings_finding`` or the unique
+    service key, then the correlation keys), so the cost follows the size
+    of the answer rather than of the store.
+    """
+    if (finding is None) == (target is None):
+        raise ValueError("give exactly one of finding, target")
+    if finding is not None:
+        rows = store.db.execute(
+            "SELECT DISTINCT s.key FROM findings f JOIN correlations c ON c.finding_id = f.id"
+            " JOIN services s ON s.id = c.service_id WHERE f.finding = ?", (finding,))
+    else:
+        rows = store.db.execute(
+            "SELECT DISTINCT f.finding FROM services s JOIN correlations c ON c.service_id = s.id"
+            " JOIN findings f ON f.id = c.finding_id WHERE s.key = ?", (target,))
+    return {"keys": [row[0] for row in rows]}
+
+
+def stats(store):
+    """The dashboard counters: findings, correlations and high/medium risk items."""
+    counts = store.counts()
+    risks = dict.fromkeys(("High", "Medium", "Low"), 0)
+    for table in ("findings", "services"):
+        for level, count in store.db.execute(f"SELECT risk_level, COUNT(*) FROM {table} GROUP BY risk_level"):
+            risks[level] = risks.get(level, 0) + count
+    return {"total_findings": counts["findings"] + counts["services"],
+            "correlations": counts["correlations"], "risk_levels": risks}
+
+
+ENDPOINTS = {"stats": stats, "neighbors": neighbors}
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """Routes ``/api/*`` to the store and everything else to the dashboard files."""
+
+    server_version = "fusion-dashboard"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith("/api/"):
+            return self._static(url.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        name = url.path[len("/api/"):].strip("/")
+        if name == "export" or name.startswith("export/"):
+            return self._export(name.partition("/")[2], params)
+        if name not in ENDPOINTS and name not in VIEWS:
+            return self._json({"error": f"unknown endpoint: {url.path}"}, HTTPStatus.NOT_FOUND)
+        try:
+            with self.server.store() as store:
+                body = ENDPOINTS[name](store, **params) if name in ENDPOINTS else page(store, name, **params)
+        except (TypeError, ValueError) as exc:
+            return self._json({"error": str(exc)}, HTTPStatus.BAD_REQUEST)
+        self._json(body)
+
+    def _export(self, view, params):
+        fmt = params.pop("format", "ndjson")
+        if view and view not in VIEWS:
+            return self._json({"error": f"unknown export: {view}"}, HTTPStatus.NOT_FOUND)
+        if not view and (fmt != "ndjson" or params):
+            return self._json({"error": "exports of all views are unfiltered NDJSON; use /api/export/<view>"},
+                              HTTPStatus.BAD_REQUEST)
+        views = [view] if view else list(VIEWS)
+        with self.server.store() as store:
+            try:
+                # Build the generators first so bad parameters still get a JSON error
+                streams = [export_chunks(store, name, fmt, tagged=not view, **params) for name in views]
+                first = next(streams[0], b"")
+            except (TypeError, ValueError) as exc:
+                return self._json({"error": str(exc)}, HTTPStatus.BAD_REQUEST)
+            filename = f"correlation-analysis-{view or 'all'}-{time.strftime('%Y-%m-%d')}.{fmt}"
+            # No Content-Length: the body is streamed and ends when the connection closes
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", EXPORT_FORMATS[fmt])
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                self.wfile.write(first)
+                for stream in streams:
+                    for chunk in stream:
+                        self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def _json(self, body, status=HTTPStatus.OK):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _static(self, path):
+        if path not in STATIC_FILES:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        name, content_type = STATIC_FILES[path]
+        try:
+            with open(os.path.join(self.server.static_dir, name), "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class DashboardServer(ThreadingHTTPServer):
+    """Threaded HTTP server; request threads borrow store connections from a pool."""
+
+    daemon_threads = True
+
+    def __init__(self, db, host=DEFAULT_HOST, port=DEFAULT_PORT, static_dir=DASHBOARD_DIR, verbose=False):
+        super().__init__((host, port), DashboardHandler)
+        self.db_path = db
+        self.static_dir = static_dir
+        self.verbose = verbose
+        self._idle = queue.SimpleQueue()
+
+    @contextmanager
+    def store(self):
+        try:
+            store = self._idle.get_nowait()
+        except queue.Empty:
+            store = Store(self.db_path, check_same_thread=False)
+        try:
+            yield store
+        finally:
+            self._idle.put(store)
+
+    def server_close(self):
+        super().server_close()
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
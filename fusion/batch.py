@@ -0,0 +1,302 @@
+"""Vectorized (pandas/NumPy) scoring path for the correlation rules.
+
+Same rules and weights as :mod:`fusion.correlate`, but risk levels,
+categories and services are encoded as small integer codes and whole
+candidate blocks are scored as arrays. The result is identical to
+``pd.DataFrame(correlate(spiderfoot_data, nmap_data))``.
+
+:func:`correlate_records` runs the same scoring on the columnar
+:class:`fusion.records.Findings`/:class:`fusion.records.Services`: risk
+weights, address keys, range bounds and technology profiles are derived
+per distinct category, IPs match on packed keys instead of strings, and
+the result keeps its text columns categorical.
+"""
+import numpy as np
+import pandas as pd
+
+from fusion.correlate import (
+    IP_MATCH_WEIGHT,
+    RANGE_MATCH_WEIGHT,
+    RISK_LEVEL_WEIGHT,
+    RISK_WEIGHTS,
+    SCORE_THRESHOLD,
+    SERVICE_CONTEXT_WEIGHT,
+    TECH_MATCH_WEIGHT,
+    WEB_SERVICES,
+)
+from fusion.ranges import ip_int, parse_cidr
+from fusion.versions import ProductIndex
+
+COLUMNS = [
+    "osint_finding", "osint_type", "osint_risk", "nmap_target", "nmap_service",
+    "nmap_risk", "correlation_score", "correlation_reasons", "combined_risk",
+]
+
+# Rule bits, in the order the reasons are appended
+IP_BIT, RANGE_BIT, TECH_BIT, RISK_BIT, SERVICE_BIT = 1, 2, 4, 8, 16
+REASONS = {
+    IP_BIT: "Direct IP match",
+    RANGE_BIT: "IP range match",
+    TECH_BIT: "Technology version match",
+    RISK_BIT: "Similar risk levels",
+    SERVICE_BIT: "Infrastructure service match",
+}
+REASON_SETS = [tuple(text for bit, text in REASONS.items() if mask & bit) for mask in range(32)]
+
+# Combined risk by max risk code (index 0 unused)
+RISK_LABELS = np.array(["Low", "Low", "Medium", "High"], dtype=object)
+RISK_CATEGORIES = ["Low", "Medium", "High"]
+
+
+def _frame(records):
+    return records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+
+
+def technology_hits(osint, scans):
+    """Technology matches over distinct values only.
+
+    Returns ``(finding_codes, profile_codes, hits)``: per-row codes of the
+    Technology findings (``-1`` for other types) and of the scans'
+    ``(service, version, banner)`` profiles, plus an ``(n, 2)`` array of
+    matching ``(finding, profile)`` code pairs. Each distinct finding is one
+    :class:`ProductIndex` lookup.
+    """
+    tech = (osint["type"] == "Technology").to_numpy()
+    finding_codes = np.full(len(osint), -1, dtype=np.int64)
+    codes, findings = pd.factorize(osint["finding"][tech])
+    finding_codes[tech] = codes
+
+    banners = scans["banner"].fillna("") if "banner" in scans else [""] * len(scans)
+    profile_codes, profiles = pd.factorize(pd.Series(list(zip(scans["service"], scans["version"], banners))))
+    products = ProductIndex()
+    for j, (service, version, banner) in enumerate(profiles):
+        products.add(j, service, version, banner)
+    hits = [(i, j) for i, finding in enumerate(findings) for j in products.lookup(finding)]
+    return finding_codes, profile_codes.astype(np.int64), np.asarray(hits, dtype=np.int64).reshape(-1, 2)
+
+
+def _key_array(keys):
+    """Address keys as int64 when they fit (IPv4), else as Python ints; ``-1`` for none."""
+    keys = [-1 if key is None else key for key in keys]
+    if all(key < 1 << 63 for key in keys):
+        return np.asarray(keys, dtype=np.int64)
+    return np.asarray(keys, dtype=object)
+
+
+def range_bounds(osint):
+    """Per-finding ``(first, last)`` key arrays; ``last < first`` when not an IP Range."""
+    bounds = [parse_cidr(finding) if kind == "IP Range" else None
+              for kind, finding in zip(osint["type"], osint["finding"])]
+    first = _key_array([b[0] if b else 0 for b in bounds])
+    last = _key_array([b[1] if b else -1 for b in bounds])
+    return first, last
+
+
+def candidate_pairs(osint, scans, osint_risk, scan_risk, scan_keys=None, bounds=None, tech=None,
+                    value_keys=None):
+    """``(osint_row, scan_row)`` arrays of every pair that may clear the threshold.
+
+    With ``value_keys`` (address keys of the OSINT values, ``-1`` for
+    none) the IP rule joins on ``scan_keys`` rather than on the strings.
+    Pairs are sorted osint-major, i.e. in nested loop order.
+    """
+    blocks = []
+    osint_rows = pd.DataFrame({"o": np.arange(len(osint))})
+    scan_rows = pd.DataFrame({"s": np.arange(len(scans))})
+
+    # IP match
+    if value_keys is None:
+        by_value = osint_rows.assign(key=osint["value"].to_numpy(dtype=object))
+        by_ip = scan_rows.assign(key=scans["ip"].to_numpy(dtype=object))
+    else:
+        by_value = osint_rows.assign(key=value_keys)[value_keys >= 0]
+        by_ip = scan_rows.assign(key=scan_keys)
+    blocks.append(by_value.merge(by_ip, on="key")[["o", "s"]])
+
+    # IP range membership: binary search over the sorted scan addresses
+    first, last = bounds if bounds is not None else range_bounds(osint)
+    ranged = np.flatnonzero(last >= first)
+    if len(ranged):
+        keys = scan_keys if scan_keys is not None else _key_array(ip_int(ip) for ip in scans["ip"])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        lo = np.searchsorted(sorted_keys, first[ranged], side="left")
+        hi = np.searchsorted(sorted_keys, last[ranged], side="right")
+        sizes = hi - lo
+        if sizes.sum():
+            o = np.repeat(ranged, sizes)
+            s = np.concatenate([order[a:b] for a, b in zip(lo, hi) if b > a])
+            blocks.append(pd.DataFrame({"o": o, "s": s}))
+
+    # Technology match, via the distinct finding x profile hits
+    finding_codes, profile_codes, hits = tech if tech is not None else technology_hits(osint, scans)
+    if len(hits):
+        is_tech = np.flatnonzero(finding_codes >= 0)
+        finding_rows = pd.DataFrame({"o": is_tech, "f": finding_codes[is_tech]})
+        profile_rows = pd.DataFrame({"s": scan_rows["s"], "p": profile_codes})
+        hits = pd.DataFrame({"f": hits[:, 0], "p": hits[:, 1]})
+        blocks.append(finding_rows.merge(hits, on="f").merge(profile_rows, on="p")[["o", "s"]])
+
+    # Infrastructure context + similar risk (0.4 + 0.3)
+    infra = (osint["category"] == "Infrastructure").to_numpy()
+    web = scans["service"].isin(WEB_SERVICES).to_numpy()
+    if infra.any() and web.any():
+        left = pd.DataFrame({"o": np.flatnonzero(infra), "r": osint_risk[infra]})
+        right = pd.DataFrame({"s": np.flatnonzero(web), "r": scan_risk[web]})
+        for offset in (-1, 0, 1):
+            blocks.append(left.merge(right.assign(r=right["r"] + offset), on="r")[["o", "s"]])
+
+    pairs = pd.concat(blocks, ignore_index=True).drop_duplicates().sort_values(["o", "s"])
+    return pairs["o"].to_numpy(dtype=np.int64), pairs["s"].to_numpy(dtype=np.int64)
+
+
+def _score(osint, scans, osint_risk, scan_risk, scan_keys, bounds, tech, value_keys=None):
+    """Candidate pairs above the threshold as ``(o, s, rounded score, reason mask)``."""
+    o, s = candidate_pairs(osint, scans, osint_risk, scan_risk, scan_keys, bounds, tech, value_keys)
+
+    # Rule masks over the candidate block
+    if value_keys is None:
+        values = osint["value"].to_numpy(dtype=object)[o]
+        ips = scans["ip"].to_numpy(dtype=object)[s]
+        ip_match = values == ips
+    else:
+        ip_match = (value_keys[o] >= 0) & (value_keys[o] == scan_keys[s])
+    ip_match = ip_match.astype(bool)
+    first, last = bounds
+    pair_keys = scan_keys[s]
+    range_match = (pair_keys >= 0) & (first[o] <= pair_keys) & (pair_keys <= last[o])
+    range_match = range_match.astype(bool)
+
+    finding_codes, profile_codes, hits = tech
+    width = int(profile_codes.max()) + 1
+    tech_match = (finding_codes[o] >= 0) & np.isin(finding_codes[o] * width + profile_codes[s],
+                                                   hits[:, 0] * width + hits[:, 1])
+
+    risk_match = np.abs(osint_risk[o].astype(np.int16) - scan_risk[s]) <= 1
+    service_match = ((osint["category"] == "Infrastructure").to_numpy()[o]
+                     & scans["service"].isin(WEB_SERVICES).to_numpy()[s])
+
+    # Added in rule order so the float sums match the per-pair path exactly
+    score = np.zeros(len(o))
+    score += np.where(ip_match, IP_MATCH_WEIGHT, 0.0)
+    score += np.where(range_match, RANGE_MATCH_WEIGHT, 0.0)
+    score += np.where(tech_match, TECH_MATCH_WEIGHT, 0.0)
+    score += np.where(risk_match, RISK_LEVEL_WEIGHT, 0.0)
+    score += np.where(service_match, SERVICE_CONTEXT_WEIGHT, 0.0)
+
+    keep = score > SCORE_THRESHOLD
+    o, s, score = o[keep], s[keep], score[keep]
+    mask = (ip_match[keep] * IP_BIT + range_match[keep] * RANGE_BIT + tech_match[keep] * TECH_BIT
+            + risk_match[keep] * RISK_BIT + service_match[keep] * SERVICE_BIT)
+
+    # Python's round() on the few distinct sums, not np.round
+    distinct, inverse = np.unique(score, return_inverse=True)
+    rounded = np.array([round(float(value), 2) for value in distinct])[inverse]
+    return o, s, rounded, mask
+
+
+def correlate_frame(spiderfoot_data, nmap_data):
+    """Score all candidate pairs as arrays and return the correlations DataFrame."""
+    osint = _frame(spiderfoot_data)
+    scans = _frame(nmap_data)
+    if osint.empty or scans.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    osint_risk = osint["risk_level"].map(RISK_WEIGHTS).to_numpy(dtype=np.int8)
+    scan_risk = scans["risk_level"].map(RISK_WEIGHTS).to_numpy(dtype=np.int8)
+    scan_keys = _key_array(ip_int(ip) for ip in scans["ip"])
+    o, s, rounded, mask = _score(osint, scans, osint_risk, scan_risk, scan_keys, range_bounds(osint),
+                                 technology_hits(osint, scans))
+
+    target = (scans["ip"].astype(str) + ":" + scans["port"].astype(str)).to_numpy(dtype=object)
+    combined = RISK_LABELS[np.maximum(osint_risk[o], scan_risk[s])]
+
+    return pd.DataFrame({
+        "osint_finding": osint["finding"].to_numpy(dtype=object)[o],
+        "osint_type": osint["type"].to_numpy(dtype=object)[o],
+        "osint_risk": osint["risk_level"].to_numpy(dtype=object)[o],
+        "nmap_target": target[s],
+        "nmap_service": scans["service"].to_numpy(dtype=object)[s],
+        "nmap_risk": scans["risk_level"].to_numpy(dtype=object)[s],
+        "correlation_score": rounded,
+        "correlation_reasons": [list(REASON_SETS[m]) for m in mask],
+        "combined_risk": combined,
+    })
+
+
+def _take(column, rows):
+    """Rows of a categorical, sharing its categories."""
+    return pd.Categorical.from_codes(column.codes[rows], dtype=column.dtype)
+
+
+def record_ranges(findings):
+    """:func:`range_bounds` of :class:`fusion.records.Findings`, one ``parse_cidr`` per distinct finding."""
+    bounds = [parse_cidr(finding) for finding in findings.categories("finding")]
+    first = _key_array([b[0] if b else 0 for b in bounds])[findings.codes("finding")]
+    last = _key_array([b[1] if b else -1 for b in bounds])[findings.codes("finding")]
+    is_range = findings.columns["type"] == "IP Range"
+    return np.where(is_range, first, 0), np.where(is_range, last, -1)
+
+
+def record_technology_hits(findings, services):
+    """:func:`technology_hits` over the category codes of findings and services.
+
+    Scan profiles are the distinct ``(service, version, banner)`` code
+    triples; finding codes are the ``finding`` codes of Technology rows.
+    """
+    finding_codes = np.where(findings.columns["type"] == "Technology",
+                             findings.codes("finding").astype(np.int64), -1)
+    columns = [services.columns[field] for field in ("service", "version", "banner")]
+    combined = np.zeros(len(services), dtype=np.int64)
+    for column in columns:
+        combined = combined * len(column.categories) + column.codes
+    profiles, profile_codes = np.unique(combined, return_inverse=True)
+
+    products = ProductIndex()
+    for j, profile in enumerate(profiles.tolist()):
+        parts = []
+        for column in reversed(columns):
+            profile, code = divmod(profile, len(column.categories))
+            parts.append(column.categories[code])
+        service, version, banner = reversed(parts)
+        products.add(j, service, version, banner)
+    categories = findings.categories("finding")
+    hits = [(i, j) for i in np.unique(finding_codes[finding_codes >= 0]).tolist()
+            for j in products.lookup(categories[i])]
+    return finding_codes, profile_codes.astype(np.int64), np.asarray(hits, dtype=np.int64).reshape(-1, 2)
+
+
+def correlate_records(findings, services):
+    """:func:`correlate_frame` on columnar records; text columns stay categorical.
+
+    Equal to ``correlate_frame`` after ``astype(object)``, except that IPs
+    are compared as addresses, so differently spelled IPv6 values match.
+    """
+    if not len(findings) or not len(services):
+        return pd.DataFrame(columns=COLUMNS)
+
+    osint_risk = findings.weights("risk_level", RISK_WEIGHTS)
+    scan_risk = services.weights("risk_level", RISK_WEIGHTS)
+    scan_keys = services.ip_keys()
+    if scan_keys.dtype == np.uint32:
+        scan_keys = scan_keys.astype(np.int64)
+    value_keys = findings.value_keys()
+    if value_keys.dtype == object or scan_keys.dtype == object:
+        value_keys, scan_keys = value_keys.astype(object), scan_keys.astype(object)
+    osint = findings.to_frame(("type", "category"))
+    scans = services.to_frame(("service",))
+    o, s, rounded, mask = _score(osint, scans, osint_risk, scan_risk, scan_keys, record_ranges(findings),
+                                 record_technology_hits(findings, services), value_keys)
+
+    combined = np.maximum(osint_risk[o], scan_risk[s]) - 1
+    return pd.DataFrame({
+        "osint_finding": _take(findings.columns["finding"], o),
+        "osint_type": _take(findings.columns["type"], o),
+        "osint_risk": _take(findings.columns["risk_level"], o),
+        "nmap_target": _take(services.targets(), s),
+        "nmap_service": _take(services.columns["service"], s),
+        "nmap_risk": _take(services.columns["risk_level"], s),
+        "correlation_score": rounded,
+        "correlation_reasons": [list(REASON_SETS[m]) for m in mask],
+        "combined_risk": pd.Categorical.from_codes(combined, categories=RISK_CATEGORIES),
+    })
@@ -0,0 +1 @@
+"""Sub-commands of the ``fusion`` CLI."""
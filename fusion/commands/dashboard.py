@@ -0,0 +1,32 @@
+"""``fusion dashboard`` – serve the web dashboard and its paginated store API."""
+import os
+
+import rich_click as click
+
+from fusion.api import DASHBOARD_DIR, DEFAULT_HOST, DEFAULT_PORT, DashboardServer
+from fusion.store import DEFAULT_PATH
+
+
+@click.command()
+@click.option("--host", default=DEFAULT_HOST, show_default=True, help="Address to listen on.")
+@click.option("--port", default=DEFAULT_PORT, show_default=True, help="Port to listen on.")
+@click.option("--static", "static_dir", default=DASHBOARD_DIR, show_default=True,
+              type=click.Path(exists=True, file_okay=False), help="Directory holding index.html, app.js and style.css.")
+@click.option("--verbose", is_flag=True, help="Log every request.")
+@click.option("--db", default=DEFAULT_PATH, envvar="FUSION_DB", show_default=True, help="Store path.")
+def cli(host, port, static_dir, verbose, db):
+    """Serve the correlation dashboard backed by the store.
+
+    The dashboard fetches one page of findings, services or correlations
+    at a time from /api/*, so tables of any size stay responsive.
+    """
+    if not os.path.exists(db):
+        raise click.UsageError(f"store not found: {db} (run `fusion import` first)")
+    server = DashboardServer(db, host, port, static_dir, verbose)
+    click.echo(f"Dashboard on http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
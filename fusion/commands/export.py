@@ -0,0 +1,35 @@
+"""``fusion export`` – stream the store out as a graph (neo4j CSV, Parquet, Arrow)."""
+import rich_click as click
+
+from fusion.export import CHUNK_SIZE, FORMATS, export, import_command
+from fusion.store import DEFAULT_PATH, Store
+
+
+@click.command()
+@click.option("--neo4j", "prefix", required=True,
+              help="Output prefix; e.g. neo_acme.csv writes neo_acme_findings.csv, neo_acme_correlations.csv, "
+                   "... (out/neo_acme.csv creates out/ when missing)")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default="csv", show_default=True,
+              help="csv for neo4j-admin import, parquet/arrow (needs pyarrow) for analytics.")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the CSV files.")
+@click.option("--chunk-size", default=CHUNK_SIZE, show_default=True, help="Rows read and written per batch.")
+@click.option("--db", default=DEFAULT_PATH, envvar="FUSION_DB", show_default=True, help="Store path.")
+def cli(prefix, fmt, compress, chunk_size, db):
+    """Export findings, services, CVEs and their correlations as graph files.
+
+    Rows are streamed from the store in batches, so exports of any size run
+    in constant memory.
+    """
+    written = []
+    with Store(db) as store:
+        try:
+            for table, path, count in export(store, prefix, fmt, compress, chunk_size):
+                click.echo(f"{path}: {count} {table.kind[:-1] if count == 1 else table.kind}")
+                written.append((table, path))
+        except RuntimeError as exc:
+            raise click.UsageError(str(exc))
+        except (FileExistsError, NotADirectoryError, PermissionError) as exc:
+            # The prefix's directory is a file or not writable
+            raise click.FileError(exc.filename or prefix, exc.strerror)
+    if fmt == "csv":
+        click.echo("Load with:\n" + import_command(written))
@@ -0,0 +1,143 @@
+"""``fusion find`` – query imported findings, services and correlations."""
+import json
+
+import rich_click as click
+
+from fusion import daemon, instrument
+from fusion.store import DEFAULT_PATH, Store
+
+
+DEFAULT_LIMIT = 1000
+TABLES = ("findings", "services", "correlations")
+
+
+def lookup(store, domain=None, ip=None, port=None, service=None, cve=None, limit=None, offset=0):
+    """Collect findings, services and the correlations linking them.
+
+    Each table holds at most ``limit`` rows from ``offset`` on (all rows
+    when ``limit`` is ``None``); ``truncated`` names the tables that have more.
+    """
+    findings = store.finding_filter(domain, ip)
+    services = store.service_filter(ip, port, service, cve)
+    fetch = None if limit is None else limit + 1
+    offset = offset or 0
+    result = {
+        "findings": store.findings(*findings, limit=fetch, offset=offset) if findings else [],
+        "services": store.services(*services, limit=fetch, offset=offset) if services else [],
+        "correlations": store.correlations_matching(findings, services, limit=fetch, offset=offset),
+    }
+    result["truncated"] = [table for table in TABLES if fetch is not None and len(result[table]) > limit]
+    for table in result["truncated"]:
+        del result[table][limit:]
+    return result
+
+
+def render_table(result):
+    lines = []
+    if result["findings"]:
+        lines.append("OSINT findings:")
+        lines += [f"  [{f['risk_level']:<6}] {f['type']:<10} {f['finding']}  ({f['value']}, {f['source']})"
+                  for f in result["findings"]]
+    if result["services"]:
+        lines.append("Services:")
+        lines += [f"  [{s['risk_level']:<6}] {s['ip']}:{s['port']:<6} {s['service']:<8} {s['version']}"
+                  + (f"  {', '.join(s['vulnerabilities'])}" if s["vulnerabilities"] else "")
+                  for s in result["services"]]
+    if result["correlations"]:
+        lines.append("Correlations:")
+        lines += [f"  {c['correlation_score']:>4}  {c['osint_finding']} -> {c['nmap_target']} "
+                  f"({c['nmap_service']}, {c['combined_risk']})  {'; '.join(c['correlation_reasons'])}"
+                  for c in result["correlations"]]
+    return "\n".join(lines) or "No results."
+
+
+def render_tree(result):
+    """Services grouped by host, each with its correlated findings."""
+    by_target = {}
+    for c in result["correlations"]:
+        by_target.setdefault(c["nmap_target"], []).append(c)
+    hosts = {}
+    for s in result["services"]:
+        hosts.setdefault(s["ip"], []).append(s)
+    for c in result["correlations"]:
+        ip, port = c["nmap_target"].rsplit(":", 1)
+        if not any(f"{s['ip']}:{s['port']}" == c["nmap_target"] for s in hosts.get(ip, ())):
+            hosts.setdefault(ip, []).append({"ip": ip, "port": int(port), "service": c["nmap_service"],
+                                             "version": "", "risk_level": c["nmap_risk"]})
+
+    lines = []
+    for ip in sorted(hosts):
+        lines.append(ip)
+        ports = sorted(hosts[ip], key=lambda s: s["port"])
+        for i, s in enumerate(ports):
+            last = i == len(ports) - 1
+            lines.append(f"{'└──' if last else '├──'} {s['port']}/{s['service']} {s['version']} [{s['risk_level']}]".rstrip())
+            children = by_target.get(f"{ip}:{s['port']}", [])
+            for j, c in enumerate(children):
+                branch = "└──" if j == len(children) - 1 else "├──"
+                lines.append(f"{'    ' if last else '│   '}{branch} {c['osint_finding']} "
+                             f"({c['osint_type']}) score {c['correlation_score']}")
+    return "\n".join(lines) or "No results."
+
+
+RENDERERS = {
+    "table": render_table,
+    "tree": render_tree,
+    "json": lambda result: json.dumps(result, indent=2),
+}
+
+
+@click.command()
+@click.option("--domain", help="Domain or parent domain of OSINT findings.")
+@click.option("--ip", help="IP address of services and findings.")
+@click.option("--port", type=int, help="Service port.")
+@click.option("--service", help="Service name, e.g. HTTP.")
+@click.option("--cve", help="CVE identifier.")
+@click.option("--format", "fmt", type=click.Choice(sorted(RENDERERS)), default="table", show_default=True)
+@click.option("--limit", default=DEFAULT_LIMIT, show_default=True,
+              help="Rows shown per table (findings, services, correlations); 0 for all.")
+@click.option("--offset", default=0, show_default=True, help="Rows skipped per table, for the next page.")
+@click.option("--db", default=DEFAULT_PATH, envvar="FUSION_DB", show_default=True,
+              type=click.Path(exists=True, dir_okay=False), help="Store path.")
+@click.option("--socket", "socket_file", envvar="FUSION_SOCKET",
+              help="Socket of a `fusion serve` daemon [default: the store path + .sock].")
+@click.option("--daemon/--no-daemon", "use_daemon", default=True, show_default=True,
+              help="Ask the `fusion serve` daemon of the store when one is running; the store "
+                   f"is queried here when it does not answer within {daemon.QUERY_TIMEOUT:g}s.")
+def cli(domain, ip, port, service, cve, fmt, limit, offset, db, socket_file, use_daemon):
+    """Look up imported findings, services and their correlations.
+
+    When `fusion serve` runs for the store the lookup is answered by it,
+    from its warm indexes and cache; otherwise the store is queried here.
+    """
+    if not any((domain, ip, port is not None, service, cve)):
+        raise click.UsageError("give at least one of --domain, --ip, --port, --service, --cve")
+    limit = limit or None
+    if use_daemon:
+        with instrument.stage("daemon query"):
+            try:
+                response = daemon.query(socket_file or daemon.socket_path(db), fmt, domain=domain, ip=ip,
+                                        port=port, service=service, cve=cve, limit=limit, offset=offset)
+            except ValueError as exc:
+                raise click.UsageError(str(exc))
+        if response is not None:
+            for table, found in response["counts"].items():
+                instrument.count(f"{table} found", found)
+            click.echo(response["text"])
+            _more(response["truncated"], limit, offset)
+            return
+    with Store(db) as store:
+        with instrument.stage("query"):
+            result = lookup(store, domain, ip, port, service, cve, limit, offset)
+        for table in TABLES:
+            instrument.count(f"{table} found", len(result[table]))
+        with instrument.stage("render", format=fmt):
+            text = RENDERERS[fmt](result)
+    click.echo(text)
+    _more(result["truncated"], limit, offset)
+
+
+def _more(truncated, limit, offset):
+    if truncated:
+        click.echo(f"More {' and '.join(truncated)} than shown; next page with --offset {offset + limit}"
+                   " (or --limit 0 for all).", err=True)
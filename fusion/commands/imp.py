@@ -0,0 +1,90 @@
+"""``fusion import`` – load nmap XML scans and SpiderFoot exports into the store."""
+import os
+
+import rich_click as click
+
+from fusion import instrument
+from fusion.cves import CveIndex
+from fusion.incremental import recorrelate
+from fusion.nmap_xml import iter_services
+from fusion.spiderfoot import CHUNK_SIZE, iter_chunks, iter_findings
+from fusion.store import DEFAULT_PATH, Store
+
+NMAP_EXTENSIONS = (".xml",)
+SPIDERFOOT_EXTENSIONS = (".json", ".ndjson", ".jsonl", ".csv")
+
+
+def import_file(store, table, path, generation, chunk_size=CHUNK_SIZE, target=None, records=None, cves=None):
+    """Upsert one file into ``store``; returns ``(count, changed_ids, removed)``.
+
+    ``records`` may be given when the caller has already parsed ``path``.
+    With a :class:`~fusion.cves.CveIndex`, service chunks are enriched with
+    its CVEs before they are written.
+    """
+    origin = os.path.abspath(path)
+    if table == "services":
+        upsert = store.upsert_services
+        records = iter_services(path) if records is None else records
+    else:
+        upsert = store.upsert_findings
+        records = iter_findings(path, target) if records is None else records
+    count, changed = 0, []
+    for chunk in instrument.timed_iter(f"parse {table}", iter_chunks(records, chunk_size)):
+        if cves is not None and table == "services":
+            with instrument.stage("cve enrich"):
+                cves.enrich(chunk)
+        with instrument.stage(f"store {table}"):
+            changed += upsert(chunk, origin, generation)
+            store.commit()
+        count += len(chunk)
+    with instrument.stage(f"retract {table}"):
+        removed = store.retract(table, origin, generation)
+    instrument.count(f"{table} read", count)
+    instrument.count(f"{table} changed", len(changed))
+    return count, changed, removed
+
+
+@click.command()
+@click.argument("files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", default=CHUNK_SIZE, show_default=True,
+              help="Records written per transaction.")
+@click.option("--target", default=None, help="Scan target domain (CSV exports do not record it).")
+@click.option("--workers", default=1, show_default=True,
+              help="Correlation processes (at most the CPUs available); work is sharded by IP prefix.")
+@click.option("--cves", "cve_path", default=None, envvar="FUSION_CVES",
+              type=click.Path(exists=True, dir_okay=False),
+              help="CVE index (from `fusion cves`) used to enrich nmap services.")
+@click.option("--db", default=DEFAULT_PATH, envvar="FUSION_DB", show_default=True, help="Store path.")
+def cli(files, chunk_size, target, workers, cve_path, db):
+    """Import nmap XML (-oX) files and SpiderFoot JSON/CSV exports.
+
+    Records are matched against the store by content hash. Only new or
+    changed records are re-correlated, and records that disappeared from a
+    re-imported file are retracted together with their correlations.
+    """
+    sources = []
+    for path in files:
+        ext = os.path.splitext(path)[1].lower()
+        if ext in NMAP_EXTENSIONS:
+            sources.append(("services", path))
+        elif ext in SPIDERFOOT_EXTENSIONS:
+            sources.append(("findings", path))
+        else:
+            raise click.BadParameter(f"unsupported file type: {path}", param_hint="FILES")
+    # Scans before OSINT, like the pipeline always has
+    sources.sort(key=lambda source: source[0] != "services")
+
+    cves = CveIndex(cve_path) if cve_path else None
+    with Store(db) as store:
+        generation = store.begin_import()
+        changed = {"findings": [], "services": []}
+        for table, path in sources:
+            count, ids, removed = import_file(store, table, path, generation, chunk_size, target, cves=cves)
+            changed[table] += ids
+            click.echo(f"{path}: {count} {table}, {len(ids)} new or changed, {removed} removed")
+
+        correlations = recorrelate(store, changed["findings"], changed["services"], workers=workers)
+        counts = store.counts()
+
+    click.echo(f"Re-correlated {len(changed['findings'])} findings and {len(changed['services'])} "
+               f"services: {correlations} correlations written, {counts['correlations']} stored")
@@ -0,0 +1,154 @@
+"""``fusion scan`` – chunked nmap sweep with streaming import and correlation."""
+import asyncio
+import os
+
+import rich_click as click
+
+from fusion import instrument, schedule
+from fusion.commands.imp import import_file
+from fusion.cves import CveIndex
+from fusion.incremental import recorrelate
+from fusion.nmap_xml import iter_services
+from fusion.scancache import MAX_ENTRIES, ScanCache, normalize_args, parse_duration, scanned_addresses
+from fusion.scanner import NMAP, SPIDERFOOT, chunk_name, run_spiderfoot, split_targets, sweep
+from fusion.store import DEFAULT_PATH, Store
+
+OSINT_USE_CASES = ("all", "footprint", "investigate", "passive")
+
+
+def chunk_origin(output_dir, chunk):
+    """Store origin of ``chunk``'s services: the path of its nmap XML, as :func:`import_file` records it."""
+    return os.path.abspath(os.path.join(output_dir, chunk.name + ".xml"))
+
+
+@click.command()
+@click.argument("targets", nargs=-1)
+@click.option("--nmap", "nmap_args", default="-sV", show_default=True, help="Arguments passed to nmap.")
+@click.option("--osint", type=click.Choice(OSINT_USE_CASES), default=None,
+              help="Also run a SpiderFoot scan with this use case.")
+@click.option("--from-osint", is_flag=True,
+              help="Scan only what stored OSINT findings point at, highest risk first; "
+                   "TARGETS then limit the scope.")
+@click.option("--domain", default=None, help="With --from-osint, only use findings for this domain.")
+@click.option("--max-range-hosts", default=256, show_default=True,
+              help="With --from-osint, skip IP Range findings larger than this.")
+@click.option("--chunk-hosts", default=256, show_default=True, help="Addresses per nmap process.")
+@click.option("--concurrency", default=4, show_default=True, help="nmap processes running at once.")
+@click.option("--retries", default=2, show_default=True, help="Retries per failed chunk.")
+@click.option("--output-dir", default=None, help="Where chunk XML and progress are kept "
+              "(default: scans/<first target>). Re-running with the same directory resumes.")
+@click.option("--fresh", is_flag=True,
+              help="Ignore recorded progress and cached results; rescan every chunk and host.")
+@click.option("--max-age", default="6h", show_default=True,
+              help="Reuse cached results of hosts scanned with the same arguments within this "
+                   "age (e.g. 90s, 30m, 6h, 2d); 0 disables the cache.")
+@click.option("--cache-size", default=MAX_ENTRIES, show_default=True, help="Cached hosts kept at most.")
+@click.option("--nmap-bin", default=NMAP, envvar="FUSION_NMAP", show_default=True)
+@click.option("--spiderfoot-bin", default=SPIDERFOOT, envvar="FUSION_SPIDERFOOT", show_default=True)
+@click.option("--cves", "cve_path", default=None, envvar="FUSION_CVES",
+              type=click.Path(exists=True, dir_okay=False),
+              help="CVE index (from `fusion cves`) used to enrich scanned services.")
+@click.option("--db", default=DEFAULT_PATH, envvar="FUSION_DB", show_default=True, help="Store path.")
+def cli(targets, nmap_args, osint, from_osint, domain, max_range_hosts, chunk_hosts, concurrency,
+        retries, output_dir, fresh, max_age, cache_size, nmap_bin, spiderfoot_bin, cve_path, db):
+    """Scan TARGETS (CIDRs or addresses) in parallel chunks.
+
+    Each chunk is imported and correlated as soon as its nmap finishes.
+    """
+    if not targets and not from_osint:
+        raise click.UsageError("give TARGETS or --from-osint")
+    try:
+        max_age = parse_duration(max_age)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--max-age")
+    try:
+        if from_osint:
+            with Store(db) as store:
+                findings = store.findings_by_domain(domain) if domain else store.findings("1")
+            targets_plan = schedule.plan(findings, max_range_hosts, scope=targets or None)
+            chunks = schedule.chunks(targets_plan, chunk_hosts)
+            click.echo(f"Scheduled {len(targets_plan)} targets from {len(findings)} OSINT findings "
+                       f"in {len(chunks)} chunks")
+        else:
+            chunks = split_targets(targets, chunk_hosts)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="TARGETS")
+    label = targets[0] if targets else f"osint-{domain or 'all'}"
+    output_dir = output_dir or os.path.join("scans", chunk_name(label))
+    if fresh:
+        # Results are still cached for later runs
+        max_age = 0
+        progress_path = os.path.join(output_dir, "progress.json")
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
+    cves = CveIndex(cve_path) if cve_path else None
+    # on_chunk runs on the sweep's ingest thread, never alongside the writes here
+    with Store(db, check_same_thread=False) as store:
+        generation = store.begin_import()
+        totals = {"services": 0, "correlations": 0}
+
+        # Hosts with fresh cached results are fed to correlation without nmap,
+        # stored under the origin of the chunk they belong to as if scanned
+        cache = ScanCache(store, max_age, cache_size)
+        to_scan, changed = [], []
+        for chunk in chunks:
+            records, remaining = cache.split(chunk, nmap_args)
+            if records:
+                if cves is not None:
+                    cves.enrich(records)
+                changed += store.upsert_services(records, chunk_origin(output_dir, chunk), generation)
+                totals["services"] += len(records)
+            if remaining is None:
+                store.retract("services", chunk_origin(output_dir, chunk), generation)
+            else:
+                to_scan.append(remaining)
+        if changed:
+            totals["correlations"] += recorrelate(store, [], changed)
+        store.commit()
+        chunks = to_scan
+
+        def on_chunk(chunk, xml_path):
+            with instrument.stage("parse nmap xml", chunk=chunk.key):
+                records = list(iter_services(xml_path))
+            with instrument.stage("scan cache"):
+                cache.put(normalize_args(nmap_args, chunk.ports), scanned_addresses(chunk), records)
+            count, changed, _ = import_file(store, "services", xml_path, generation, records=records,
+                                          cves=cves)
+            correlations = recorrelate(store, [], changed)
+            store.commit()
+            totals["services"] += count
+            totals["correlations"] += correlations
+            click.echo(f"{chunk.key}: {count} services, {correlations} correlations")
+
+        async def run():
+            jobs = [sweep(chunks, nmap_args, output_dir, on_chunk, concurrency, retries, nmap=nmap_bin)]
+            if osint:
+                os.makedirs(output_dir, exist_ok=True)
+                jobs.append(run_spiderfoot(",".join(targets or [domain or ""]), osint,
+                                           os.path.join(output_dir, "spiderfoot.json"), spiderfoot_bin))
+            return await asyncio.gather(*jobs, return_exceptions=True)
+
+        results = asyncio.run(run())
+        sweep_result = results[0]
+        if isinstance(sweep_result, BaseException):
+            raise sweep_result
+        done, failed = sweep_result
+
+        if osint:
+            if isinstance(results[1], BaseException):
+                click.echo(f"OSINT scan failed: {results[1]}", err=True)
+            else:
+                _, changed, _ = import_file(store, "findings", results[1], generation)
+                correlations = recorrelate(store, changed, [])
+                totals["correlations"] += correlations
+                click.echo(f"OSINT: {len(changed)} new or changed findings, {correlations} correlations")
+
+    skipped = len(chunks) - len(done) - len(failed)
+    click.echo(f"Scanned {len(done)}/{len(chunks)} chunks ({skipped} already done), "
+               f"{totals['services']} services, {totals['correlations']} correlations")
+    click.echo(cache.summary())
+    for chunk, error in failed:
+        click.echo(f"failed: {error}", err=True)
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,40 @@
+"""``fusion serve`` – keep the store warm for repeated ``fusion find`` lookups."""
+import os
+import signal
+import sys
+
+import rich_click as click
+
+from fusion.commands.find import RENDERERS, lookup
+from fusion.daemon import DEFAULT_CACHE_SIZE, QueryServer, socket_path
+from fusion.store import DEFAULT_PATH
+
+
+@click.command()
+@click.option("--socket", "socket_file", envvar="FUSION_SOCKET",
+              help="Unix socket to listen on [default: the store path + .sock].")
+@click.option("--cache-size", default=DEFAULT_CACHE_SIZE, show_default=True,
+              help="Lookup results (with their rendered output) kept in the LRU cache.")
+@click.option("--db", default=DEFAULT_PATH, envvar="FUSION_DB", show_default=True, help="Store path.")
+def cli(socket_file, cache_size, db):
+    """Answer `fusion find` lookups from a long-lived process.
+
+    The store stays open with its indexes built and recent results cached,
+    so each `fusion find` against the same store only sends its query over
+    the socket. Imports into the store invalidate the cache.
+    """
+    if not os.path.exists(db):
+        raise click.UsageError(f"store not found: {db} (run `fusion import` first)")
+    try:
+        server = QueryServer(db, lookup, RENDERERS, socket_file or socket_path(db), cache_size)
+    except OSError as exc:
+        raise click.UsageError(str(exc))
+    click.echo(f"Serving {db} on {server.socket_file} (Ctrl+C to stop)")
+    # Remove the socket on `kill` too, not only on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,191 @@
+"""Index-based correlation of SpiderFoot findings against nmap services.
+
+The scoring rules are the ones from ``script.py`` plus IP range membership
+for "IP Range" findings, with technology matched on normalized product and
+version (:mod:`fusion.versions`) rather than by substring. Instead of
+scoring every OSINT x nmap pair, the scan records are indexed once and each
+finding is only scored against the rows that can possibly clear the
+threshold.
+"""
+from bisect import bisect_left, bisect_right
+
+from fusion.ranges import ip_int, parse_cidr
+from fusion.versions import ProductIndex, technology_match
+
+RISK_WEIGHTS = {"Low": 1, "Medium": 2, "High": 3}
+
+IP_MATCH_WEIGHT = 0.8
+RANGE_MATCH_WEIGHT = 0.7
+TECH_MATCH_WEIGHT = 0.9
+RISK_LEVEL_WEIGHT = 0.3
+SERVICE_CONTEXT_WEIGHT = 0.4
+SCORE_THRESHOLD = 0.5
+
+WEB_SERVICES = ("HTTP", "HTTPS")
+
+
+def finding_range(osint):
+    """``(first, last)`` address keys of an "IP Range" finding, else ``None``."""
+    if osint["type"] != "IP Range":
+        return None
+    return parse_cidr(osint["finding"])
+
+
+def score_pair(osint, scan):
+    """Score one OSINT finding against one nmap service.
+
+    Returns ``(score, reasons)``; the weights are added in rule order so the
+    floating point result is identical to the original nested loop.
+    """
+    correlation_score = 0
+    correlation_reasons = []
+
+    # IP correlation
+    if osint["value"] == scan["ip"]:
+        correlation_score += IP_MATCH_WEIGHT
+        correlation_reasons.append("Direct IP match")
+
+    # IP range correlation
+    network = finding_range(osint)
+    if network is not None:
+        key = ip_int(scan["ip"])
+        if key is not None and network[0] <= key <= network[1]:
+            correlation_score += RANGE_MATCH_WEIGHT
+            correlation_reasons.append("IP range match")
+
+    # Technology/Version correlation
+    if osint["type"] == "Technology" and technology_match(osint["finding"], scan):
+        correlation_score += TECH_MATCH_WEIGHT
+        correlation_reasons.append("Technology version match")
+
+    # Risk level correlation
+    if abs(RISK_WEIGHTS[osint["risk_level"]] - RISK_WEIGHTS[scan["risk_level"]]) <= 1:
+        correlation_score += RISK_LEVEL_WEIGHT
+        correlation_reasons.append("Similar risk levels")
+
+    # Service correlation
+    if osint["category"] == "Infrastructure" and scan["service"] in WEB_SERVICES:
+        correlation_score += SERVICE_CONTEXT_WEIGHT
+        correlation_reasons.append("Infrastructure service match")
+
+    return correlation_score, correlation_reasons
+
+
+def combined_risk(osint_risk, scan_risk):
+    weight = max(RISK_WEIGHTS[osint_risk], RISK_WEIGHTS[scan_risk])
+    return "High" if weight >= 3 else "Medium" if weight >= 2 else "Low"
+
+
+def make_correlation(osint, scan, correlation_score, correlation_reasons):
+    return {
+        "osint_finding": osint["finding"],
+        "osint_type": osint["type"],
+        "osint_risk": osint["risk_level"],
+        "nmap_target": f"{scan['ip']}:{scan['port']}",
+        "nmap_service": scan["service"],
+        "nmap_risk": scan["risk_level"],
+        "correlation_score": round(correlation_score, 2),
+        "correlation_reasons": correlation_reasons,
+        "combined_risk": combined_risk(osint["risk_level"], scan["risk_level"]),
+    }
+
+
+class ScanIndex:
+    """Hash indexes over nmap service records.
+
+    A pair can only score above the threshold through an IP match, an IP
+    range match, a technology match, or the infrastructure/web context rule
+    combined with similar risk levels (0.3 + 0.4). Each of those has its own
+    index:
+
+    * ``by_ip``       – ip string -> rows
+    * ``products``    – normalized product -> rows (:class:`ProductIndex`)
+    * ``web_by_risk`` – risk weight -> HTTP/HTTPS rows
+    * address keys sorted with their rows, built lazily for range lookups
+    """
+
+    def __init__(self, scans=()):
+        self.scans = []
+        self.by_ip = {}
+        self.products = ProductIndex()
+        self.web_by_risk = {}
+        # (sorted address keys, rows in the same order), reset whenever a row is added
+        self._by_key = None
+        for scan in scans:
+            self.add(scan)
+
+    def __len__(self):
+        return len(self.scans)
+
+    def add(self, scan):
+        row = len(self.scans)
+        self.scans.append(scan)
+        self.by_ip.setdefault(scan["ip"], []).append(row)
+        self.products.add(row, scan["service"], scan["version"], scan.get("banner", ""))
+        if scan["service"] in WEB_SERVICES:
+            self.web_by_risk.setdefault(RISK_WEIGHTS[scan["risk_level"]], []).append(row)
+        self._by_key = None
+        return row
+
+    def range_rows(self, first, last):
+        """Rows whose IP lies within ``first..last`` (two binary searches)."""
+        if self._by_key is None:
+            keyed = sorted((key, row) for row, key in enumerate(ip_int(scan["ip"]) for scan in self.scans)
+                           if key is not None)
+            self._by_key = ([key for key, _ in keyed], [row for _, row in keyed])
+        keys, rows = self._by_key
+        return sorted(rows[bisect_left(keys, first):bisect_right(keys, last)])
+
+    def technology_rows(self, finding):
+        """Rows running the product/version a Technology finding names."""
+        return self.products.lookup(finding)
+
+    def candidates(self, osint):
+        """Sorted, de-duplicated rows that may correlate with ``osint``."""
+        groups = []
+        rows = self.by_ip.get(osint["value"])
+        if rows:
+            groups.append(rows)
+        network = finding_range(osint)
+        if network is not None:
+            rows = self.range_rows(*network)
+            if rows:
+                groups.append(rows)
+        if osint["type"] == "Technology":
+            rows = self.technology_rows(osint["finding"])
+            if rows:
+                groups.append(rows)
+        if osint["category"] == "Infrastructure":
+            weight = RISK_WEIGHTS[osint["risk_level"]]
+            for near in (weight - 1, weight, weight + 1):
+                rows = self.web_by_risk.get(near)
+                if rows:
+                    groups.append(rows)
+        if not groups:
+            return ()
+        if len(groups) == 1:
+            return groups[0]
+        return sorted(set().union(*groups))
+
+    def pairs(self, osint):
+        """Yield ``(row, score, reasons)`` for every row above the threshold."""
+        return self.score_rows(osint, self.candidates(osint))
+
+    def score_rows(self, osint, rows):
+        """:meth:`pairs` over candidate ``rows`` already looked up."""
+        for row in rows:
+            correlation_score, correlation_reasons = score_pair(osint, self.scans[row])
+            if correlation_score > SCORE_THRESHOLD:
+                yield row, correlation_score, correlation_reasons
+
+    def correlate(self, osint_records):
+        """Yield correlation dicts in the same order as the nested loop."""
+        scans = self.scans
+        for osint in osint_records:
+            for row, correlation_score, correlation_reasons in self.pairs(osint):
+                yield make_correlation(osint, scans[row], correlation_score, correlation_reasons)
+
+
+def correlate(spiderfoot_data, nmap_data):
+    """Correlate OSINT findings with nmap services in O(N + M + matches)."""
+    return list(ScanIndex(nmap_data).correlate(spiderfoot_data))
@@ -0,0 +1,202 @@
+"""Offline CVE index built from NVD JSON feeds.
+
+The feeds (1.1 ``CVE_Items`` files or 2.0 ``vulnerabilities`` dumps, plain
+or gzipped) are reduced once to a SQLite file of CPE version ranges keyed
+by the same ``vendor:product`` keys :mod:`fusion.versions` produces. Opening
+the index memory-maps that file; the ranges of a product are loaded on
+first use and each distinct ``(product, version)`` is resolved once, so
+enriching an import is one batched query per chunk plus cached lookups.
+"""
+import gzip
+import json
+import os
+import sqlite3
+from bisect import bisect_right
+
+from fusion.correlate import RISK_WEIGHTS
+from fusion.nmap_xml import risk_level
+from fusion.versions import parse_version, scan_software, version_order
+
+DEFAULT_PATH = "cves.db"
+MMAP_SIZE = 1 << 30
+
+# Range bounds are compared as (version_order, flag) keys; a version v sits
+# at (v, 1), so an exclusive start is (v, 2) and an exclusive end (v, 1)
+UNBOUNDED_LOW = ((), 0)
+UNBOUNDED_HIGH = (((2,),), 0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cpe_ranges (
+    product TEXT, cve TEXT,
+    start TEXT, start_incl INTEGER,
+    end TEXT, end_incl INTEGER,
+    UNIQUE (product, cve, start, start_incl, end, end_incl)
+);
+CREATE TABLE IF NOT EXISTS feeds (
+    path TEXT PRIMARY KEY, mtime REAL, cves INTEGER
+);
+CREATE INDEX IF NOT EXISTS cpe_ranges_product ON cpe_ranges(product);
+"""
+
+# NVD vendor:product spellings -> the keys fusion.versions produces
+PRODUCT_ALIASES = {
+    "f5:nginx": "nginx:nginx",
+    "igor_sysoev:nginx": "nginx:nginx",
+    "mysql:mysql": "oracle:mysql",
+    "openssh:openssh": "openbsd:openssh",
+}
+
+
+def _open(path):
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+
+
+def _cpe_product(cpe):
+    """``cpe:2.3:a:openbsd:openssh:7.6:p1:...`` -> ``("openbsd:openssh", "7.6p1")``."""
+    parts = cpe.split(":")
+    if len(parts) < 6:
+        return None, None
+    key = f"{parts[3]}:{parts[4]}"
+    version = parts[5]
+    if len(parts) > 6 and parts[6] not in ("*", "-", ""):
+        version += parts[6]
+    return PRODUCT_ALIASES.get(key, key), version
+
+
+def _walk_nodes(nodes):
+    for node in nodes:
+        yield from node.get("cpe_match", ()) or node.get("cpeMatch", ())
+        yield from _walk_nodes(node.get("children", ()))
+
+
+def iter_feed(path):
+    """Yield ``(cve, product, start, start_incl, end, end_incl)`` for one feed file.
+
+    Empty ``start``/``end`` means unbounded; an exact CPE version becomes an
+    inclusive single-version range.
+    """
+    with _open(path) as fh:
+        feed = json.load(fh)
+    if "CVE_Items" in feed:
+        items = ((item["cve"]["CVE_data_meta"]["ID"], item.get("configurations", {}).get("nodes", ()))
+                 for item in feed["CVE_Items"])
+    else:
+        items = ((entry["cve"]["id"], [node for config in entry["cve"].get("configurations", ())
+                                      for node in config.get("nodes", ())])
+                 for entry in feed.get("vulnerabilities", ()))
+    for cve, nodes in items:
+        for match in _walk_nodes(nodes):
+            if not match.get("vulnerable", True):
+                continue
+            product, version = _cpe_product(match.get("cpe23Uri") or match.get("criteria", ""))
+            if product is None:
+                continue
+            start = match.get("versionStartIncluding") or match.get("versionStartExcluding") or ""
+            end = match.get("versionEndIncluding") or match.get("versionEndExcluding") or ""
+            if start or end:
+                yield (cve, product, start, int("versionStartIncluding" in match),
+                       end, int("versionEndIncluding" in match))
+            elif version in ("*", "-", ""):
+                yield cve, product, "", 1, "", 1
+            else:
+                yield cve, product, version, 1, version, 1
+
+
+def build(feeds, path=DEFAULT_PATH, batch=10000):
+    """(Re)build the index at ``path`` from NVD feed files; returns the range count."""
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.execute("DELETE FROM cpe_ranges")
+    db.execute("DELETE FROM feeds")
+    rows = []
+    for feed in feeds:
+        cves = set()
+        for cve, *values in iter_feed(feed):
+            cves.add(cve)
+            rows.append((values[0], cve, *values[1:]))
+            if len(rows) >= batch:
+                db.executemany("INSERT OR IGNORE INTO cpe_ranges VALUES (?, ?, ?, ?, ?, ?)", rows)
+                rows.clear()
+        db.execute("INSERT OR REPLACE INTO feeds VALUES (?, ?, ?)",
+                   (os.path.abspath(feed), os.path.getmtime(feed), len(cves)))
+    db.executemany("INSERT OR IGNORE INTO cpe_ranges VALUES (?, ?, ?, ?, ?, ?)", rows)
+    db.commit()
+    count = db.execute("SELECT COUNT(*) FROM cpe_ranges").fetchone()[0]
+    db.execute("VACUUM")
+    db.close()
+    return count
+
+
+class CveIndex:
+    """Read-only, memory-mapped view of an index written by :func:`build`."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CVE index not found: {path}")
+        self.path = path
+        self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.db.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        # product key -> ([low keys], [(low, high, cve)]) sorted by low key
+        self._ranges = {}
+        # (product key, version tuple) -> sorted CVE ids
+        self._hits = {}
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load(self, products):
+        missing = [product for product in products if product not in self._ranges]
+        loaded = {product: [] for product in missing}
+        for start in range(0, len(missing), 500):
+            part = missing[start:start + 500]
+            for product, cve, low, low_incl, high, high_incl in self.db.execute(
+                    f"SELECT product, cve, start, start_incl, end, end_incl FROM cpe_ranges"
+                    f" WHERE product IN ({','.join('?' * len(part))})", part):
+                low_key = (version_order(parse_version(low)), 1 if low_incl else 2) if low else UNBOUNDED_LOW
+                high_key = (version_order(parse_version(high)), 2 if high_incl else 1) if high else UNBOUNDED_HIGH
+                loaded[product].append((low_key, high_key, cve))
+        for product, ranges in loaded.items():
+            ranges.sort()
+            self._ranges[product] = ([low for low, _, _ in ranges], ranges)
+
+    def _resolve(self, product, version):
+        lows, ranges = self._ranges.get(product, ((), ()))
+        key = (version_order(version), 1)
+        # Only ranges starting at or below the version can contain it
+        return sorted({cve for _, high, cve in ranges[:bisect_right(lows, key)] if key < high})
+
+    def lookup_many(self, softwares):
+        """CVE lists for a batch of :class:`~fusion.versions.Software` (``None`` allowed)."""
+        wanted = {(software.key, software.version) for software in softwares
+                  if software is not None and software.version}
+        pending = [key for key in wanted if key not in self._hits]
+        if pending:
+            self._load({product for product, _ in pending})
+            for product, version in pending:
+                self._hits[product, version] = self._resolve(product, version)
+        return [self._hits[software.key, software.version] if software is not None and software.version else []
+                for software in softwares]
+
+    def lookup(self, software):
+        return self.lookup_many([software])[0]
+
+    def enrich(self, records):
+        """Add index CVEs to a chunk of ``nmap_data`` records in place; returns the records.
+
+        Existing entries are kept, and ``risk_level`` is raised (never
+        lowered) to what the enlarged CVE list implies.
+        """
+        for record, cves in zip(records, self.lookup_many([scan_software(record) for record in records])):
+            new = [cve for cve in cves if cve not in record["vulnerabilities"]]
+            if new:
+                record["vulnerabilities"] = record["vulnerabilities"] + new
+                implied = risk_level(record["vulnerabilities"])
+                if RISK_WEIGHTS[implied] > RISK_WEIGHTS[record["risk_level"]]:
+                    record["risk_level"] = implied
+        return records
@@ -0,0 +1,203 @@
+"""Long-lived ``fusion find`` query server on a Unix socket.
+
+``fusion serve`` keeps one store connection open with its IP Range index
+built, and an LRU cache of recent lookups holding each result and every
+format it has been rendered in, so a repeated ``find`` is answered
+without touching SQLite or re-walking the result tree. The protocol is
+one JSON object per line each way:
+
+    {"query": {"ip": "10.0.0.4"}, "format": "tree"}  ->  {"text": "..."}
+    {"op": "stats"}                                  ->  {"hits": ..., "misses": ..., ...}
+
+A client may send any number of requests over one connection. Other
+processes importing into the store bump SQLite's ``data_version``; the
+next request then drops the cache and the indexes before answering.
+``fusion find`` uses :func:`query` whenever the store's socket
+(:func:`socket_path`) exists and falls back to querying the store itself,
+also when the daemon does not answer within :data:`QUERY_TIMEOUT`.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+
+from fusion.store import Store
+
+DEFAULT_CACHE_SIZE = 1024
+# Seconds a client waits on the daemon (per connect, send or read) before
+# querying the store itself; a hung daemon must not hang ``fusion find``
+QUERY_TIMEOUT = 5.0
+QUERY_FIELDS = ("domain", "ip", "port", "service", "cve", "limit", "offset")
+
+
+def socket_path(db):
+    """Socket a daemon serving the store at ``db`` listens on."""
+    return os.path.abspath(db) + ".sock"
+
+
+def query_key(params):
+    """Cache key of a lookup; services and CVEs match case-insensitively in the store."""
+    key = []
+    for field in QUERY_FIELDS:
+        value = params.get(field)
+        if isinstance(value, str) and field in ("service", "cve"):
+            value = value.lower()
+        key.append(value)
+    return tuple(key)
+
+
+class LookupCache:
+    """Least recently used lookup results, each with its rendered formats."""
+
+    def __init__(self, size=DEFAULT_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()   # query key -> (result, {format: text})
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, result):
+        entry = self.entries[key] = (result, {})
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+        self.invalidations += 1
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """Answers JSON-line requests until the client closes the connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.answer(request)
+            except (TypeError, ValueError) as exc:
+                response = {"error": str(exc)}
+            try:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server sharing one store, its indexes and the cache.
+
+    ``lookup(store, domain, ip, port, service, cve, limit, offset)`` and ``renderers``
+    (format -> function of the result) are those of ``fusion find``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, db, lookup, renderers, path=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.socket_file = path or socket_path(db)
+        if os.path.exists(self.socket_file):
+            if ping(self.socket_file):
+                raise OSError(f"a daemon is already serving {self.socket_file}")
+            os.unlink(self.socket_file)    # left behind by a daemon that was killed
+        super().__init__(self.socket_file, QueryHandler)
+        self.store = Store(db, check_same_thread=False)
+        self.lookup = lookup
+        self.renderers = renderers
+        self.cache = LookupCache(cache_size)
+        self.lock = threading.Lock()
+        self.version = None
+        with self.lock:
+            self._check_version()
+
+    def _check_version(self):
+        """Drop the cache and indexes when another connection has committed to the store."""
+        version = self.store.db.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            if self.version is not None:
+                self.cache.clear()
+            self.store.reset_indexes()
+            self.store.range_index()
+            self.version = version
+
+    def answer(self, request):
+        if request.get("op") == "stats":
+            with self.lock:
+                return {"hits": self.cache.hits, "misses": self.cache.misses, "entries": len(self.cache.entries),
+                        "invalidations": self.cache.invalidations, "data_version": self.version}
+        if request.get("op") == "ping":
+            return {"pong": True}
+        params = request.get("query")
+        if not isinstance(params, dict):
+            raise ValueError('expected {"query": {...}, "format": ...} or {"op": "stats"}')
+        fmt = request.get("format", "table")
+        if fmt not in self.renderers:
+            raise ValueError(f"unknown format: {fmt}")
+        key = query_key(params)
+        with self.lock:
+            self._check_version()
+            entry = self.cache.get(key)
+            if entry is None:
+                entry = self.cache.put(key, self.lookup(self.store, **{field: params.get(field)
+                                                                  for field in QUERY_FIELDS}))
+            result, rendered = entry
+            if fmt not in rendered:
+                rendered[fmt] = self.renderers[fmt](result)
+            return {"text": rendered[fmt], "truncated": result["truncated"],
+                    "counts": {table: len(result[table]) for table in ("findings", "services", "correlations")}}
+
+    def server_close(self):
+        super().server_close()
+        self.store.close()
+        try:
+            os.unlink(self.socket_file)
+        except FileNotFoundError:
+            pass
+
+
+def request(path, body, timeout=QUERY_TIMEOUT):
+    """Send one request to the daemon at ``path``.
+
+    ``None`` when none is listening there or it does not answer within
+    ``timeout`` seconds.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(path)
+            client.sendall(json.dumps(body).encode() + b"\n")
+            with client.makefile("rb") as reader:
+                line = reader.readline()
+    except OSError:
+        # Gone, refusing, hung (TimeoutError) or closed mid-request
+        return None
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def ping(path):
+    return request(path, {"op": "ping"}, timeout=1) is not None
+
+
+def query(path, fmt="table", timeout=QUERY_TIMEOUT, **params):
+    """Rendered ``find`` output from the daemon at ``path``, or ``None`` when it is not running.
+
+    ``None`` as well when it does not answer within ``timeout`` seconds.
+    Raises :class:`ValueError` with the daemon's message when it rejects the query.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    response = request(path, {"query": params, "format": fmt}, timeout)
+    if response is None:
+        return None
+    if "error" in response:
+        raise ValueError(response["error"])
+    return response
@@ -0,0 +1,182 @@
+"""Streaming graph export of the store.
+
+Findings, services and CVEs become nodes; correlations and service CVEs
+become relationships. Every table is read with ``fetchmany`` and written
+chunk by chunk, so memory use depends on the chunk size, not on the number
+of edges. CSV output follows the header conventions of ``neo4j-admin
+database import`` (``:ID``/``:START_ID``/``:END_ID`` with ID spaces,
+``:LABEL``, ``:TYPE`` and ``;`` separated arrays); Parquet and Arrow output
+carry the same columns with plain names for analytics tools.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from typing import NamedTuple
+
+CHUNK_SIZE = 50000
+WRITE_BUFFER = 1 << 20
+ARRAY_DELIMITER = ";"
+FORMATS = ("csv", "parquet", "arrow")
+
+
+class Table(NamedTuple):
+    """One exported file: its rows and ``(column, neo4j header, arrow type)`` fields."""
+
+    name: str
+    kind: str          # "nodes" or "relationships"
+    source: str        # FROM ... ORDER BY clause
+    fields: tuple
+    constant: tuple    # (neo4j header, value) appended to every CSV row
+
+
+TABLES = (
+    Table("findings", "nodes", "FROM findings ORDER BY id",
+          (("id", "findingId:ID(Finding)", "int64"), ("target", "target", "string"),
+           ("type", "type", "string"), ("finding", "finding", "string"), ("value", "value", "string"),
+           ("source", "source", "string"), ("risk_level", "risk_level", "string"),
+           ("category", "category", "string")),
+          (":LABEL", "Finding")),
+    Table("services", "nodes", "FROM services ORDER BY id",
+          (("id", "serviceId:ID(Service)", "int64"), ("ip", "ip", "string"), ("port", "port:int", "int32"),
+           ("service", "service", "string"), ("version", "version", "string"), ("state", "state", "string"),
+           ("banner", "banner", "string"), ("risk_level", "risk_level", "string")),
+          (":LABEL", "Service")),
+    Table("cves", "nodes", "FROM service_cves GROUP BY cve ORDER BY cve",
+          (("cve", "cveId:ID(CVE)", "string"),),
+          (":LABEL", "CVE")),
+    Table("correlations", "relationships", "FROM correlations ORDER BY finding_id, service_id",
+          (("finding_id", ":START_ID(Finding)", "int64"), ("service_id", ":END_ID(Service)", "int64"),
+           ("score", "score:float", "float64"), ("reasons", "reasons:string[]", "list<string>"),
+           ("combined_risk", "combined_risk", "string")),
+          (":TYPE", "CORRELATES_WITH")),
+    Table("vulnerabilities", "relationships", "FROM service_cves ORDER BY service_id, cve",
+          (("service_id", ":START_ID(Service)", "int64"), ("cve", ":END_ID(CVE)", "string")),
+          (":TYPE", "HAS_CVE")),
+)
+
+
+def select(table, fmt):
+    """The query for ``table``; for CSV the constant label column is added by SQLite."""
+    columns = [field[0] for field in table.fields]
+    if fmt == "csv":
+        columns.append(f"'{table.constant[1]}'")
+    return f"SELECT {', '.join(columns)} {table.source}"
+
+
+def export_path(prefix, table, fmt, compress=False):
+    """``neo_acme.csv`` + ``services`` -> ``neo_acme_services.csv`` (``.gz`` when compressed)."""
+    for ext in (".csv.gz", ".csv", ".parquet", ".arrow"):
+        if prefix.endswith(ext):
+            prefix = prefix[:-len(ext)]
+            break
+    ext = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}[fmt]
+    return f"{prefix}_{table.name}{ext}" + (".gz" if compress and fmt == "csv" else "")
+
+
+class _Arrays(dict):
+    def __missing__(self, text):
+        value = self[text] = json.loads(text)
+        return value
+
+
+class _CsvArrays(dict):
+    def __missing__(self, text):
+        value = self[text] = ARRAY_DELIMITER.join(json.loads(text))
+        return value
+
+
+def iter_chunks(store, table, fmt="csv", chunk_size=CHUNK_SIZE):
+    """Yield lists of row tuples for ``table`` as :func:`select` returns them.
+
+    JSON array columns are decoded to lists, or to delimited strings for
+    CSV. There are only a few distinct reason lists, so each is decoded once.
+    """
+    cursor = store.db.execute(select(table, fmt))
+    cursor.row_factory = None
+    arrays = [i for i, field in enumerate(table.fields) if field[2].startswith("list")]
+    decoded = _CsvArrays() if fmt == "csv" else _Arrays()
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        for i in arrays:
+            rows = [(*row[:i], decoded[row[i]], *row[i + 1:]) for row in rows]
+        yield rows
+
+
+def _open_text(path, compress):
+    if compress:
+        return io.TextIOWrapper(gzip.open(path, "wb", compresslevel=6), encoding="utf-8",
+                                newline="", write_through=False)
+    return open(path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER)
+
+
+def write_csv(chunks, table, path, compress=False):
+    """Write one neo4j-admin CSV file; returns the row count."""
+    count = 0
+    with _open_text(path, compress) as fh:
+        writer = csv.writer(fh)
+        writer.writerow([field[1] for field in table.fields] + [table.constant[0]])
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _arrow_schema(pa, table):
+    types = {"int64": pa.int64(), "int32": pa.int32(), "float64": pa.float64(),
+             "string": pa.string(), "list<string>": pa.list_(pa.string())}
+    return pa.schema([(field[0], types[field[2]]) for field in table.fields])
+
+
+def write_arrow(chunks, table, path, fmt):
+    """Write one Parquet or Arrow IPC file batch by batch; returns the row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"{fmt} export needs pyarrow (pip install pyarrow)") from None
+    schema = _arrow_schema(pa, table)
+    sink = pa.OSFile(path, "wb")
+    writer = pq.ParquetWriter(sink, schema, compression="zstd") if fmt == "parquet" else pa.ipc.new_file(sink, schema)
+    count = 0
+    try:
+        for rows in chunks:
+            columns = zip(*rows)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            count += len(rows)
+    finally:
+        writer.close()
+        sink.close()
+    return count
+
+
+def export(store, prefix, fmt="csv", compress=False, chunk_size=CHUNK_SIZE, tables=TABLES):
+    """Export every table; yields ``(table, path, rows)`` as each file is finished.
+
+    The directory of ``prefix`` is created when missing.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format: {fmt}")
+    if os.path.dirname(prefix):
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    for table in tables:
+        path = export_path(prefix, table, fmt, compress)
+        chunks = iter_chunks(store, table, fmt, chunk_size)
+        if fmt == "csv":
+            count = write_csv(chunks, table, path, compress)
+        else:
+            count = write_arrow(chunks, table, path, fmt)
+        yield table, path, count
+
+
+def import_command(files, database="neo4j"):
+    """The ``neo4j-admin`` invocation loading CSV files written by :func:`export`."""
+    parts = ["neo4j-admin database import full", database, "--overwrite-destination",
+             f"--array-delimiter='{ARRAY_DELIMITER}'"]
+    for table, path in files:
+        parts.append(f"--{table.kind}={path}")
+    return " \\\n    ".join(parts)
@@ -0,0 +1,322 @@
+"""Correlation graph model for rendering: labels, aggregation and layout.
+
+Nodes and edges have the shape ``chart_script.py`` always used
+(``{"id", "label", "type", "risk", ...}`` and ``{"source", "target",
+"weight", "type"}``). Beyond a node budget the graph is collapsed to /24
+(or /64) networks or to services, layouts come from a grid-approximated
+force simulation in NumPy, and positions are cached in a JSON file so
+re-renders of a mostly unchanged graph skip most of the layout work.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from fusion.correlate import RISK_WEIGHTS
+from fusion.parallel import ip_prefix
+
+# Correlation reasons -> short edge type names
+REASON_NAMES = {
+    "Direct IP match": "Direct IP",
+    "IP range match": "Network Range",
+    "Technology version match": "Technology",
+    "Infrastructure service match": "Infrastructure",
+    "Similar risk levels": "Similar Risk",
+}
+
+TARGET_RE = re.compile(r"^(?P<ip>[\d.]+|[0-9a-fA-F:]+):(?P<port>\d+)\s*\((?P<service>[^)]*)\)$")
+
+
+def label(text, width=15):
+    """Short display label for a node.
+
+    ``192.168.1.10:80 (HTTP)`` -> ``10:80 HTTP``, ``admin.example.com`` ->
+    ``admin.ex.com``, ``DNS Record (192.168.1.10)`` -> ``DNS Record``;
+    anything else that is still too long is cut to ``width``.
+    """
+    if len(text) <= width:
+        return text
+    target = TARGET_RE.match(text)
+    if target:
+        host = target.group("ip").replace(":", ".").rsplit(".", 1)[-1]
+        return f"{host}:{target.group('port')} {target.group('service')}"[:width]
+    if "(" in text and not text.startswith("("):
+        return label(text[:text.index("(")].strip(), width)
+    if "." in text and " " not in text:
+        local, at, domain = text.rpartition("@")
+        parts = domain.split(".")
+        # Shorten the middle labels of a domain, keep host and TLD
+        if len(parts) > 2:
+            parts = [parts[0]] + [part[:2] for part in parts[1:-1]] + [parts[-1]]
+        elif len(parts) == 2:
+            parts = [parts[0][:2], parts[1]]
+        short = f"{local}{at}{'.'.join(parts)}"
+        if len(short) <= width:
+            return short
+    return text[:width]
+
+
+def edge_type(reasons):
+    names = [REASON_NAMES.get(reason, reason) for reason in reasons]
+    strong = [name for name in names if name != "Similar Risk"]
+    return " + ".join(strong or names)
+
+
+FINDING_COLUMNS = "f.id, f.type, f.finding, f.value, f.risk_level, f.category"
+SERVICE_COLUMNS = "s.id, s.ip, s.port, s.service, s.risk_level"
+
+
+def _finding_node(finding_id, kind, finding, value, risk, category):
+    return {"id": f"f{finding_id}", "label": finding, "type": "spiderfoot", "risk": risk,
+            "category": kind, "group": category, "value": value}
+
+
+def _service_node(service_id, ip, port, service, risk):
+    return {"id": f"s{service_id}", "label": f"{ip}:{port} ({service})", "type": "nmap",
+            "risk": risk, "service": service, "ip": ip}
+
+
+def graph_from_store(store, budget=None, by="prefix"):
+    """Nodes and edges of every stored correlation.
+
+    With a ``budget`` the graph comes back as :func:`aggregate` would
+    collapse it, but without holding the correlations: only the nodes are
+    read in full, then correlation rows are streamed ``fetchmany`` at a
+    time into the aggregate edges.
+    """
+    if budget is not None:
+        nodes = store.db.execute("SELECT (SELECT COUNT(DISTINCT finding_id) FROM correlations)"
+                                 " + (SELECT COUNT(DISTINCT service_id) FROM correlations)").fetchone()[0]
+        if nodes > budget:
+            return _aggregate_store(store, budget, by)
+    nodes, edges = {}, []
+    rows = store.db.execute(
+        f"SELECT c.score, c.reasons, {FINDING_COLUMNS}, {SERVICE_COLUMNS}"
+        " FROM correlations c JOIN findings f ON f.id = c.finding_id"
+        " JOIN services s ON s.id = c.service_id ORDER BY c.finding_id, c.service_id"
+    )
+    for score, reasons, *row in rows:
+        source, target = f"f{row[0]}", f"s{row[6]}"
+        if source not in nodes:
+            nodes[source] = _finding_node(*row[:6])
+        if target not in nodes:
+            nodes[target] = _service_node(*row[6:])
+        edges.append({"source": source, "target": target, "weight": score,
+                      "type": edge_type(json.loads(reasons))})
+    return {"nodes": list(nodes.values()), "edges": edges}
+
+
+def _aggregate_store(store, budget, by, chunk_size=10000):
+    # Nodes in the order graph_from_store meets them: findings by id, each
+    # followed by the services first correlated with it
+    services = {}
+    for first_finding, *row in store.db.execute(
+            f"SELECT first.finding_id, {SERVICE_COLUMNS} FROM (SELECT service_id, MIN(finding_id) AS finding_id"
+            " FROM correlations GROUP BY service_id) first JOIN services s ON s.id = first.service_id"
+            " ORDER BY first.finding_id, s.id"):
+        services.setdefault(first_finding, []).append(_service_node(*row))
+    nodes = []
+    for row in store.db.execute(f"SELECT {FINDING_COLUMNS} FROM findings f"
+                                " WHERE f.id IN (SELECT finding_id FROM correlations) ORDER BY f.id"):
+        nodes.append(_finding_node(*row))
+        nodes += services.pop(row[0], [])
+    groups, owner = group_nodes(nodes, budget, by)
+    del nodes, services
+
+    def rows():
+        cursor = store.db.execute("SELECT finding_id, service_id, score, reasons FROM correlations"
+                                  " ORDER BY finding_id, service_id")
+        while chunk := cursor.fetchmany(chunk_size):
+            for finding_id, service_id, score, reasons in chunk:
+                yield f"f{finding_id}", f"s{service_id}", score, reasons
+
+    return {"nodes": groups, "edges": merge_edges(rows(), owner, lambda reasons: edge_type(json.loads(reasons)))}
+
+
+def group_key(node, by):
+    """Aggregate node id for ``node`` when grouping ``by`` "prefix" or "service"."""
+    if node["type"] == "nmap":
+        if by == "service":
+            return f"svc:{node.get('service', 'unknown')}"
+        prefix = ip_prefix(node.get("ip") or node["label"].split(" ")[0].rpartition(":")[0])
+        if prefix is None:
+            return "net:other"
+        return f"net:{prefix}.0/24" if ":" not in prefix else f"net:{prefix}::/64"
+    prefix = ip_prefix(node.get("value", "")) if by == "prefix" else None
+    if prefix is not None:
+        return f"osint:{node.get('category', 'Finding')} {prefix}.0/24" if ":" not in prefix \
+            else f"osint:{node.get('category', 'Finding')} {prefix}::/64"
+    return f"osint:{node.get('category', 'Finding')}"
+
+
+def aggregate(data, budget, by="prefix"):
+    """Collapse ``data`` to at most ``budget`` nodes; unchanged when it already fits.
+
+    Members are grouped with :func:`group_key`; if there are still too many
+    groups, the smallest ones on each side are folded into one "other" node.
+    Aggregate nodes carry ``count`` and the highest member risk; aggregate
+    edges the highest weight and their member ``count``.
+    """
+    if len(data["nodes"]) <= budget:
+        return data
+    groups, owner = group_nodes(data["nodes"], budget, by)
+    edges = ((edge["source"], edge["target"], edge["weight"], edge["type"]) for edge in data["edges"])
+    return {"nodes": groups, "edges": merge_edges(edges, owner)}
+
+
+def group_nodes(nodes, budget, by="prefix"):
+    """``(aggregate nodes, {member id: aggregate id})`` of :func:`aggregate`."""
+    groups = {}
+    for node in nodes:
+        key = group_key(node, by)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"id": key, "label": key.split(":", 1)[1], "type": node["type"],
+                                   "risk": node["risk"], "count": 0, "members": []}
+            group["category" if node["type"] == "spiderfoot" else "service"] = group["label"]
+        group["count"] += 1
+        group["members"].append(node["id"])
+        if RISK_WEIGHTS[node["risk"]] > RISK_WEIGHTS[group["risk"]]:
+            group["risk"] = node["risk"]
+
+    if len(groups) > budget:
+        keep = set()
+        for kind in ("spiderfoot", "nmap"):
+            side = sorted((g for g in groups.values() if g["type"] == kind), key=lambda g: -g["count"])
+            keep.update(g["id"] for g in side[:max(1, budget // 2 - 1)])
+        for key in [key for key in groups if key not in keep]:
+            group = groups.pop(key)
+            other_key = "osint:other" if group["type"] == "spiderfoot" else "net:other"
+            other = groups.setdefault(other_key, {"id": other_key, "label": "other", "type": group["type"],
+                                                  "risk": "Low", "count": 0, "members": []})
+            other["count"] += group["count"]
+            other["members"] += group["members"]
+            if RISK_WEIGHTS[group["risk"]] > RISK_WEIGHTS[other["risk"]]:
+                other["risk"] = group["risk"]
+
+    owner = {member: group["id"] for group in groups.values() for member in group.pop("members")}
+    for group in groups.values():
+        group["label"] = f"{group['label']} ({group['count']})"
+    return list(groups.values()), owner
+
+
+def merge_edges(edges, owner, edge_kind=None):
+    """Aggregate edges of ``(source, target, weight, kind)`` member edges.
+
+    ``edge_kind`` turns ``kind`` into the edge type; it is only called for
+    the edges that end up setting an aggregate's type.
+    """
+    merged_edges = {}
+    for source, target, weight, kind in edges:
+        key = (owner[source], owner[target])
+        merged = merged_edges.get(key)
+        if merged is None:
+            merged_edges[key] = {"source": key[0], "target": key[1], "weight": weight,
+                                 "type": edge_kind(kind) if edge_kind else kind, "count": 1}
+        else:
+            merged["count"] += 1
+            if weight > merged["weight"]:
+                merged["weight"], merged["type"] = weight, edge_kind(kind) if edge_kind else kind
+    return list(merged_edges.values())
+
+
+def force_layout(ids, edges, iterations=50, seed=1, initial=None, grid=16):
+    """Fruchterman–Reingold positions in [-1, 1] for ``ids``; returns ``{id: (x, y)}``.
+
+    Repulsion is computed against the centroids of a ``grid`` x ``grid``
+    cell partition (a one-level Barnes–Hut approximation) and attraction
+    along the edge list with sparse scatter-adds, so each iteration is
+    O(n * grid^2 + edges) instead of O(n^2). ``initial`` positions (e.g. from
+    the cache) seed the simulation, which then runs a fraction of the
+    iterations.
+    """
+    n = len(ids)
+    if n == 0:
+        return {}
+    index = {node: i for i, node in enumerate(ids)}
+    rnd = np.random.default_rng(seed)
+    pos = rnd.uniform(-1, 1, (n, 2))
+    if initial:
+        known = [(index[node], xy) for node, xy in initial.items() if node in index]
+        for i, xy in known:
+            pos[i] = xy
+        if len(known) == n:
+            return {node: tuple(pos[i]) for node, i in index.items()}
+        if len(known) > n // 2:
+            iterations = max(5, iterations // 5)
+    if n == 1:
+        return {ids[0]: (0.0, 0.0)}
+    src = np.fromiter((index[e["source"]] for e in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((index[e["target"]] for e in edges), dtype=np.int64, count=len(edges))
+
+    k = np.sqrt(4.0 / n)
+    temperature = 0.1
+    cells = grid * grid
+    for step in range(iterations):
+        low, high = pos.min(axis=0), pos.max(axis=0)
+        span = np.maximum(high - low, 1e-9)
+        cell_xy = np.minimum(((pos - low) / span * grid).astype(np.int64), grid - 1)
+        cell = cell_xy[:, 0] * grid + cell_xy[:, 1]
+        mass = np.bincount(cell, minlength=cells).astype(float)
+        sums = np.stack([np.bincount(cell, weights=pos[:, 0], minlength=cells),
+                         np.bincount(cell, weights=pos[:, 1], minlength=cells)], axis=1)
+        occupied = np.flatnonzero(mass)
+
+        displacement = np.zeros_like(pos)
+        for start in range(0, n, 4096):
+            part = slice(start, start + 4096)
+            own = cell[part]
+            # Centroid of every occupied cell, minus the node itself in its own cell
+            m = np.broadcast_to(mass[occupied], (len(own), len(occupied))).copy()
+            c = np.broadcast_to(sums[occupied], (len(own), len(occupied), 2)).copy()
+            self_col = np.searchsorted(occupied, own)
+            rows = np.arange(len(own))
+            m[rows, self_col] -= 1
+            c[rows, self_col] -= pos[part]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                centroid = np.where(m[..., None] > 0, c / np.maximum(m, 1)[..., None], 0.0)
+            delta = pos[part][:, None, :] - centroid
+            distance2 = np.maximum((delta ** 2).sum(axis=2), 1e-6)
+            force = np.where(m > 0, k * k * m / distance2, 0.0)
+            displacement[part] = (delta * force[..., None]).sum(axis=1)
+
+        if len(src):
+            delta = pos[src] - pos[dst]
+            distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-6)
+            pull = delta * (distance / k)[:, None]
+            np.add.at(displacement, src, -pull)
+            np.add.at(displacement, dst, pull)
+
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        pos += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature = max(temperature * (1 - 1 / max(iterations, 1)), 0.005)
+
+    pos -= pos.mean(axis=0)
+    pos /= max(np.abs(pos).max(), 1e-9)
+    return {node: (float(pos[i, 0]), float(pos[i, 1])) for node, i in index.items()}
+
+
+def load_positions(path):
+    """Cached ``{id: (x, y)}`` from ``path``, or ``{}``."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return {node: tuple(xy) for node, xy in json.load(fh).items()}
+
+
+def save_positions(path, positions):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({node: [round(x, 5), round(y, 5)] for node, (x, y) in positions.items()}, fh)
+    os.replace(tmp, path)
+
+
+def edge_coordinates(positions, edges):
+    """``(xs, ys)`` arrays of all edges as one line trace, NaN between segments."""
+    xy = np.full((len(edges), 3, 2), np.nan)
+    for i, edge in enumerate(edges):
+        xy[i, 0] = positions[edge["source"]]
+        xy[i, 1] = positions[edge["target"]]
+    flat = xy.reshape(-1, 2)
+    return flat[:, 0], flat[:, 1]
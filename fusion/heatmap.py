@@ -0,0 +1,56 @@
+"""OSINT type x nmap service score matrix for the correlation heatmap.
+
+Cells are summarised as ``total``/``count``/``max`` of ``correlation_score``
+so mean and max matrices come from the same table. A store keeps that
+table current with triggers (``heatmap_scores``); a correlation file is
+reduced with one pandas groupby over categorical columns.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+KEYS = ["osint_type", "nmap_service"]
+AGGREGATES = ("mean", "max")
+
+
+def cell_stats(frame):
+    """``total``/``count``/``max`` per (osint_type, nmap_service) of a correlation frame."""
+    keys = {key: frame[key].astype("category") for key in KEYS}
+    grouped = frame["correlation_score"].groupby([keys[key] for key in KEYS], observed=True, sort=False)
+    stats = grouped.agg(["sum", "count", "max"]).rename(columns={"sum": "total"})
+    return stats.reset_index()
+
+
+def store_stats(store):
+    """Cell statistics maintained by the store; no correlation rows are read."""
+    return pd.DataFrame([tuple(row) for row in store.heatmap_cells()],
+                        columns=KEYS + ["total", "count", "max"])
+
+
+def read_correlations(path):
+    """Correlation rows from a JSON (list or ``{"correlations": [...]}``) or CSV file."""
+    columns = KEYS + ["correlation_score"]
+    if path.endswith((".csv", ".csv.gz")):
+        return pd.read_csv(path, usecols=columns, dtype={key: "category" for key in KEYS})
+    with open(path) as fh:
+        rows = json.load(fh)
+    if isinstance(rows, dict):
+        rows = rows["correlations"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def matrix(stats, how="mean"):
+    """Pivot cell statistics to an osint_type x nmap_service frame (NaN where no pairs)."""
+    if how not in AGGREGATES:
+        raise ValueError(f"unknown aggregate: {how}")
+    values = stats["total"] / stats["count"] if how == "mean" else stats["max"]
+    cells = pd.DataFrame({"osint_type": stats["osint_type"].astype(str),
+                          "nmap_service": stats["nmap_service"].astype(str), "value": values})
+    return cells.pivot(index="osint_type", columns="nmap_service", values="value").sort_index().sort_index(axis=1)
+
+
+def cell_text(z, fmt="%.2f"):
+    """Formatted cell labels for a float array, ``""`` for empty cells."""
+    z = np.asarray(z, dtype=float)
+    return np.where(np.isnan(z), "", np.char.mod(fmt, np.nan_to_num(z)))
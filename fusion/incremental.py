@@ -0,0 +1,118 @@
+"""Delta correlation against the store.
+
+Only new or changed records are scored: changed findings against all
+stored services, changed services against the unchanged findings. Stored
+correlations of untouched pairs are kept as they are; the store drops the
+correlations of changed or retracted records when they are written.
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from fusion import instrument
+from fusion.correlate import SCORE_THRESHOLD, combined_risk, score_pair
+from fusion.parallel import ShardKeys, ip_prefix, is_broadcast, shard_of, usable_workers
+from fusion.spiderfoot import iter_chunks
+from fusion.store import Store
+
+
+def _rows(osint, scan):
+    correlation_score, correlation_reasons = score_pair(osint, scan)
+    if correlation_score > SCORE_THRESHOLD:
+        yield (osint["id"], scan["id"], round(correlation_score, 2), correlation_reasons,
+               combined_risk(osint["risk_level"], scan["risk_level"]))
+
+
+def delta_rows(store, finding_ids, service_ids, changed_findings=None, counts=None):
+    """Yield correlation rows for every pair involving a changed record.
+
+    ``changed_findings`` holds the changed finding ids that may be
+    candidates of ``service_ids`` when ``finding_ids`` is only one shard of
+    them (see :func:`parallel_delta_rows`); by default ``finding_ids``.
+    The candidate pair count goes to ``counts`` (a :class:`~collections.Counter`)
+    when given, else to the profiler.
+    """
+    if changed_findings is None:
+        changed_findings = set(finding_ids)
+    candidates = 0
+    try:
+        for osint in store.by_ids("findings", finding_ids):
+            for scan in store.service_candidates(osint):
+                candidates += 1
+                yield from _rows(osint, scan)
+        for scan in store.by_ids("services", service_ids):
+            for osint in store.finding_candidates(scan):
+                if osint["id"] not in changed_findings:
+                    candidates += 1
+                    yield from _rows(osint, scan)
+    finally:
+        if counts is None:
+            instrument.count("candidate pairs", candidates)
+        else:
+            counts["candidate pairs"] += candidates
+
+
+def _delta_shard(args):
+    path, finding_ids, service_ids, changed_findings = args
+    counts = Counter()
+    with Store(path) as store:
+        return list(delta_rows(store, finding_ids, service_ids, changed_findings, counts)), counts
+
+
+def _shard_ids(records, field, workers, keys=None):
+    """Ids of ``records`` split by the IP prefix of ``field``; the rest round-robin by id.
+
+    Each record is also added to its shard's ``keys`` (:class:`ShardKeys`) when given.
+    """
+    shards = [[] for _ in range(workers)]
+    for record in records:
+        key = ip_prefix(record[field])
+        shard = shard_of(key, workers) if key is not None else record["id"] % workers
+        shards[shard].append(record["id"])
+        if keys is not None:
+            keys[shard].add(record)
+    return shards
+
+
+def parallel_delta_rows(store, finding_ids, service_ids, workers):
+    """:func:`delta_rows` sharded by IP prefix over ``workers`` processes.
+
+    Each worker gets its own slice of the changed ids. To skip the pairs
+    another shard scores, its services only need to know the changed
+    findings that can reach them: its own IP-bound ones and the broadcast
+    ones (:func:`fusion.parallel.is_broadcast`) whose keys its services
+    have. Workers return their rows with their counters. Workers open their
+    own connection, so pending writes must be committed.
+    """
+    store.commit()
+    findings = list(store.by_ids("findings", finding_ids))
+    keys = [ShardKeys() for _ in range(workers)]
+    finding_shards = _shard_ids(findings, "value", workers)
+    service_shards = _shard_ids(store.by_ids("services", service_ids), "ip", workers, keys)
+    broadcast = [osint for osint in findings if is_broadcast(osint)]
+    jobs = [(store.path, f, s, set(f).union(osint["id"] for osint in broadcast if shard_keys.wanted(osint)))
+            for f, s, shard_keys in zip(finding_shards, service_shards, keys)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows, counts in pool.map(_delta_shard, jobs):
+            for name, value in counts.items():
+                instrument.count(name, value)
+            yield from rows
+
+
+def recorrelate(store, finding_ids, service_ids, batch=10000, workers=1):
+    """Write the delta correlations to ``store``; returns how many were written.
+
+    ``workers`` is capped by :func:`fusion.parallel.usable_workers`.
+    """
+    workers = usable_workers(workers, len(finding_ids) + len(service_ids))
+    if workers > 1 and store.path != ":memory:":
+        source = parallel_delta_rows(store, finding_ids, service_ids, workers)
+    else:
+        source = delta_rows(store, finding_ids, service_ids)
+    written = 0
+    # Timing each batch as it is produced attributes the scoring to "correlate"
+    for rows in instrument.timed_iter("correlate", iter_chunks(source, batch)):
+        with instrument.stage("store correlations"):
+            store.add_correlations(rows)
+        written += len(rows)
+    instrument.count("correlations", written)
+    return written
@@ -0,0 +1,206 @@
+"""Stage timers, counters and RSS sampling behind ``fusion --profile``.
+
+The pipeline marks its hot paths with :func:`stage` (a timed block),
+:func:`timed_iter` (time spent producing each item of an iterator, e.g.
+parsing the next chunk), :func:`span` (a block that may overlap others,
+such as one nmap process) and :func:`count`. While no profiler is started
+these are no-ops costing one global lookup, so they stay in place.
+
+A started :class:`Profiler` keeps per-stage calls, total and self time
+and the RSS after each stage, writes every timed block as a Chrome
+trace-event JSON file (``chrome://tracing`` or https://ui.perfetto.dev),
+and can record one cProfile dump per stage: a stage entered while another
+is being profiled is counted in the outer stage's dump.
+"""
+import contextlib
+import json
+import os
+import re
+import resource
+import sys
+import time
+from collections import Counter
+
+_active = None
+_NULL = contextlib.nullcontext()
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_mb():
+    """Current resident set size in MiB (the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * PAGE_SIZE / (1 << 20)
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1 << 20)
+
+
+class Profiler:
+    """Collects the timed blocks and counters of one run."""
+
+    def __init__(self, trace_path=None, cprofile_dir=None):
+        self.trace_path = trace_path
+        self.cprofile_dir = cprofile_dir
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = Counter()
+        self.stages = {}        # name -> [calls, total seconds, self seconds, max RSS MiB]
+        self.stack = []         # child seconds of each open stage
+        self.profiles = {}      # stage name -> cProfile.Profile
+        self.profiling = False
+        self.lanes = []         # free trace thread ids for overlapping spans
+        self.next_lane = 2
+        self.pid = os.getpid()
+
+    def _us(self, moment):
+        return round((moment - self.origin) * 1e6, 1)
+
+    def _record(self, name, begin, end, args, tid=1, child=0.0):
+        rss = rss_mb()
+        stats = self.stages.setdefault(name, [0, 0.0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += end - begin
+        stats[2] += end - begin - child
+        stats[3] = max(stats[3], rss)
+        self.events.append({"name": name, "ph": "X", "ts": self._us(begin), "dur": self._us(end) - self._us(begin),
+                            "pid": self.pid, "tid": tid, "args": args})
+        self.events.append({"name": "rss_mb", "ph": "C", "ts": self._us(end), "pid": self.pid,
+                            "args": {"rss_mb": round(rss, 1)}})
+
+    def _start_cprofile(self, name):
+        if self.cprofile_dir is None or self.profiling:
+            return None
+        profile = self.profiles.get(name)
+        if profile is None:
+            import cProfile  # only --profile-cprofile pays for it
+            profile = self.profiles[name] = cProfile.Profile()
+        self.profiling = True
+        profile.enable()
+        return profile
+
+    @contextlib.contextmanager
+    def stage(self, name, args):
+        self.stack.append(0.0)
+        profile = self._start_cprofile(name)
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if profile is not None:
+                profile.disable()
+                self.profiling = False
+            child = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += end - begin
+            self._record(name, begin, end, args, child=child)
+
+    def timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name, {}):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextlib.contextmanager
+    def span(self, name, args):
+        lane = self.lanes.pop() if self.lanes else self.next_lane
+        if lane == self.next_lane:
+            self.next_lane += 1
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, begin, time.perf_counter(), args, tid=lane)
+            self.lanes.append(lane)
+
+    def summary(self):
+        """Human-readable table of the stages and counters."""
+        lines = [f"{'stage':<28} {'calls':>8} {'total s':>10} {'self s':>10} {'max RSS MiB':>12}"]
+        for name, (calls, total, own, rss) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28} {calls:>8} {total:>10.3f} {own:>10.3f} {rss:>12.1f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<28} {value:>8}")
+        candidates, emitted = self.counters.get("candidate pairs"), self.counters.get("correlations")
+        if candidates:
+            lines.append(f"correlations per candidate pair: {(emitted or 0) / candidates:.1%}")
+        lines.append(f"wall {time.perf_counter() - self.origin:.3f} s, peak RSS {peak_rss_mb():.1f} MiB")
+        return "\n".join(lines)
+
+    def trace(self):
+        """The run as a Chrome trace-event document."""
+        names = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "fusion"}},
+                 {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": 1, "args": {"name": "pipeline"}}]
+        names += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": lane, "args": {"name": f"lane {lane}"}}
+                  for lane in range(2, self.next_lane)]
+        stages = {name: {"calls": calls, "seconds": round(total, 6), "self_seconds": round(own, 6),
+                         "max_rss_mb": round(rss, 1)}
+                  for name, (calls, total, own, rss) in self.stages.items()}
+        return {"traceEvents": names + self.events, "displayTimeUnit": "ms",
+                "otherData": {"argv": sys.argv, "stages": stages, "counters": dict(self.counters),
+                              "peak_rss_mb": round(peak_rss_mb(), 1)}}
+
+    def write(self):
+        """Write the trace and cProfile dumps; returns the paths written."""
+        paths = []
+        if self.trace_path:
+            with open(self.trace_path, "w") as fh:
+                json.dump(self.trace(), fh)
+            paths.append(self.trace_path)
+        if self.cprofile_dir is not None:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            for name, profile in self.profiles.items():
+                path = os.path.join(self.cprofile_dir, re.sub(r"[^\w.-]+", "_", name) + ".prof")
+                profile.dump_stats(path)
+                paths.append(path)
+        return paths
+
+
+def start(trace_path=None, cprofile_dir=None):
+    """Start profiling this process; returns the :class:`Profiler`."""
+    global _active
+    _active = Profiler(trace_path, cprofile_dir)
+    return _active
+
+
+def stop():
+    """Stop profiling; returns the :class:`Profiler` (or ``None`` if none was started)."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def stage(name, **args):
+    """Context manager timing the block as stage ``name``."""
+    if _active is None:
+        return _NULL
+    return _active.stage(name, args)
+
+
+def span(name, **args):
+    """Like :func:`stage`, for blocks that overlap each other (drawn on their own trace lane)."""
+    if _active is None:
+        return _NULL
+    return _active.span(name, args)
+
+
+def timed_iter(name, iterable):
+    """``iterable``, with the time spent producing each item recorded as stage ``name``."""
+    if _active is None:
+        return iterable
+    return _active.timed_iter(name, iterable)
+
+
+def count(name, value=1):
+    if _active is not None:
+        _active.counters[name] += value
@@ -0,0 +1,127 @@
+"""Streaming reader for nmap ``-oX`` output.
+
+Hosts are parsed one at a time with ``iterparse`` and cleared as soon as
+their ports have been emitted, so memory stays flat regardless of file size.
+Records have the same shape as ``nmap_data`` in ``script.py``.
+"""
+import re
+import xml.etree.ElementTree as ET
+
+CVE_RE = re.compile(r"CVE-\d{4}-\d{4,}")
+
+# nmap service names -> the labels used in nmap_data
+SERVICE_NAMES = {
+    "http": "HTTP",
+    "https": "HTTPS",
+    "ssl/http": "HTTPS",
+    "http-alt": "HTTP",
+    "http-proxy": "HTTP",
+    "ssh": "SSH",
+    "mysql": "MySQL",
+    "ftp": "FTP",
+    "smtp": "SMTP",
+    "domain": "DNS",
+    "ms-sql-s": "MSSQL",
+    "postgresql": "PostgreSQL",
+    "microsoft-ds": "SMB",
+    "ms-wbt-server": "RDP",
+}
+
+# nmap product names -> the short names SpiderFoot reports
+PRODUCT_NAMES = {
+    "Apache httpd": "Apache",
+    "Microsoft IIS httpd": "IIS",
+}
+
+
+def service_name(service):
+    """Map an nmap ``<service>`` element to a service label."""
+    if service is None:
+        return "unknown"
+    name = service.get("name", "unknown")
+    if service.get("tunnel") == "ssl" and name == "http":
+        name = "https"
+    return SERVICE_NAMES.get(name, name.upper())
+
+
+def service_version(service):
+    """``"<product> <version>"`` with nmap product names shortened."""
+    if service is None:
+        return ""
+    product = service.get("product", "")
+    product = PRODUCT_NAMES.get(product, product)
+    return " ".join(part for part in (product, service.get("version", "")) if part)
+
+
+def risk_level(vulnerabilities):
+    """Risk from the number of CVEs found on the service."""
+    if len(vulnerabilities) >= 2:
+        return "High"
+    if vulnerabilities:
+        return "Medium"
+    return "Low"
+
+
+def parse_port(ip, port):
+    """Build one ``nmap_data`` record from a ``<port>`` element."""
+    service = port.find("service")
+    state = port.find("state")
+
+    banner = ""
+    vulnerabilities = []
+    for script in port.iter("script"):
+        output = script.get("output", "")
+        if script.get("id") == "banner":
+            banner = output.strip()
+        for cve in CVE_RE.findall(output):
+            if cve not in vulnerabilities:
+                vulnerabilities.append(cve)
+    if not banner and service is not None:
+        banner = " ".join(part for part in (
+            service.get("product"), service.get("version"), service.get("extrainfo")
+        ) if part)
+
+    return {
+        "ip": ip,
+        "port": int(port.get("portid")),
+        "service": service_name(service),
+        "version": service_version(service),
+        "state": state.get("state") if state is not None else "unknown",
+        "banner": banner,
+        "risk_level": risk_level(vulnerabilities),
+        "vulnerabilities": vulnerabilities,
+    }
+
+
+def host_address(host):
+    """Preferred address of a ``<host>``: IPv4, then IPv6."""
+    addresses = {addr.get("addrtype"): addr.get("addr") for addr in host.findall("address")}
+    return addresses.get("ipv4") or addresses.get("ipv6")
+
+
+def iter_hosts(source):
+    """Yield completed ``<host>`` elements, clearing each after use."""
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == "host":
+            yield elem
+            elem.clear()
+            # Drop the emptied host from the document root as well
+            root.clear()
+
+
+def iter_services(source, states=("open",)):
+    """Yield one record per port of every host in an nmap XML file.
+
+    ``source`` is a path or a binary file object. Only ports whose state is
+    in ``states`` are emitted; pass ``None`` to keep all of them.
+    """
+    for host in iter_hosts(source):
+        ip = host_address(host)
+        if ip is None:
+            continue
+        for port in host.iterfind("ports/port"):
+            record = parse_port(ip, port)
+            if states is None or record["state"] in states:
+                yield record
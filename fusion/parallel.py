@@ -0,0 +1,187 @@
+"""Multi-process correlation sharded by IP prefix.
+
+Scan rows are partitioned by /24 (IPv4) or /64 (IPv6) prefix. A finding
+that can only correlate through the IP rule goes to the shard of its IP;
+Technology, Infrastructure and IP Range findings can match services on
+other IPs and go to the shards whose keys they hit (:class:`ShardKeys`:
+products, version strings, web service risks and addresses), not to all of
+them. Each shard scores its pairs, builds the finished correlation records
+in nested loop order and returns them with its candidate count, so the
+parent only merges the sorted shard outputs. The result is identical to
+:func:`fusion.correlate.correlate`.
+"""
+import gc
+import heapq
+import ipaddress
+import os
+import zlib
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from fusion import instrument
+from fusion.correlate import RISK_WEIGHTS, WEB_SERVICES, ScanIndex, finding_range, make_correlation
+from fusion.ranges import ip_int
+from fusion.versions import parse_requirement, parse_software
+
+# Fewer scan rows than this per worker are correlated faster in one process
+# than the workers start and exchange their records
+MIN_SCANS_PER_WORKER = 5000
+
+
+def ip_prefix(value):
+    """Shard key of an IP string, or ``None`` for anything that is not an IP."""
+    if value.count(".") == 3 and ":" not in value:
+        head, _, last = value.rpartition(".")
+        if last.isdigit():
+            return head
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    if address.version == 6:
+        return address.exploded[:19]
+    return ".".join(str(address).split(".")[:3])
+
+
+def is_broadcast(osint):
+    """Whether a finding can correlate with services outside its own IP."""
+    return osint["type"] in ("Technology", "IP Range") or osint["category"] == "Infrastructure"
+
+
+def shard_of(key, shards):
+    return zlib.crc32(key.encode()) % shards if key is not None else 0
+
+
+def usable_workers(workers, scans=None):
+    """How many of the ``workers`` requested to start.
+
+    At most the CPUs this process may use and, given the number of
+    ``scans`` to correlate, one per :data:`MIN_SCANS_PER_WORKER`.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    workers = min(workers, cpus)
+    if scans is not None:
+        workers = min(workers, scans // MIN_SCANS_PER_WORKER)
+    return max(1, workers)
+
+
+class ShardKeys:
+    """What the services of one shard can be matched on, for routing broadcast findings."""
+
+    def __init__(self):
+        self.products = set()
+        self.versions = set()
+        self.web_risks = set()
+        self.addresses = []
+        self._sorted = True
+
+    def add(self, scan):
+        software = parse_software(scan["service"], scan["version"], scan.get("banner") or "")
+        if software is not None:
+            self.products.add(software.key)
+        self.versions.add(scan["version"])
+        if scan["service"] in WEB_SERVICES:
+            self.web_risks.add(RISK_WEIGHTS[scan["risk_level"]])
+        key = ip_int(scan["ip"])
+        if key is not None:
+            self.addresses.append(key)
+            self._sorted = False
+
+    def wanted(self, osint):
+        """Whether a broadcast finding has candidates among this shard's services."""
+        if osint["type"] == "Technology":
+            requirement = parse_requirement(osint["finding"])
+            if requirement is None:
+                if any(osint["finding"] in version for version in self.versions):
+                    return True
+            elif requirement.key in self.products:
+                return True
+        network = finding_range(osint)
+        if network is not None:
+            if not self._sorted:
+                self.addresses.sort()
+                self._sorted = True
+            at = bisect_left(self.addresses, network[0])
+            if at < len(self.addresses) and self.addresses[at] <= network[1]:
+                return True
+        if osint["category"] == "Infrastructure":
+            weight = RISK_WEIGHTS[osint["risk_level"]]
+            if self.web_risks & {weight - 1, weight, weight + 1}:
+                return True
+        return False
+
+
+def plan_shards(spiderfoot_data, nmap_data, shards):
+    """Split records into ``shards`` lists of ``(position, record)`` pairs."""
+    scan_shards = [[] for _ in range(shards)]
+    keys = [ShardKeys() for _ in range(shards)]
+    for position, scan in enumerate(nmap_data):
+        shard = shard_of(ip_prefix(scan["ip"]), shards)
+        scan_shards[shard].append((position, scan))
+        keys[shard].add(scan)
+
+    osint_shards = [[] for _ in range(shards)]
+    for position, osint in enumerate(spiderfoot_data):
+        key = ip_prefix(osint["value"])
+        home = shard_of(key, shards) if key is not None else None
+        for shard, shard_keys in enumerate(keys):
+            if shard == home or (is_broadcast(osint) and shard_keys.wanted(osint)):
+                osint_shards[shard].append((position, osint))
+    return list(zip(osint_shards, scan_shards))
+
+
+@contextmanager
+def _gc_paused():
+    # Correlation records hold no cycles, but building or unpickling a million
+    # of them triggers full collections that cost several times the work itself
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def correlate_shard(shard):
+    """Worker: ``([(osint_position, scan_position, correlation)], candidate pairs)`` of one shard.
+
+    The matches come out sorted by position, scan rows being indexed in
+    position order.
+    """
+    osint_part, scan_part = shard
+    index = ScanIndex(scan for _, scan in scan_part)
+    matches, candidates = [], 0
+    with _gc_paused():
+        for osint_position, osint in osint_part:
+            rows = index.candidates(osint)
+            candidates += len(rows)
+            for row, correlation_score, correlation_reasons in index.score_rows(osint, rows):
+                position, scan = scan_part[row]
+                matches.append((osint_position, position,
+                                make_correlation(osint, scan, correlation_score, correlation_reasons)))
+    return matches, candidates
+
+
+def correlate_parallel(spiderfoot_data, nmap_data, workers):
+    """Correlate on ``workers`` processes; same output and order as ``correlate``.
+
+    Runs in this process when :func:`usable_workers` leaves only one.
+    """
+    spiderfoot_data, nmap_data = list(spiderfoot_data), list(nmap_data)
+    workers = usable_workers(workers, len(nmap_data))
+    if workers == 1:
+        return list(ScanIndex(nmap_data).correlate(spiderfoot_data))
+    shards = plan_shards(spiderfoot_data, nmap_data, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool, _gc_paused():
+        parts = []
+        for matches, candidates in pool.map(correlate_shard, shards):
+            parts.append(matches)
+            instrument.count("candidate pairs", candidates)
+        # Each shard is sorted already and a pair is in one shard only, so the
+        # positions alone order the merge into nested loop order
+        return [correlation for _, _, correlation in heapq.merge(*parts)]
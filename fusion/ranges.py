@@ -0,0 +1,116 @@
+"""CIDR range membership for IPv4 and IPv6.
+
+Addresses are mapped onto one integer line (IPv4 as is, IPv6 shifted past
+the IPv4 space) so both families share a single sorted index. A
+:class:`RangeIndex` splits the ranges into elementary segments, each with
+the tuple of ranges covering it, so containment of an address is one
+binary search no matter how ranges nest or overlap.
+"""
+import ipaddress
+import socket
+from bisect import bisect_right
+from functools import lru_cache
+
+IPV6_OFFSET = 1 << 32
+
+
+def ip_int(text):
+    """Integer key of an address string, or ``None`` if it is not an address."""
+    # inet_pton is several times faster than ipaddress.ip_address
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+    except (OSError, TypeError):
+        pass
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, text), "big") + IPV6_OFFSET
+    except (OSError, TypeError):
+        return None
+
+
+def ip_text(key):
+    """Address string of an integer key from :func:`ip_int`."""
+    if key < IPV6_OFFSET:
+        return socket.inet_ntop(socket.AF_INET, key.to_bytes(4, "big"))
+    return socket.inet_ntop(socket.AF_INET6, (key - IPV6_OFFSET).to_bytes(16, "big"))
+
+
+@lru_cache(maxsize=1 << 14)
+def parse_cidr(text):
+    """``(first, last)`` integer keys of a CIDR string, or ``None``."""
+    try:
+        network = ipaddress.ip_network(text.strip(), strict=False)
+    except ValueError:
+        return None
+    offset = IPV6_OFFSET if network.version == 6 else 0
+    first = int(network.network_address) + offset
+    return first, first + network.num_addresses - 1
+
+
+def ip_sort_key(key):
+    """Fixed-width text form of an integer key; sorts like the integers."""
+    return f"{key:033x}"
+
+
+class RangeIndex:
+    """Static index answering "which ranges contain this address"."""
+
+    def __init__(self, ranges=()):
+        """``ranges`` is an iterable of ``(first, last, payload)``."""
+        starts, ends, payloads = [], [], []
+        for first, last, payload in ranges:
+            starts.append((first, len(payloads)))
+            ends.append((last + 1, len(payloads)))
+            payloads.append(payload)
+        self.size = len(payloads)
+        self.bounds = []     # segment start keys
+        self.covering = []   # payload tuple per segment
+
+        starts.sort()
+        ends.sort()
+        active = set()
+        i = j = 0
+        while i < len(starts) or j < len(ends):
+            point = min(starts[i][0] if i < len(starts) else float("inf"),
+                        ends[j][0] if j < len(ends) else float("inf"))
+            while j < len(ends) and ends[j][0] == point:
+                active.discard(ends[j][1])
+                j += 1
+            while i < len(starts) and starts[i][0] == point:
+                active.add(starts[i][1])
+                i += 1
+            self.bounds.append(point)
+            self.covering.append(tuple(payloads[k] for k in sorted(active)))
+
+    def __len__(self):
+        return self.size
+
+    def lookup(self, key):
+        """Payloads of every range containing integer ``key`` (in insertion order)."""
+        if key is None:
+            return ()
+        segment = bisect_right(self.bounds, key) - 1
+        return self.covering[segment] if segment >= 0 else ()
+
+    def lookup_ip(self, text):
+        return self.lookup(ip_int(text))
+
+    def lookup_many(self, keys):
+        """:meth:`lookup` for a sequence of keys; vectorized with NumPy when possible."""
+        try:
+            import numpy as np
+        except ImportError:
+            return [self.lookup(key) for key in keys]
+        keys = list(keys)
+        if not self.bounds:
+            return [()] * len(keys)
+        # IPv4 keys go through searchsorted; IPv6 (beyond int64) and None one by one
+        small = [i for i, key in enumerate(keys) if key is not None and key < 1 << 63]
+        result = [None] * len(keys)
+        if small:
+            bounds = [min(bound, (1 << 63) - 1) for bound in self.bounds]
+            segments = np.searchsorted(np.asarray(bounds, dtype=np.int64),
+                                       np.asarray([keys[i] for i in small], dtype=np.int64),
+                                       side="right") - 1
+            for i, segment in zip(small, segments.tolist()):
+                result[i] = self.covering[segment] if segment >= 0 else ()
+        return [self.lookup(keys[i]) if found is None else found for i, found in enumerate(result)]
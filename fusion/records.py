@@ -0,0 +1,218 @@
+"""Compact columnar records for SpiderFoot findings and nmap services.
+
+``spiderfoot_data``/``nmap_data`` rows are held as columns rather than one
+dict per record: every text field is a :class:`pandas.Categorical` (small
+integer codes into the distinct strings), scan IPs are packed address keys
+(``uint32`` while every address is IPv4, :func:`fusion.ranges.ip_int`
+integers otherwise), ports are ``uint16`` and the CVE lists of all services
+share one categorical plus an offsets array. Records are appended one at a
+time, so a streaming reader never holds the dicts, and :meth:`to_frame`
+wraps the columns in a DataFrame without copying the codes.
+:func:`fusion.batch.correlate_records` scores the codes directly.
+"""
+import array
+
+import numpy as np
+import pandas as pd
+
+from fusion.ranges import IPV6_OFFSET, ip_int, ip_text
+
+OSINT_FIELDS = ("target", "type", "finding", "value", "source", "risk_level", "category")
+SCAN_FIELDS = ("ip", "port", "service", "version", "state", "banner", "risk_level", "vulnerabilities")
+
+ITER_CHUNK = 10000
+
+
+def _codes(values):
+    """``values`` as the narrowest signed integer array that holds them."""
+    values = np.asarray(values, dtype=np.int64)
+    for dtype in (np.int8, np.int16, np.int32):
+        if not len(values) or values.max() <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values
+
+
+class _Interned:
+    """Text column under construction: distinct strings and one code per row."""
+
+    def __init__(self):
+        self.lookup = {}
+        self.codes = array.array("i")
+
+    def append(self, text):
+        text = "" if text is None else text
+        code = self.lookup.get(text)
+        if code is None:
+            code = self.lookup[text] = len(self.lookup)
+        self.codes.append(code)
+
+    def finish(self):
+        return pd.Categorical.from_codes(_codes(self.codes), categories=list(self.lookup))
+
+
+class _Ports:
+    def __init__(self):
+        self.values = array.array("H")
+
+    def append(self, port):
+        self.values.append(int(port))
+
+    def finish(self):
+        return np.frombuffer(self.values, dtype=np.uint16)
+
+
+class _Addresses:
+    """Packed IPs: a ``uint32`` buffer until the first IPv6 address, then ints."""
+
+    def __init__(self):
+        self.packed = array.array("I")
+        self.keys = None
+
+    def append(self, text):
+        key = ip_int(text)
+        if key is None:
+            raise ValueError(f"not an IP address: {text!r}")
+        if self.keys is None:
+            if key < IPV6_OFFSET:
+                self.packed.append(key)
+                return
+            self.keys = list(self.packed)
+        self.keys.append(key)
+
+    def finish(self):
+        if self.keys is None:
+            return np.frombuffer(self.packed, dtype=np.uint32)
+        return np.asarray(self.keys, dtype=object)
+
+
+class _Lists:
+    """List-of-strings column: interned items plus ``offsets`` into them."""
+
+    def __init__(self):
+        self.items = _Interned()
+        self.offsets = array.array("q", [0])
+
+    def append(self, values):
+        for value in values or ():
+            self.items.append(value)
+        self.offsets.append(len(self.items.codes))
+
+    def finish(self):
+        return self.items.finish(), np.frombuffer(self.offsets, dtype=np.int64)
+
+
+class Records:
+    """Equal-length columns by field name; see :class:`Findings` and :class:`Services`."""
+
+    FIELDS = ()
+    BUILDERS = {}
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records):
+        """Build the columns from an iterable of record dicts, one record at a time."""
+        builders = [(field, cls.BUILDERS.get(field, _Interned)()) for field in cls.FIELDS]
+        appends = [(field, builder.append) for field, builder in builders]
+        for record in records:
+            for field, append in appends:
+                append(record.get(field))
+        return cls({field: builder.finish() for field, builder in builders})
+
+    def __len__(self):
+        return len(self.columns[self.FIELDS[0]])
+
+    def codes(self, field):
+        return self.columns[field].codes
+
+    def categories(self, field):
+        return self.columns[field].categories
+
+    def weights(self, field, table):
+        """Per-row ``table[value]`` of a categorical field, looked up once per category."""
+        column = self.columns[field]
+        return np.asarray([table[value] for value in column.categories], dtype=np.int8)[column.codes]
+
+    def column(self, field, start=0, stop=None):
+        """Decoded values of ``field`` for rows ``start:stop``."""
+        return self.columns[field][start:stop]
+
+    def to_frame(self, fields=None):
+        """DataFrame over the columns; categorical codes are shared, not copied."""
+        return pd.DataFrame({field: self.column(field) for field in fields or self.FIELDS}, copy=False)
+
+    def iter_records(self, chunk_size=ITER_CHUNK):
+        """Yield the records as plain dicts (JSON-ready), decoding one chunk at a time."""
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            values = []
+            for field in self.FIELDS:
+                column = self.column(field, start, stop)
+                values.append(np.asarray(column, dtype=object) if isinstance(column, pd.Categorical)
+                              else column.tolist())
+            for row in zip(*values):
+                yield dict(zip(self.FIELDS, row))
+
+    def memory_usage(self):
+        """Bytes held by the columns, counting each distinct string once."""
+        total = 0
+        for column in self.columns.values():
+            for part in column if isinstance(column, tuple) else (column,):
+                if isinstance(part, pd.Categorical):
+                    total += part.memory_usage(deep=True)
+                elif part.dtype == object:
+                    total += part.nbytes + sum(value.__sizeof__() for value in part)
+                else:
+                    total += part.nbytes
+        return total
+
+
+class Findings(Records):
+    """``spiderfoot_data`` records; every field is categorical."""
+
+    FIELDS = OSINT_FIELDS
+
+    def value_keys(self):
+        """Address key of each ``value`` (``-1`` where it is not an IP), parsed per category."""
+        keys = [ip_int(value) for value in self.categories("value")]
+        keys = [-1 if key is None else key for key in keys]
+        dtype = np.int64 if all(key < 1 << 63 for key in keys) else object
+        return np.asarray(keys, dtype=dtype)[self.codes("value")]
+
+
+class Services(Records):
+    """``nmap_data`` records with packed IPs, ``uint16`` ports and flattened CVE lists."""
+
+    FIELDS = SCAN_FIELDS
+    BUILDERS = {"ip": _Addresses, "port": _Ports, "vulnerabilities": _Lists}
+
+    def ip_keys(self):
+        """Packed address key per row (as from :func:`fusion.ranges.ip_int`)."""
+        return self.columns["ip"]
+
+    def ips(self, start=0, stop=None):
+        """IP strings of rows ``start:stop`` as a categorical, one ``ip_text`` per distinct address."""
+        distinct, inverse = np.unique(self.columns["ip"][start:stop], return_inverse=True)
+        return pd.Categorical.from_codes(_codes(inverse), categories=[ip_text(int(key)) for key in distinct])
+
+    def targets(self):
+        """``ip:port`` per row as a categorical, formatted once per distinct pair."""
+        ips = self.ips()
+        pairs = ips.codes.astype(np.int64) * (1 << 16) + self.columns["port"]
+        distinct, inverse = np.unique(pairs, return_inverse=True)
+        labels = [f"{ips.categories[pair >> 16]}:{pair & 0xFFFF}" for pair in distinct.tolist()]
+        return pd.Categorical.from_codes(_codes(inverse), categories=labels)
+
+    def column(self, field, start=0, stop=None):
+        if field == "ip":
+            return self.ips(start, stop)
+        if field == "vulnerabilities":
+            items, offsets = self.columns[field]
+            stop = len(self) if stop is None else stop
+            bounds = (offsets[start:stop + 1] - offsets[start]).tolist()
+            cves = np.asarray(items[offsets[start]:offsets[stop]], dtype=object)
+            column = np.empty(len(bounds) - 1, dtype=object)
+            column[:] = [cves[lo:hi].tolist() for lo, hi in zip(bounds, bounds[1:])]
+            return column
+        return super().column(field, start, stop)
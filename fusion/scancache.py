@@ -0,0 +1,159 @@
+"""Per-host nmap result cache with a TTL.
+
+Entries are keyed by ``(address, normalized nmap arguments)`` and hold the
+service records nmap reported for that address (an empty list for hosts
+that were down), so re-running ``fusion scan`` over overlapping ranges can
+skip hosts scanned recently with the same arguments. The cache lives in the
+store's SQLite file and is bounded by entry count, oldest first.
+"""
+import ipaddress
+import json
+import re
+import shlex
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_cache (
+    address TEXT, args TEXT, scanned REAL, records TEXT,
+    PRIMARY KEY (address, args)
+);
+CREATE INDEX IF NOT EXISTS scan_cache_scanned ON scan_cache(scanned);
+"""
+
+MAX_ENTRIES = 1_000_000
+DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Output options do not change what nmap finds
+OUTPUT_OPTIONS = {"-oX", "-oN", "-oG", "-oA", "-oS", "--stylesheet"}
+
+
+def parse_duration(text):
+    """``"90"``, ``"30m"``, ``"6h"``, ``"2d"`` -> seconds."""
+    match = DURATION_RE.match(text.strip().lower())
+    if not match:
+        raise ValueError(f"invalid duration: {text!r}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def normalize_args(nmap_args, ports=""):
+    """Canonical form of an nmap argument string (option order, output flags ignored)."""
+    tokens = shlex.split(nmap_args)
+    options = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = None
+        if i + 1 < len(tokens) and not tokens[i + 1].startswith("-"):
+            value = tokens[i + 1]
+            i += 1
+        i += 1
+        if token in OUTPUT_OPTIONS:
+            continue
+        options.append(f"{token} {value}" if value is not None else token)
+    if ports:
+        options.append(f"-p {ports}")
+    return " ".join(sorted(options))
+
+
+def addresses(target):
+    """Addresses of a CIDR/address target, or ``None`` for hostnames (not cacheable)."""
+    try:
+        network = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return None
+    if network.num_addresses == 1:
+        return [str(network.network_address)]
+    return [str(address) for address in network]
+
+
+class ScanCache:
+    """Scan results cached in the store database."""
+
+    def __init__(self, store, max_age, max_entries=MAX_ENTRIES):
+        self.db = store.db
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self.db.executescript(SCHEMA)
+
+    def fresh(self, args, candidates):
+        """``{address: records}`` for cached entries younger than ``max_age``."""
+        if self.max_age <= 0:
+            return {}
+        cutoff = time.time() - self.max_age
+        found = {}
+        for start in range(0, len(candidates), 500):
+            part = candidates[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT address, records FROM scan_cache WHERE args = ? AND scanned >= ?"
+                f" AND address IN ({','.join('?' * len(part))})",
+                [args, cutoff] + part,
+            )
+            found.update((address, json.loads(records)) for address, records in rows)
+        return found
+
+    def put(self, args, scanned_addresses, records):
+        """Record the results of one nmap run over ``scanned_addresses``."""
+        by_address = {address: [] for address in scanned_addresses}
+        for record in records:
+            by_address.setdefault(record["ip"], []).append(record)
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO scan_cache VALUES (?, ?, ?, ?)",
+            ((address, args, now, json.dumps(host_records)) for address, host_records in by_address.items()),
+        )
+        self.evict()
+
+    def evict(self):
+        excess = self.db.execute("SELECT COUNT(*) FROM scan_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM scan_cache WHERE rowid IN"
+                " (SELECT rowid FROM scan_cache ORDER BY scanned LIMIT ?)", (excess,)
+            )
+
+    def split(self, chunk, nmap_args):
+        """Split ``chunk`` into cached records and what is still to scan.
+
+        Returns ``(cached_records, remaining_chunk_or_None)``; the remaining
+        chunk is ``chunk`` with the cached hosts in its ``exclude``.
+        """
+        args = normalize_args(nmap_args, chunk.ports)
+        cached, skipped, scan_left = [], [], False
+        for target in chunk.targets:
+            target_addresses = addresses(target)
+            if target_addresses is None:
+                scan_left = True
+                continue
+            hits = self.fresh(args, target_addresses)
+            for records in hits.values():
+                cached.extend(records)
+            skipped.extend(_format(net) for net in ipaddress.collapse_addresses(
+                ipaddress.ip_address(a) for a in hits))
+            self.hits += len(hits)
+            self.misses += len(target_addresses) - len(hits)
+            scan_left = scan_left or len(hits) < len(target_addresses)
+        if not scan_left:
+            return cached, None
+        if not skipped:
+            return cached, chunk
+        return cached, chunk._replace(exclude=tuple(skipped))
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = f"{100 * self.hits / total:.0f}%" if total else "n/a"
+        return f"cache: {self.hits} hosts fresh, {self.misses} scanned ({rate} hit rate)"
+
+
+def scanned_addresses(chunk):
+    """Addresses nmap scans for ``chunk``: its targets' less the excluded ones."""
+    excluded = {address for target in chunk.exclude for address in addresses(target)}
+    return [address for target in chunk.targets for address in addresses(target) or ()
+            if address not in excluded]
+
+
+def _format(network):
+    if network.num_addresses == 1:
+        return str(network.network_address)
+    return str(network)
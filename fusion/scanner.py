@@ -0,0 +1,167 @@
+"""Asyncio orchestration of chunked nmap sweeps.
+
+The target range is split into fixed-size chunks and a bounded number of
+nmap subprocesses run at once, each writing its own ``-oX`` file. Finished
+chunks are queued for a callback running on one worker thread (so they are
+imported and correlated while the event loop keeps starting nmap
+processes), failed chunks are retried, and
+completed chunks are recorded in a progress file so an interrupted sweep
+resumes where it stopped.
+"""
+import asyncio
+import hashlib
+import ipaddress
+import json
+import os
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from fusion import instrument
+
+NMAP = os.environ.get("FUSION_NMAP", "nmap")
+SPIDERFOOT = os.environ.get("FUSION_SPIDERFOOT", "sf.py")
+PROGRESS_FILE = "progress.json"
+
+
+class Chunk(NamedTuple):
+    """Targets scanned by one nmap process, optionally restricted to ``ports``.
+
+    ``exclude`` lists addresses or CIDRs of the targets left out of the scan
+    (hosts with fresh cached results); like the XML file, the key and name
+    stay those of the whole chunk so progress and retraction still match.
+    """
+
+    targets: tuple
+    ports: str = ""
+    exclude: tuple = ()
+
+    @property
+    def key(self):
+        return " ".join(self.targets) + (f" -p {self.ports}" if self.ports else "")
+
+    @property
+    def name(self):
+        if len(self.targets) == 1 and not self.ports:
+            return chunk_name(self.targets[0])
+        return "batch-" + hashlib.sha1(self.key.encode()).hexdigest()[:12]
+
+
+def split_targets(targets, chunk_hosts=256):
+    """Split CIDRs/addresses into subnets of at most ``chunk_hosts`` addresses."""
+    chunks = []
+    for target in targets:
+        network = ipaddress.ip_network(target, strict=False)
+        bits = max(0, chunk_hosts.bit_length() - 1)
+        prefix = max(network.prefixlen, network.max_prefixlen - bits)
+        chunks.extend(Chunk((str(subnet),)) for subnet in network.subnets(new_prefix=prefix))
+    return chunks
+
+
+def chunk_name(target):
+    return target.replace("/", "_").replace(":", "-")
+
+
+class Progress:
+    """Set of finished chunks, persisted as JSON in the output directory."""
+
+    def __init__(self, out_dir):
+        self.path = os.path.join(out_dir, PROGRESS_FILE)
+        self.done = set()
+        if os.path.exists(self.path):
+            with open(self.path) as fh:
+                self.done = set(json.load(fh))
+
+    def mark(self, chunk):
+        self.done.add(chunk)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(sorted(self.done), fh)
+        os.replace(tmp, self.path)
+
+
+class ChunkFailed(Exception):
+    pass
+
+
+async def run_nmap(chunk, nmap_args, xml_path, nmap=NMAP):
+    """Run one nmap over ``chunk``; raises :class:`ChunkFailed` on a non-zero exit."""
+    ports = ["-p", chunk.ports] if chunk.ports else []
+    exclude = ["--exclude", ",".join(chunk.exclude)] if chunk.exclude else []
+    process = await asyncio.create_subprocess_exec(
+        *shlex.split(nmap), *shlex.split(nmap_args), *ports, *exclude, "-oX", xml_path, *chunk.targets,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise ChunkFailed(f"{chunk.key}: nmap exited {process.returncode}: {stderr.decode().strip()}")
+    return xml_path
+
+
+async def run_spiderfoot(target, modules, out_path, spiderfoot=SPIDERFOOT):
+    """Run a SpiderFoot CLI scan of ``target`` writing JSON events to ``out_path``."""
+    with open(out_path, "wb") as out:
+        process = await asyncio.create_subprocess_exec(
+            *shlex.split(spiderfoot), "-s", target, "-u", modules, "-o", "json", "-q",
+            stdout=out, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise ChunkFailed(f"spiderfoot exited {process.returncode}: {stderr.decode().strip()}")
+    return out_path
+
+
+async def sweep(chunks, nmap_args, out_dir, on_chunk, concurrency=4, retries=2,
+                backoff=1.0, nmap=NMAP, progress=None):
+    """Scan ``chunks`` with at most ``concurrency`` nmap processes.
+
+    ``on_chunk(chunk, xml_path)`` is called for each finished :class:`Chunk`
+    in completion order, on a single worker thread so the sweep goes on
+    meanwhile and the callback's store writes never overlap; chunks start
+    in the order given. Returns ``(done, failed)`` lists; chunks already in
+    ``progress`` are skipped. An exception from ``on_chunk`` stops the sweep.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    progress = progress or Progress(out_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attempt(chunk):
+        xml_path = os.path.join(out_dir, chunk.name + ".xml")
+        for tries in range(retries + 1):
+            async with semaphore:
+                try:
+                    with instrument.span("nmap", chunk=chunk.key, attempt=tries + 1):
+                        return chunk, await run_nmap(chunk, nmap_args, xml_path, nmap)
+                except ChunkFailed as exc:
+                    error = exc
+            if tries < retries:
+                await asyncio.sleep(backoff * 2 ** tries)
+        return chunk, error
+
+    loop = asyncio.get_running_loop()
+    finished = asyncio.Queue()
+    done, failed = [], []
+
+    async def ingest():
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest") as worker:
+            while (item := await finished.get()) is not None:
+                chunk, xml_path = item
+                await loop.run_in_executor(worker, on_chunk, chunk, xml_path)
+                progress.mark(chunk.key)
+                done.append(chunk)
+
+    consumer = asyncio.create_task(ingest())
+    pending = [attempt(chunk) for chunk in chunks if chunk.key not in progress.done]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            chunk, result = await next_done
+            if consumer.done():
+                break
+            if isinstance(result, ChunkFailed):
+                failed.append((chunk, str(result)))
+            else:
+                finished.put_nowait((chunk, result))
+    finally:
+        finished.put_nowait(None)
+    await consumer
+    return done, failed
@@ -0,0 +1,192 @@
+"""OSINT-driven nmap target scheduling.
+
+Addresses, resolved subdomains and network ranges surfaced by SpiderFoot
+are deduplicated, collapsed into minimal CIDRs, ranked by their highest
+OSINT risk and given the port set implied by the target's Technology
+findings, so nmap only scans what the OSINT pass pointed at.
+"""
+import ipaddress
+import re
+from typing import NamedTuple
+
+from fusion.correlate import RISK_WEIGHTS
+from fusion.scanner import Chunk
+
+# Technology keyword -> ports worth probing for it
+TECHNOLOGY_PORTS = {
+    "apache": (80, 443, 8080, 8443),
+    "nginx": (80, 443, 8080, 8443),
+    "iis": (80, 443),
+    "tomcat": (8080, 8443),
+    "openssh": (22,),
+    "mysql": (3306,),
+    "postgresql": (5432,),
+    "mssql": (1433,),
+    "microsoft sql": (1433,),
+    "redis": (6379,),
+    "mongodb": (27017,),
+    "elasticsearch": (9200, 9300),
+    "vsftpd": (21,),
+    "proftpd": (21,),
+    "exim": (25, 465, 587),
+    "postfix": (25, 465, 587),
+    "rdp": (3389,),
+}
+# A keyword only counts as a whole word: "WordPress" does not name RDP
+TECHNOLOGY_PATTERNS = {keyword: re.compile(rf"(?<![a-z]){re.escape(keyword)}(?![a-z])")
+                       for keyword in TECHNOLOGY_PORTS}
+
+
+class Target(NamedTuple):
+    network: str
+    risk: int
+    findings: int
+    ports: tuple
+
+
+def technology_ports(finding):
+    name = finding.lower()
+    return {port for keyword, ports in TECHNOLOGY_PORTS.items() if TECHNOLOGY_PATTERNS[keyword].search(name)
+            for port in ports}
+
+
+def _network(value):
+    try:
+        return ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+
+
+def plan(findings, max_range_hosts=256, scope=None):
+    """Ranked :class:`Target` list for ``findings`` (``spiderfoot_data`` records).
+
+    "IP Range" findings larger than ``max_range_hosts`` addresses are left
+    out; ``scope`` (a list of networks) restricts the result to addresses
+    inside it. Subdomains that did not resolve are scheduled by name when
+    there is no scope.
+    """
+    scope = [ipaddress.ip_network(net, strict=False) for net in scope] if scope else None
+    ports_by_domain = {}
+    seen = {}  # network or hostname -> [max risk, finding count, target domains]
+
+    def add(key, finding):
+        entry = seen.setdefault(key, [0, 0, set()])
+        entry[0] = max(entry[0], RISK_WEIGHTS[finding["risk_level"]])
+        entry[1] += 1
+        entry[2].add(finding["target"])
+
+    for finding in findings:
+        if finding["type"] == "Technology":
+            ports_by_domain.setdefault(finding["target"], set()).update(technology_ports(finding["finding"]))
+            continue
+        network = _network(finding["value"]) if finding["type"] != "IP Range" else _network(finding["finding"])
+        if network is None:
+            if finding["type"] == "Subdomain" and scope is None:
+                add(finding["finding"].lower(), finding)
+            continue
+        if network.num_addresses > max_range_hosts:
+            continue
+        if scope is not None and not any(network.version == net.version and network.subnet_of(net)
+                                         for net in scope):
+            continue
+        add(network, finding)
+
+    # Group by (risk, ports) so collapsing never widens a port set or lowers a rank
+    groups = {}
+    for key, (risk, count, domains) in seen.items():
+        ports = set()
+        for domain in domains:
+            ports |= ports_by_domain.get(domain, set())
+        groups.setdefault((risk, tuple(sorted(ports))), []).append((key, count))
+
+    targets = []
+    for (risk, ports), members in groups.items():
+        counts = {key: count for key, count in members}
+        networks = [key for key in counts if not isinstance(key, str)]
+        for version in (4, 6):
+            same = sorted(net for net in networks if net.version == version)
+            i = 0
+            # Collapsed blocks come out sorted, so their members are consecutive in ``same``
+            for collapsed in ipaddress.collapse_addresses(same):
+                total = 0
+                while i < len(same) and same[i].subnet_of(collapsed):
+                    total += counts[same[i]]
+                    i += 1
+                targets.append(Target(_format(collapsed), risk, total, ports))
+        targets.extend(Target(key, risk, count, ports) for key, count in members if isinstance(key, str))
+
+    targets.sort(key=lambda t: (-t.risk, -t.findings, t.network))
+    return _drop_covered(targets)
+
+
+def _drop_covered(targets):
+    """Drop targets a range of equal or higher rank (and a superset port set) already scans.
+
+    One pass over the targets sorted by (network address, prefix length),
+    as :func:`ipaddress.collapse_addresses` does: every range comes before
+    the networks inside it, so the ranges enclosing a target are exactly
+    the stack of still open ranges.
+    """
+    order = sorted(((network, i) for i, target in enumerate(targets)
+                    if (network := _network(target.network)) is not None),
+                   key=lambda item: (item[0].version, item[0].network_address, item[0].prefixlen))
+    covered = [False] * len(targets)
+    stack = []  # (network, [targets of that range]), outermost first
+    for network, i in order:
+        target = targets[i]
+        while stack and (stack[-1][0].version != network.version or not network.subnet_of(stack[-1][0])):
+            stack.pop()
+        covered[i] = any(_covers(other, target) for net, others in stack if net != network for other in others)
+        if "/" in target.network:
+            if stack and stack[-1][0] == network:
+                stack[-1][1].append(target)
+            else:
+                stack.append((network, [target]))
+    return [target for target, dropped in zip(targets, covered) if not dropped]
+
+
+def _covers(other, target):
+    # An empty port set means nmap's defaults, which no explicit set covers
+    return (other.risk >= target.risk and set(other.ports) >= set(target.ports)
+            and bool(target.ports or not other.ports))
+
+
+def _format(network):
+    if network.num_addresses == 1:
+        return str(network.network_address)
+    return str(network)
+
+
+def _size(target):
+    network = _network(target.network)
+    return network.num_addresses if network is not None else 1
+
+
+def _split_large(targets, chunk_hosts):
+    for target in targets:
+        network = _network(target.network)
+        if network is None or network.num_addresses <= chunk_hosts:
+            yield target
+            continue
+        prefix = network.max_prefixlen - max(0, chunk_hosts.bit_length() - 1)
+        for subnet in network.subnets(new_prefix=prefix):
+            yield target._replace(network=str(subnet))
+
+
+def chunks(targets, chunk_hosts=256):
+    """Pack ranked targets into :class:`Chunk` batches sharing a port set.
+
+    Batches keep rank order: the highest-risk targets are scanned first.
+    """
+    open_batches = {}
+    result = []
+    for target in _split_large(targets, chunk_hosts):
+        ports = ",".join(str(port) for port in target.ports)
+        batch = open_batches.get(ports)
+        if batch is None or batch[1] + _size(target) > chunk_hosts:
+            batch = open_batches[ports] = [[], 0, len(result)]
+            result.append(None)
+        batch[0].append(target.network)
+        batch[1] += _size(target)
+        result[batch[2]] = Chunk(tuple(batch[0]), ports)
+    return result
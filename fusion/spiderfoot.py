@@ -0,0 +1,151 @@
+"""Streaming reader for SpiderFoot JSON/CSV exports.
+
+Events are decoded incrementally (the export is never ``json.load``-ed as a
+whole), mapped onto the ``spiderfoot_data`` schema of ``script.py`` and
+handed out in fixed-size chunks.
+"""
+import csv
+import json
+import os
+
+CHUNK_SIZE = 10000
+READ_SIZE = 1 << 16
+
+# SpiderFoot module -> source label
+MODULE_SOURCES = {
+    "sfp_dnsresolve": "Public DNS",
+    "sfp_dnsbrute": "Public DNS",
+    "sfp_crt": "Certificate Transparency",
+    "sfp_certspotter": "Certificate Transparency",
+    "sfp_haveibeenpwned": "HaveIBeenPwned",
+    "sfp_whois": "WHOIS",
+    "sfp_ripe": "WHOIS",
+    "sfp_arin": "WHOIS",
+    "sfp_spider": "HTTP Headers",
+    "sfp_webserver": "HTTP Headers",
+    "sfp_webframework": "HTTP Headers",
+}
+
+# CSV export header -> JSON export key
+CSV_FIELDS = {
+    "Scan Name": "scan_name",
+    "Updated": "generated",
+    "Type": "type",
+    "Module": "module",
+    "Source": "source",
+    "F/P": "false_positive",
+    "Data": "data",
+}
+
+
+def _technology(data):
+    # "Apache/2.4.41 (Ubuntu)" -> "Apache 2.4.41"
+    return data.split()[0].replace("/", " ") if data.strip() else data
+
+
+def _is_apex(name, target):
+    if target:
+        return name.lower() == target.lower()
+    return name.count(".") <= 1
+
+
+def normalize(event, target=None):
+    """Map one SpiderFoot event to a ``spiderfoot_data`` record, or ``None``.
+
+    Event types without a counterpart in the schema are dropped.
+    """
+    if str(event.get("false_positive", "0")) not in ("0", "", "False", "false"):
+        return None
+    kind = event.get("type", "")
+    data = event.get("data", "")
+    source = event.get("source", "")
+    module = event.get("module", "")
+    target = target or event.get("scan_target") or ""
+
+    if kind in ("IP_ADDRESS", "IPV6_ADDRESS"):
+        if _is_apex(source, target):
+            record = ("Domain", "DNS Record", data, "Low", "Infrastructure")
+        else:
+            record = ("Subdomain", source, data, "Medium", "Attack Surface")
+    elif kind == "EMAILADDR_COMPROMISED":
+        # Data is "user@example.com [Breach name]"
+        record = ("Email", data.split(" [")[0], "Found in breach data", "High", "Credentials")
+    elif kind == "EMAILADDR":
+        record = ("Email", data, "Email address", "Low", "Credentials")
+    elif kind in ("NETBLOCK_OWNER", "NETBLOCK_MEMBER", "NETBLOCKV6_OWNER", "NETBLOCKV6_MEMBER"):
+        record = ("IP Range", data, "Company network range", "Medium", "Infrastructure")
+    elif kind in ("WEBSERVER_BANNER", "WEBSERVER_TECHNOLOGY"):
+        record = ("Technology", _technology(data), "Web server version", "Medium", "Technology Stack")
+    else:
+        return None
+
+    kind, finding, value, risk, category = record
+    return {
+        "target": target,
+        "type": kind,
+        "finding": finding,
+        "value": value,
+        "source": MODULE_SOURCES.get(module, module),
+        "risk_level": risk,
+        "category": category,
+    }
+
+
+def iter_json_events(fh, read_size=READ_SIZE):
+    """Yield the objects of a JSON array (or NDJSON stream) one at a time.
+
+    Only ``read_size`` characters plus the current object are buffered.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    while True:
+        # Skip whitespace and array punctuation between objects
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer, pos = fh.read(read_size), 0
+            eof = not buffer
+            continue
+        try:
+            event, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = fh.read(read_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield event
+        pos = end
+
+
+def iter_csv_events(fh):
+    for row in csv.DictReader(fh):
+        yield {CSV_FIELDS.get(key, key): value for key, value in row.items()}
+
+
+def iter_findings(path, target=None):
+    """Yield normalized findings from a SpiderFoot ``.json``/``.ndjson``/``.csv`` export."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as fh:
+        events = iter_csv_events(fh) if ext == ".csv" else iter_json_events(fh)
+        for event in events:
+            record = normalize(event, target)
+            if record is not None:
+                yield record
+
+
+def iter_chunks(records, chunk_size=CHUNK_SIZE):
+    """Group an iterable into lists of at most ``chunk_size`` items."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
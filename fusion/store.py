@@ -0,0 +1,599 @@
+"""SQLite store for imported findings, services and correlations.
+
+Lookups by IP, domain, port, service and CVE are served from indexes, so
+``fusion find`` does not have to re-import or re-correlate anything.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+from fusion.correlate import RISK_WEIGHTS, WEB_SERVICES, finding_range
+from fusion.ranges import RangeIndex, ip_int, ip_sort_key, parse_cidr
+from fusion.versions import parse_requirement, parse_software, version_text
+
+DEFAULT_PATH = "fusion.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    target TEXT, type TEXT, finding TEXT, value TEXT,
+    source TEXT, risk_level TEXT, category TEXT,
+    rname TEXT, product TEXT,
+    key TEXT UNIQUE, hash TEXT, origin TEXT, generation INTEGER
+);
+CREATE TABLE IF NOT EXISTS services (
+    id INTEGER PRIMARY KEY,
+    ip TEXT, port INTEGER, service TEXT, version TEXT,
+    state TEXT, banner TEXT, risk_level TEXT, vulnerabilities TEXT,
+    ipkey TEXT, product TEXT, product_version TEXT,
+    key TEXT UNIQUE, hash TEXT, origin TEXT, generation INTEGER
+);
+CREATE TABLE IF NOT EXISTS service_cves (
+    service_id INTEGER REFERENCES services(id) ON DELETE CASCADE,
+    cve TEXT
+);
+CREATE TABLE IF NOT EXISTS correlations (
+    finding_id INTEGER REFERENCES findings(id) ON DELETE CASCADE,
+    service_id INTEGER REFERENCES services(id) ON DELETE CASCADE,
+    score REAL, reasons TEXT, combined_risk TEXT,
+    PRIMARY KEY (finding_id, service_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS imports (
+    generation INTEGER PRIMARY KEY,
+    started REAL
+);
+-- Per (finding type, service, score) counts of stored correlations, kept
+-- current by the triggers below so the heatmap never re-reads raw pairs
+CREATE TABLE IF NOT EXISTS heatmap_scores (
+    osint_type TEXT, nmap_service TEXT, score REAL, count INTEGER,
+    PRIMARY KEY (osint_type, nmap_service, score)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS correlations_heatmap_insert AFTER INSERT ON correlations BEGIN
+    INSERT INTO heatmap_scores VALUES (
+        (SELECT type FROM findings WHERE id = NEW.finding_id),
+        (SELECT service FROM services WHERE id = NEW.service_id), NEW.score, 1)
+    ON CONFLICT (osint_type, nmap_service, score) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS correlations_heatmap_delete AFTER DELETE ON correlations BEGIN
+    UPDATE heatmap_scores SET count = count - 1
+    WHERE osint_type = (SELECT type FROM findings WHERE id = OLD.finding_id)
+    AND nmap_service = (SELECT service FROM services WHERE id = OLD.service_id) AND score = OLD.score;
+END;
+-- Drop correlations while their finding/service still exists (cascades run too late for the trigger above)
+CREATE TRIGGER IF NOT EXISTS findings_drop_correlations BEFORE DELETE ON findings BEGIN
+    DELETE FROM correlations WHERE finding_id = OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS services_drop_correlations BEFORE DELETE ON services BEGIN
+    DELETE FROM correlations WHERE service_id = OLD.id;
+END;
+CREATE INDEX IF NOT EXISTS findings_value ON findings(value);
+CREATE INDEX IF NOT EXISTS findings_target ON findings(target);
+CREATE INDEX IF NOT EXISTS findings_rname ON findings(rname);
+CREATE INDEX IF NOT EXISTS findings_type ON findings(type, finding);
+CREATE INDEX IF NOT EXISTS findings_finding ON findings(finding);
+CREATE INDEX IF NOT EXISTS findings_category ON findings(category, risk_level);
+CREATE INDEX IF NOT EXISTS findings_origin ON findings(origin, generation);
+CREATE INDEX IF NOT EXISTS findings_product ON findings(product);
+CREATE INDEX IF NOT EXISTS services_ip ON services(ip, port);
+CREATE INDEX IF NOT EXISTS services_ipkey ON services(ipkey);
+CREATE INDEX IF NOT EXISTS services_port ON services(port);
+CREATE INDEX IF NOT EXISTS services_service ON services(service, risk_level);
+CREATE INDEX IF NOT EXISTS services_version ON services(version);
+CREATE INDEX IF NOT EXISTS services_origin ON services(origin, generation);
+CREATE INDEX IF NOT EXISTS services_product ON services(product, product_version);
+CREATE INDEX IF NOT EXISTS service_cves_cve ON service_cves(cve);
+CREATE INDEX IF NOT EXISTS service_cves_service ON service_cves(service_id);
+CREATE INDEX IF NOT EXISTS correlations_service ON correlations(service_id);
+CREATE INDEX IF NOT EXISTS findings_risk ON findings(risk_level);
+CREATE INDEX IF NOT EXISTS services_risk ON services(risk_level);
+CREATE INDEX IF NOT EXISTS correlations_risk ON correlations(combined_risk);
+"""
+
+# Trigram full-text indexes over the columns the dashboard API searches, so a
+# substring filter is an index lookup instead of a LIKE scan of every row;
+# kept current by triggers like the heatmap. Optional: SQLite builds without
+# FTS5 (or before 3.34) fall back to LIKE.
+SEARCH_COLUMNS = {
+    "findings": ("target", "type", "finding", "value", "source", "risk_level", "category"),
+    "services": ("ip", "port", "key", "service", "version", "state", "banner", "risk_level", "vulnerabilities"),
+}
+SEARCH_SCHEMA = "".join(
+    f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {table}_search USING fts5(
+    {', '.join(columns)}, content='{table}', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {table}_search (rowid, {', '.join(columns)}) VALUES (NEW.id, {', '.join('NEW.' + c for c in columns)});
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {table}_search ({table}_search, rowid, {', '.join(columns)})
+    VALUES ('delete', OLD.id, {', '.join('OLD.' + c for c in columns)});
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+    INSERT INTO {table}_search ({table}_search, rowid, {', '.join(columns)})
+    VALUES ('delete', OLD.id, {', '.join('OLD.' + c for c in columns)});
+    INSERT INTO {table}_search (rowid, {', '.join(columns)}) VALUES (NEW.id, {', '.join('NEW.' + c for c in columns)});
+END;
+""" for table, columns in SEARCH_COLUMNS.items()) + """
+-- Correlations have no integer id (WITHOUT ROWID): their reasons are indexed
+-- contentless under the pair packed into one rowid, see CORRELATION_ROWID
+CREATE VIRTUAL TABLE IF NOT EXISTS correlations_search USING fts5(
+    reasons, content='', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS correlations_search_insert AFTER INSERT ON correlations BEGIN
+    INSERT INTO correlations_search (rowid, reasons) VALUES ((NEW.finding_id << 32) + NEW.service_id, NEW.reasons);
+END;
+CREATE TRIGGER IF NOT EXISTS correlations_search_delete AFTER DELETE ON correlations BEGIN
+    INSERT INTO correlations_search (correlations_search, rowid, reasons)
+    VALUES ('delete', (OLD.finding_id << 32) + OLD.service_id, OLD.reasons);
+END;
+CREATE TRIGGER IF NOT EXISTS correlations_search_update AFTER UPDATE OF reasons ON correlations BEGIN
+    INSERT INTO correlations_search (correlations_search, rowid, reasons)
+    VALUES ('delete', (OLD.finding_id << 32) + OLD.service_id, OLD.reasons);
+    INSERT INTO correlations_search (rowid, reasons) VALUES ((NEW.finding_id << 32) + NEW.service_id, NEW.reasons);
+END;
+"""
+# Rowid of a correlation in ``correlations_search`` (service ids stay below 2**32)
+CORRELATION_ROWID = "(c.finding_id << 32) + c.service_id"
+
+CORRELATION_SELECT = (
+    "SELECT c.*, f.finding, f.type, f.risk_level AS osint_risk, s.ip, s.port, s.service, s.risk_level AS nmap_risk"
+    " FROM correlations c JOIN findings f ON f.id = c.finding_id JOIN services s ON s.id = c.service_id"
+)
+# Ids bound per ``IN (...)``, well below SQLITE_MAX_VARIABLE_NUMBER (32766, or 999 before SQLite 3.32)
+ID_BATCH = 500
+
+# Normalized software columns (fusion.versions) the technology rule is looked up by
+PRODUCT_COLUMNS = {"findings": ("product",), "services": ("product", "product_version")}
+
+FINDING_FIELDS = ("target", "type", "finding", "value", "source", "risk_level", "category")
+SERVICE_FIELDS = ("ip", "port", "service", "version", "state", "banner", "risk_level")
+
+
+def finding_key(record):
+    return "|".join((record["target"], record["type"], record["finding"], record["value"]))
+
+
+def service_key(record):
+    return f"{record['ip']}:{record['port']}"
+
+
+def content_hash(values):
+    return hashlib.sha1(json.dumps(values).encode()).hexdigest()
+
+
+def finding_product(record):
+    """Product key a Technology finding names, ``""`` if it names none, ``None`` for other findings."""
+    if record["type"] != "Technology":
+        return None
+    requirement = parse_requirement(record["finding"])
+    return requirement.key if requirement is not None else ""
+
+
+def service_product(record):
+    """``(product key, version text)`` of the software a service runs, or ``(None, None)``."""
+    software = parse_software(record["service"], record["version"] or "", record["banner"] or "")
+    if software is None:
+        return None, None
+    return software.key, version_text(software.version)
+
+
+def reverse_name(name):
+    """``admin.acme.corp`` -> ``corp.acme.admin`` so domain suffixes become index prefixes."""
+    if not name or "." not in name or " " in name or "@" in name or "/" in name:
+        return None
+    return ".".join(reversed(name.lower().rstrip(".").split(".")))
+
+
+class Store:
+    """Thin wrapper around a SQLite database holding one fusion workspace."""
+
+    def __init__(self, path=DEFAULT_PATH, check_same_thread=True):
+        self.path = path
+        # check_same_thread=False lets a pool hand the store from thread to thread
+        self.db = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        # INSERT OR REPLACE must fire the heatmap delete trigger for the replaced row
+        self.db.execute("PRAGMA recursive_triggers = ON")
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode = WAL")
+            self.db.execute("PRAGMA synchronous = NORMAL")
+        new_heatmap = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'heatmap_scores'").fetchone() is None
+        # Stores created before the product columns existed get them before their indexes
+        unversioned = self._add_product_columns()
+        self.db.executescript(SCHEMA)
+        if new_heatmap:
+            # Stores created before the heatmap table existed
+            self.rebuild_heatmap()
+        for table in unversioned:
+            self.fill_products(table)
+        new_search = self.db.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+            " AND name IN ('findings_search', 'services_search', 'correlations_search')").fetchone()[0] < 3
+        try:
+            self.db.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            # No FTS5 or no trigram tokenizer in this SQLite build
+            self.text_search = False
+        else:
+            self.text_search = True
+            if new_search:
+                # New stores, and stores created before (some of) the search tables
+                self.rebuild_search()
+        self.db.commit()
+        # IP Range index, for candidate lookups
+        self._ranges = None
+
+    def reset_indexes(self):
+        """Forget the in-memory indexes, e.g. after another process changed the store."""
+        self._ranges = None
+
+    def _add_product_columns(self):
+        altered = []
+        for table, columns in PRODUCT_COLUMNS.items():
+            existing = {row[1] for row in self.db.execute(f"PRAGMA table_info({table})")}
+            if existing and columns[0] not in existing:
+                for column in columns:
+                    self.db.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+                altered.append(table)
+        return altered
+
+    def fill_products(self, table):
+        """Recompute the product columns of every row of ``table``."""
+        if table == "findings":
+            rows = self.db.execute("SELECT id, type, finding FROM findings WHERE type = 'Technology'").fetchall()
+            self.db.executemany("UPDATE findings SET product = ? WHERE id = ?",
+                                ((finding_product(row), row["id"]) for row in rows))
+        else:
+            rows = self.db.execute("SELECT id, service, version, banner FROM services").fetchall()
+            self.db.executemany("UPDATE services SET product = ?, product_version = ? WHERE id = ?",
+                                ((*service_product(row), row["id"]) for row in rows))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.db.commit()
+        self.close()
+
+    def commit(self):
+        self.db.commit()
+
+    # -- writes ---------------------------------------------------------
+
+    def begin_import(self):
+        """Start a new import generation; rows it touches are stamped with it."""
+        cursor = self.db.execute("INSERT INTO imports (started) VALUES (?)", (time.time(),))
+        return cursor.lastrowid
+
+    def upsert_findings(self, records, origin, generation):
+        """Insert or update ``spiderfoot_data`` records from ``origin``.
+
+        Returns the ids of new or changed findings; their old correlations
+        are dropped. Unchanged findings are only re-stamped.
+        """
+        changed = []
+        for record in records:
+            values = [record[field] for field in FINDING_FIELDS]
+            key, digest = finding_key(record), content_hash(values)
+            row = self.db.execute("SELECT id, hash FROM findings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                cursor = self.db.execute(
+                    "INSERT INTO findings (target, type, finding, value, source, risk_level, category,"
+                    " rname, product, key, hash, origin, generation) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    values + [reverse_name(record["finding"]), finding_product(record), key, digest, origin,
+                              generation],
+                )
+                changed.append(cursor.lastrowid)
+            elif row["hash"] != digest:
+                # Correlations go first, while the heatmap trigger still sees the old record
+                self.db.execute("DELETE FROM correlations WHERE finding_id = ?", (row["id"],))
+                self.db.execute(
+                    "UPDATE findings SET source = ?, risk_level = ?, category = ?, hash = ?,"
+                    " origin = ?, generation = ? WHERE id = ?",
+                    (record["source"], record["risk_level"], record["category"], digest,
+                     origin, generation, row["id"]),
+                )
+                changed.append(row["id"])
+            else:
+                self.db.execute("UPDATE findings SET origin = ?, generation = ? WHERE id = ?",
+                                (origin, generation, row["id"]))
+        if changed:
+            self._ranges = None
+        return changed
+
+    def upsert_services(self, records, origin, generation):
+        """Insert or update ``nmap_data`` records from ``origin``; see :meth:`upsert_findings`."""
+        changed = []
+        for record in records:
+            values = [record[field] for field in SERVICE_FIELDS] + [json.dumps(record["vulnerabilities"])]
+            key, digest = service_key(record), content_hash(values)
+            row = self.db.execute("SELECT id, hash FROM services WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                cursor = self.db.execute(
+                    "INSERT INTO services (ip, port, service, version, state, banner, risk_level,"
+                    " vulnerabilities, ipkey, product, product_version, key, hash, origin, generation)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    values + [_ipkey(record["ip"]), *service_product(record), key, digest, origin, generation],
+                )
+                service_id = cursor.lastrowid
+            elif row["hash"] != digest:
+                service_id = row["id"]
+                self.db.execute("DELETE FROM correlations WHERE service_id = ?", (service_id,))
+                self.db.execute(
+                    "UPDATE services SET service = ?, version = ?, state = ?, banner = ?, risk_level = ?,"
+                    " vulnerabilities = ?, product = ?, product_version = ?, hash = ?, origin = ?, generation = ?"
+                    " WHERE id = ?",
+                    values[2:] + [*service_product(record), digest, origin, generation, service_id],
+                )
+                self.db.execute("DELETE FROM service_cves WHERE service_id = ?", (service_id,))
+            else:
+                self.db.execute("UPDATE services SET origin = ?, generation = ? WHERE id = ?",
+                                (origin, generation, row["id"]))
+                continue
+            self.db.executemany(
+                "INSERT INTO service_cves (service_id, cve) VALUES (?, ?)",
+                [(service_id, cve) for cve in record["vulnerabilities"]],
+            )
+            changed.append(service_id)
+        return changed
+
+    def retract(self, table, origin, generation):
+        """Delete rows of ``origin`` not seen in ``generation`` (and their correlations).
+
+        Returns the number of rows removed.
+        """
+        cursor = self.db.execute(
+            f"DELETE FROM {table} WHERE origin = ? AND generation < ?", (origin, generation)
+        )
+        if cursor.rowcount:
+            self.reset_indexes()
+        return cursor.rowcount
+
+    def add_correlations(self, rows):
+        """Insert ``(finding_id, service_id, score, reasons, combined_risk)`` rows."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO correlations VALUES (?, ?, ?, ?, ?)",
+            ((finding_id, service_id, score, json.dumps(reasons), risk)
+             for finding_id, service_id, score, reasons, risk in rows),
+        )
+
+    def rebuild_heatmap(self):
+        """Recount ``heatmap_scores`` from the stored correlations."""
+        self.db.execute("DELETE FROM heatmap_scores")
+        self.db.execute(
+            "INSERT INTO heatmap_scores SELECT f.type, s.service, c.score, COUNT(*)"
+            " FROM correlations c JOIN findings f ON f.id = c.finding_id"
+            " JOIN services s ON s.id = c.service_id GROUP BY f.type, s.service, c.score"
+        )
+
+    def rebuild_search(self):
+        """Re-index the full-text search tables from the stored rows."""
+        for table in SEARCH_COLUMNS:
+            self.db.execute(f"INSERT INTO {table}_search ({table}_search) VALUES ('rebuild')")
+        # Contentless, so it cannot rebuild itself from the table
+        self.db.execute("INSERT INTO correlations_search (correlations_search) VALUES ('delete-all')")
+        self.db.execute(f"INSERT INTO correlations_search (rowid, reasons) SELECT {CORRELATION_ROWID}, reasons"
+                        " FROM correlations c")
+
+    # -- reads ----------------------------------------------------------
+
+    def counts(self):
+        return {table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("findings", "services", "correlations")}
+
+    def heatmap_cells(self):
+        """``(osint_type, nmap_service, total score, count, max score)`` per heatmap cell."""
+        return self.db.execute(
+            "SELECT osint_type, nmap_service, SUM(score * count), SUM(count), MAX(score)"
+            " FROM heatmap_scores WHERE count > 0 GROUP BY osint_type, nmap_service"
+        ).fetchall()
+
+    def services(self, where, params=(), limit=None, offset=0):
+        rows = self.db.execute(f"SELECT * FROM services WHERE {where} ORDER BY ip, port{_page(limit, offset)}",
+                               params)
+        return [_service(row) for row in rows]
+
+    def findings(self, where, params=(), limit=None, offset=0):
+        rows = self.db.execute(f"SELECT * FROM findings WHERE {where} ORDER BY id{_page(limit, offset)}", params)
+        return [_finding(row) for row in rows]
+
+    def services_by_ip(self, ip):
+        return self.services(*self.service_filter(ip=ip))
+
+    def services_by_port(self, port):
+        return self.services(*self.service_filter(port=port))
+
+    def services_by_service(self, service):
+        return self.services(*self.service_filter(service=service))
+
+    def services_by_cve(self, cve):
+        return self.services(*self.service_filter(cve=cve))
+
+    def findings_by_ip(self, ip):
+        """Findings whose value is ``ip`` or whose IP Range contains it."""
+        return self.findings(*self.finding_filter(ip=ip))
+
+    def findings_by_domain(self, domain):
+        """Findings for ``domain`` itself, its subdomains, or scans targeting it."""
+        return self.findings(*self.finding_filter(domain=domain))
+
+    def finding_filter(self, domain=None, ip=None):
+        """``(where, params)`` of the findings matching any of the criteria (``None`` without any)."""
+        clauses, params = [], []
+        if domain:
+            rname = reverse_name(domain) or domain.lower()
+            clauses.append("target = ? OR rname = ? OR (rname > ? AND rname < ?)")
+            params += [domain, rname, rname + ".", rname + "/"]
+        if ip:
+            # Ranges containing one address are few, so their ids are bound directly
+            ranges = list(self.range_index().lookup_ip(ip))
+            clauses.append(f"value = ? OR id IN ({','.join('?' * len(ranges))})" if ranges else "value = ?")
+            params += [ip] + ranges
+        return (" OR ".join(f"({clause})" for clause in clauses), params) if clauses else None
+
+    def service_filter(self, ip=None, port=None, service=None, cve=None):
+        """``(where, params)`` of the services matching any of the criteria (``None`` without any)."""
+        clauses, params = [], []
+        if ip:
+            clauses.append("ip = ?")
+            params.append(ip)
+        if port is not None:
+            clauses.append("port = ?")
+            params.append(port)
+        if service:
+            clauses.append("service = ? COLLATE NOCASE")
+            params.append(service)
+        if cve:
+            clauses.append("id IN (SELECT service_id FROM service_cves WHERE cve = ?)")
+            params.append(cve.upper())
+        return (" OR ".join(clauses), params) if clauses else None
+
+    def correlations_matching(self, findings=None, services=None, limit=None, offset=0):
+        """Correlations of the findings or services matching ``(where, params)`` filters.
+
+        The filters stay subqueries, so any number of matching rows costs no
+        bound variables; only the key pairs are sorted, and just one page of
+        them is joined to its finding and service.
+        """
+        parts, params = [], []
+        for column, table, where in (("finding_id", "findings", findings), ("service_id", "services", services)):
+            if where is not None:
+                parts.append(f"SELECT finding_id, service_id FROM correlations"
+                             f" WHERE {column} IN (SELECT id FROM {table} WHERE {where[0]})")
+                params += where[1]
+        if not parts:
+            return []
+        rows = self.db.execute(
+            f"{CORRELATION_SELECT} JOIN ({' UNION '.join(parts)} ORDER BY 1, 2{_page(limit, offset)}) page"
+            " ON c.finding_id = page.finding_id AND c.service_id = page.service_id"
+            " ORDER BY c.finding_id, c.service_id",
+            params,
+        )
+        return [_correlation(row) for row in rows]
+
+    # -- candidate lookups for incremental correlation ------------------
+
+    def by_ids(self, table, ids, batch=ID_BATCH):
+        """Records of ``table`` ("findings" or "services") with the given ids."""
+        fetch = self.findings if table == "findings" else self.services
+        for start in range(0, len(ids), batch):
+            part = ids[start:start + batch]
+            yield from fetch(f"id IN ({','.join('?' * len(part))})", part)
+
+    def range_index(self):
+        """:class:`RangeIndex` of IP Range findings, payload = finding id."""
+        if self._ranges is None:
+            rows = self.db.execute("SELECT id, finding FROM findings WHERE type = 'IP Range'")
+            self._ranges = RangeIndex((*bounds, finding_id) for finding_id, bounds in
+                                      ((row[0], parse_cidr(row[1])) for row in rows) if bounds)
+        return self._ranges
+
+    def service_candidates(self, osint):
+        """Stored services that may correlate with ``osint`` (mirrors ``ScanIndex.candidates``)."""
+        clauses, params = ["ip = ?"], [osint["value"]]
+        if osint["type"] == "Technology":
+            clause, values = _technology_filter(osint["finding"])
+            clauses.append(clause)
+            params += values
+        network = finding_range(osint)
+        if network is not None:
+            clauses.append("ipkey BETWEEN ? AND ?")
+            params += [ip_sort_key(network[0]), ip_sort_key(network[1])]
+        if osint["category"] == "Infrastructure":
+            near = _near_risks(osint["risk_level"])
+            clauses.append(f"(service IN ({','.join('?' * len(WEB_SERVICES))})"
+                           f" AND risk_level IN ({','.join('?' * len(near))}))")
+            params += list(WEB_SERVICES) + near
+        return self.services(" OR ".join(clauses), params)
+
+    def finding_candidates(self, scan):
+        """Stored findings that may correlate with ``scan``."""
+        clauses, params = ["value = ?"], [scan["ip"]]
+        # Technology findings naming this product (version constraints are left to
+        # the scoring), or naming no product and found in the version string
+        product, _ = service_product(scan)
+        if product is not None:
+            clauses.append("product = ?")
+            params.append(product)
+        clauses.append("(product = '' AND instr(?, finding) > 0)")
+        params.append(scan["version"])
+        ranges = list(self.range_index().lookup_ip(scan["ip"]))
+        if ranges:
+            clauses.append(f"id IN ({','.join('?' * len(ranges))})")
+            params += ranges
+        if scan["service"] in WEB_SERVICES:
+            near = _near_risks(scan["risk_level"])
+            clauses.append(f"(category = 'Infrastructure' AND risk_level IN ({','.join('?' * len(near))}))")
+            params += near
+        return self.findings(" OR ".join(clauses), params)
+
+
+def _ipkey(ip):
+    key = ip_int(ip)
+    return ip_sort_key(key) if key is not None else None
+
+
+def _technology_filter(finding):
+    """``(where, params)`` of the services a Technology finding may match.
+
+    Rows of the named product, narrowed to the version prefix when the
+    finding gives one; range constraints are checked when the pair is scored.
+    """
+    requirement = parse_requirement(finding)
+    if requirement is None:
+        return "instr(version, ?) > 0", [finding]
+    prefix = next((version for op, version in requirement.constraints if op == "prefix"), None)
+    if prefix is None:
+        return "product = ?", [requirement.key]
+    text = version_text(prefix)
+    return ("(product = ? AND (product_version = ? OR (product_version > ? AND product_version < ?)))",
+            [requirement.key, text, text + ".", text + "/"])
+
+
+def _page(limit, offset):
+    """``LIMIT``/``OFFSET`` clause; ``limit=None`` reads every row."""
+    if limit is None:
+        return f" LIMIT -1 OFFSET {int(offset)}" if offset else ""
+    return f" LIMIT {int(limit)} OFFSET {int(offset)}"
+
+
+def _near_risks(risk_level):
+    weight = RISK_WEIGHTS[risk_level]
+    return [level for level, other in RISK_WEIGHTS.items() if abs(weight - other) <= 1]
+
+
+def _finding(row):
+    record = {field: row[field] for field in FINDING_FIELDS}
+    record["id"] = row["id"]
+    return record
+
+
+def _service(row):
+    record = {field: row[field] for field in SERVICE_FIELDS}
+    record["vulnerabilities"] = json.loads(row["vulnerabilities"])
+    record["id"] = row["id"]
+    return record
+
+
+def _correlation(row):
+    return {
+        "finding_id": row["finding_id"],
+        "service_id": row["service_id"],
+        "osint_finding": row["finding"],
+        "osint_type": row["type"],
+        "osint_risk": row["osint_risk"],
+        "nmap_target": f"{row['ip']}:{row['port']}",
+        "nmap_service": row["service"],
+        "nmap_risk": row["nmap_risk"],
+        "correlation_score": row["score"],
+        "correlation_reasons": json.loads(row["reasons"]),
+        "combined_risk": row["combined_risk"],
+    }
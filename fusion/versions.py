@@ -0,0 +1,222 @@
+"""Product/version normalization for the technology rule.
+
+Technology findings ("Apache 2.4.41", "nginx >=1.18,<1.20") and nmap
+service data ("Apache 2.4.41", banners like ``Apache/2.4.41 (Ubuntu)`` or
+``SSH-2.0-OpenSSH_7.6p1``) are parsed into ``(vendor, product, version)``
+so a finding matches on product identity plus a version comparison rather
+than a raw substring test. Banner regexes are compiled once per service.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Lower-cased product spellings -> (vendor, product), CPE style
+PRODUCTS = {
+    "apache": ("apache", "http_server"),
+    "apache httpd": ("apache", "http_server"),
+    "apache http server": ("apache", "http_server"),
+    "httpd": ("apache", "http_server"),
+    "nginx": ("nginx", "nginx"),
+    "microsoft-iis": ("microsoft", "internet_information_services"),
+    "microsoft iis": ("microsoft", "internet_information_services"),
+    "microsoft iis httpd": ("microsoft", "internet_information_services"),
+    "iis": ("microsoft", "internet_information_services"),
+    "openssh": ("openbsd", "openssh"),
+    "mysql": ("oracle", "mysql"),
+    "mariadb": ("mariadb", "mariadb"),
+    "postgresql": ("postgresql", "postgresql"),
+    "vsftpd": ("beasts", "vsftpd"),
+    "proftpd": ("proftpd", "proftpd"),
+    "lighttpd": ("lighttpd", "lighttpd"),
+    "tomcat": ("apache", "tomcat"),
+    "apache tomcat": ("apache", "tomcat"),
+    "exim": ("exim", "exim"),
+    "postfix": ("postfix", "postfix"),
+    "redis": ("redis", "redis"),
+    "openssl": ("openssl", "openssl"),
+}
+
+# nmap service label -> product implied when only a bare version is known
+SERVICE_PRODUCTS = {
+    "MySQL": "mysql",
+    "PostgreSQL": "postgresql",
+    "SSH": "openssh",
+}
+
+GENERIC_PATTERN = r"(?P<product>[A-Za-z][A-Za-z0-9+._\- ]*?)[/ _\-]v?(?P<version>\d[\w.\-]*)"
+SERVICE_PATTERNS = {
+    "SSH": [r"SSH-\d\.\d+-(?P<product>[A-Za-z]+)[_\-](?P<version>\d[\w.]*)"],
+    "MySQL": [r"(?:\d+\.\d+\.\d+-)?(?P<version>\d+\.\d+\.\d+)-(?P<product>MariaDB)",
+              r"(?:(?P<product>MySQL|MariaDB)[ /])?(?P<version>\d+\.\d+\.\d+)"],
+}
+
+VERSION_PART_RE = re.compile(r"\d+|[A-Za-z]+")
+CONSTRAINT_RE = re.compile(r"(<=|>=|==|!=|<|>|=)\s*(\d[\w.\-]*)")
+GENERIC_RE = re.compile(GENERIC_PATTERN)
+
+
+class Software(NamedTuple):
+    vendor: str
+    product: str
+    version: tuple
+
+    @property
+    def key(self):
+        return f"{self.vendor}:{self.product}"
+
+
+class Requirement(NamedTuple):
+    """A Technology finding: product key plus version constraints ``(op, version)``."""
+
+    key: str
+    constraints: tuple
+
+
+def parse_version(text):
+    """``"7.6p1"`` -> ``(7, 6, "p", 1)``."""
+    return tuple(int(part) if part.isdigit() else part.lower() for part in VERSION_PART_RE.findall(text or ""))
+
+
+def version_text(version):
+    """``(7, 6, "p", 1)`` -> ``"7.6.p.1"``; a version prefix's text is a dotted prefix of it."""
+    return ".".join(str(part) for part in version)
+
+
+def version_order(version):
+    # Numbers sort after letters at the same position ("2.0rc1" < "2.0.0")
+    return tuple((1, part) if isinstance(part, int) else (0, part) for part in version)
+
+
+def product_key(name):
+    """``"Apache httpd"`` -> ``"apache:http_server"``; unknown names map to ``name:name``."""
+    name = " ".join(name.lower().replace("_", " ").split())
+    vendor, product = PRODUCTS.get(name, (name, name))
+    return f"{vendor}:{product}"
+
+
+@lru_cache(maxsize=None)
+def patterns_for(service):
+    """Compiled banner regexes for a service label, most specific first."""
+    return [re.compile(pattern) for pattern in SERVICE_PATTERNS.get(service, [])] + [GENERIC_RE]
+
+
+def _software(product, version):
+    key = product_key(product)
+    vendor, _, name = key.partition(":")
+    return Software(vendor, name, parse_version(version))
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_software(service, version, banner=""):
+    """Best :class:`Software` for an nmap service record, or ``None``."""
+    for text in (version, banner):
+        if not text:
+            continue
+        for pattern in patterns_for(service):
+            match = pattern.search(text)
+            if match:
+                product = match.group("product") or SERVICE_PRODUCTS.get(service)
+                if product:
+                    return _software(product, match.group("version"))
+    # Bare version ("5.7.30") on a service that implies its product
+    if version and service in SERVICE_PRODUCTS and parse_version(version):
+        return _software(SERVICE_PRODUCTS[service], version)
+    return None
+
+
+def scan_software(scan):
+    return parse_software(scan["service"], scan.get("version", ""), scan.get("banner", ""))
+
+
+@lru_cache(maxsize=1 << 14)
+def parse_requirement(finding):
+    """:class:`Requirement` for a Technology finding, or ``None`` if it names no product.
+
+    ``"Apache 2.4.41"`` and ``"Apache/2.4"`` are version prefixes,
+    ``"nginx >=1.18,<1.20"`` is a range and a bare ``"OpenSSH"`` matches
+    any version.
+    """
+    text = finding.strip()
+    operator = CONSTRAINT_RE.search(text)
+    if operator:
+        product = text[:operator.start()]
+        constraints = tuple((op, parse_version(version))
+                            for op, version in CONSTRAINT_RE.findall(text[operator.start():]))
+    else:
+        match = GENERIC_RE.match(text)
+        if match:
+            product, constraints = match.group("product"), (("prefix", parse_version(match.group("version"))),)
+        elif text and not any(char.isdigit() for char in text):
+            product, constraints = text, ()
+        else:
+            return None
+    product = product.strip(" /_-")
+    if not product:
+        return None
+    return Requirement(product_key(product), constraints)
+
+
+def satisfies(version, constraints):
+    """Whether a version tuple meets every ``(op, version)`` constraint."""
+    for op, wanted in constraints:
+        if op == "prefix":
+            ok = version[:len(wanted)] == wanted
+        else:
+            a, b = version_order(version), version_order(wanted)
+            ok = {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b,
+                  "=": a == b, "==": a == b, "!=": a != b}[op]
+        if not ok:
+            return False
+    return True
+
+
+def technology_match(finding, scan):
+    """Technology rule: does the finding name the software this service runs?
+
+    Findings that do not parse into a product fall back to the original
+    substring test on the version string.
+    """
+    requirement = parse_requirement(finding)
+    if requirement is None:
+        return finding in scan["version"]
+    software = scan_software(scan)
+    return software is not None and software.key == requirement.key \
+        and satisfies(software.version, requirement.constraints)
+
+
+class ProductIndex:
+    """Product key -> ``(version tuple, row)`` entries over service records.
+
+    A Technology finding is answered with one dict lookup plus a version
+    comparison per entry of that product; findings that name no product
+    fall back to a substring scan over the distinct version strings.
+    """
+
+    def __init__(self):
+        self.by_product = {}
+        self.by_version = {}
+        # finding -> sorted matching rows, reset whenever a row is added
+        self._rows = {}
+
+    def add(self, row, service, version, banner=""):
+        software = parse_software(service, version, banner or "")
+        if software is not None:
+            self.by_product.setdefault(software.key, []).append((software.version, row))
+        self.by_version.setdefault(version, []).append(row)
+        if self._rows:
+            self._rows.clear()
+
+    def lookup(self, finding):
+        """Sorted rows a Technology finding matches."""
+        rows = self._rows.get(finding)
+        if rows is None:
+            requirement = parse_requirement(finding)
+            if requirement is None:
+                rows = [row for version, version_rows in self.by_version.items() if finding in version
+                        for row in version_rows]
+            else:
+                rows = [row for version, row in self.by_product.get(requirement.key, ())
+                        if satisfies(version, requirement.constraints)]
+            rows.sort()
+            self._rows[finding] = rows
+        return rows
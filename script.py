@@ -1,5 +1,7 @@
 import json
-import pandas as pd
+
+from fusion.batch import correlate_records
+from fusion.records import Findings, Services
 
 # Create sample data showing correlation between Spiderfoot and nmap findings
 # This represents how OSINT data (Spiderfoot) correlates with network scanning (nmap)
@@ -107,53 +109,16 @@ nmap_data = [
     }
 ]
 
-# Create correlation analysis between Spiderfoot and nmap data
-correlations = []
-
-# Find correlations between OSINT findings and network scan results
-for osint in spiderfoot_data:
-    for scan in nmap_data:
-        correlation_score = 0
-        correlation_reasons = []
-        
-        # IP correlation
-        if osint["value"] == scan["ip"]:
-            correlation_score += 0.8
-            correlation_reasons.append("Direct IP match")
-        
-        # Technology/Version correlation
-        if osint["type"] == "Technology" and osint["finding"] in scan["version"]:
-            correlation_score += 0.9
-            correlation_reasons.append("Technology version match")
-        
-        # Risk level correlation
-        risk_weights = {"Low": 1, "Medium": 2, "High": 3}
-        if abs(risk_weights[osint["risk_level"]] - risk_weights[scan["risk_level"]]) <= 1:
-            correlation_score += 0.3
-            correlation_reasons.append("Similar risk levels")
-        
-        # Service correlation
-        if osint["category"] == "Infrastructure" and scan["service"] in ["HTTP", "HTTPS"]:
-            correlation_score += 0.4
-            correlation_reasons.append("Infrastructure service match")
-        
-        if correlation_score > 0.5:
-            correlations.append({
-                "osint_finding": osint["finding"],
-                "osint_type": osint["type"],
-                "osint_risk": osint["risk_level"],
-                "nmap_target": f"{scan['ip']}:{scan['port']}",
-                "nmap_service": scan["service"],
-                "nmap_risk": scan["risk_level"],
-                "correlation_score": round(correlation_score, 2),
-                "correlation_reasons": correlation_reasons,
-                "combined_risk": "High" if max(risk_weights[osint["risk_level"]], risk_weights[scan["risk_level"]]) >= 3 else "Medium" if max(risk_weights[osint["risk_level"]], risk_weights[scan["risk_level"]]) >= 2 else "Low"
-            })
+# Convert to compact columnar records (categorical codes, packed IPs, see fusion/records.py)
+findings = Findings.from_records(spiderfoot_data)
+services = Services.from_records(nmap_data)
+df_spiderfoot = findings.to_frame()
+df_nmap = services.to_frame()
 
-# Convert to DataFrames
-df_spiderfoot = pd.DataFrame(spiderfoot_data)
-df_nmap = pd.DataFrame(nmap_data)
-df_correlations = pd.DataFrame(correlations)
+# Create correlation analysis between Spiderfoot and nmap data
+# (batched scoring on the record codes, see fusion/batch.py)
+df_correlations = correlate_records(findings, services)
+correlations = df_correlations.to_dict("records")
 
 print("Spiderfoot OSINT Data:")
 print(df_spiderfoot.to_string(index=False))
@@ -167,8 +132,8 @@ print("Correlation Analysis:")
 print(df_correlations.to_string(index=False))
 
 # Save data for the web application
-spiderfoot_json = json.dumps(spiderfoot_data, indent=2)
-nmap_json = json.dumps(nmap_data, indent=2)
+spiderfoot_json = json.dumps(list(findings.iter_records()), indent=2)
+nmap_json = json.dumps(list(services.iter_records()), indent=2)
 correlations_json = json.dumps(correlations, indent=2)
 
 print(f"\nData prepared for web application with {len(correlations)} correlations found.")
\ No newline at end of file